@@ -1,5 +1,326 @@
+#!/usr/bin/env python3
+"""
+Proxmox Dynamic Inventory
+
+Ansible inventory script that builds the host list from the Proxmox API
+(through proxmoxer) instead of hand-maintained YAML. It lists the cluster
+nodes and their IPs from /cluster/status, then every VM on every online node
+with its config: name, status, vCPUs, memory, MAC, cloud-init IP and tags.
+Node listings and VM configs are fetched concurrently on a thread pool, so a
+refresh costs a few round trips rather than one per VM.
+
+Groups use the names of inventory/hosts.yml, so the two layer cleanly
+(`-i inventory/hosts.yml -i main.py`): proxmox_hosts for the nodes, and for
+VMs tagged in Proxmox agent_vms, service_vms and runner_vms. Every VM is also
+in proxmox_vms, proxmox_node_<node>, proxmox_<status> and tag_<tag>.
+
+The result is cached in ~/.cache/olympus/proxmox-inventory.json. A run
+within PROXMOX_INVENTORY_TTL seconds (default 300) of the last fetch answers
+from the cache without touching the API or importing proxmoxer. If the API is
+unreachable, an expired cache is used with a warning.
+
+Connection settings come from the environment and default to the values in
+inventory/group_vars/all:
+- PROXMOX_API_HOST
+- PROXMOX_API_USER
+- PROXMOX_API_TOKEN_ID
+- PROXMOX_API_TOKEN_SECRET (otherwise decrypted from the vault with
+  scripts/vault_secrets.py)
+
+Set PROXMOX_INVENTORY_FIXTURE (or --fixture) to replay API responses recorded
+with --record instead of calling a live cluster.
+
+Usage:
+    uv run ansible-inventory -i main.py --graph
+    uv run ansible-playbook -i inventory/hosts.yml -i main.py site.yml
+    uv run python3 main.py --list --refresh
+    uv run python3 main.py --record fixtures/proxmox-api.json --refresh
+    PROXMOX_INVENTORY_FIXTURE=fixtures/proxmox-api.json uv run ansible-inventory -i main.py --list
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ANSIBLE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = Path.home() / ".cache" / "olympus"
+CACHE_PATH = CACHE_DIR / "proxmox-inventory.json"
+INVENTORY_TTL = 300
+WORKERS = 16
+
+API_HOST = "10.220.1.7"
+API_USER = "ansible@pam"
+API_TOKEN_ID = "ansible-token"
+DOMAIN = "infiquetra.com"
+
+# Proxmox tag → the group inventory/hosts.yml already uses for those VMs
+TAG_GROUPS = {"agent": "agent_vms", "service": "service_vms", "runner": "runner_vms"}
+
+
+class InventoryError(Exception):
+    """The Proxmox API could not be reached and there is no cached inventory."""
+
+
+def warn(message: str) -> None:
+    # stdout is the inventory JSON Ansible parses; everything else goes to stderr
+    print(message, file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# API sources
+# ---------------------------------------------------------------------------
+
+
+class ProxmoxSource:
+    """Live API through proxmoxer, with a token from the environment or the vault."""
+
+    def __init__(self, host: str = "", user: str = "", token_id: str = "", token_secret: str = "",
+                 timeout: float = 10.0):
+        from proxmoxer import ProxmoxAPI
+
+        self.name = host or os.environ.get("PROXMOX_API_HOST", API_HOST)
+        self.api = ProxmoxAPI(
+            self.name,
+            user=user or os.environ.get("PROXMOX_API_USER", API_USER),
+            token_name=token_id or os.environ.get("PROXMOX_API_TOKEN_ID", API_TOKEN_ID),
+            token_value=token_secret or self.token_secret(),
+            verify_ssl=False,
+            timeout=timeout,
+        )
+
+    @staticmethod
+    def token_secret() -> str:
+        secret = os.environ.get("PROXMOX_API_TOKEN_SECRET")
+        if secret:
+            return secret
+        sys.path.insert(0, str(ANSIBLE_DIR.parent / "scripts"))
+        from vault_secrets import VaultError, load_secrets
+
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                return load_secrets(prefix="proxmox_api_token_secret")["proxmox_api_token_secret"]
+        except (VaultError, KeyError) as exc:
+            raise InventoryError(f"no Proxmox API token: set PROXMOX_API_TOKEN_SECRET ({exc})") from exc
+
+    def get(self, path: str) -> Any:
+        return self.api.get(path)
+
+
+class RecordedSource:
+    """Replays API responses recorded with --record; `latency` simulates the round trip."""
+
+    def __init__(self, path: Path, latency: float = 0.0):
+        recording = json.loads(Path(path).read_text())
+        self.name = f"fixture:{Path(path).resolve()}"
+        self.responses: Dict[str, Any] = recording["responses"]
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Any:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if path not in self.responses:
+            raise InventoryError(f"no recorded response for GET /{path}")
+        return copy.deepcopy(self.responses[path])
+
+
+class Recorder:
+    """Wraps a source and keeps every response, to be saved as a fixture."""
+
+    def __init__(self, source):
+        self.source = source
+        self.name = source.name
+        self.responses: Dict[str, Any] = {}
+
+    def get(self, path: str) -> Any:
+        response = self.source.get(path)
+        self.responses[path] = response
+        return response
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        recording = {"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "api": self.name,
+                     "responses": dict(sorted(self.responses.items()))}
+        _write_json(path, recording, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Fetch and build
+# ---------------------------------------------------------------------------
+
+
+def fetch(source, workers: int = WORKERS) -> Dict[str, Any]:
+    """Nodes, cluster status and every VM's list entry and config, fetched concurrently."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        nodes_future = pool.submit(source.get, "nodes")
+        status_future = pool.submit(source.get, "cluster/status")
+        nodes = [node for node in nodes_future.result() if node.get("status") == "online"]
+        listings = {node["node"]: pool.submit(source.get, f"nodes/{node['node']}/qemu") for node in nodes}
+        configs = {}
+        vms = []
+        # Each node's configs are queued as soon as its own listing arrives
+        for node, listing in listings.items():
+            for vm in listing.result():
+                if vm.get("template"):
+                    continue
+                vm["node"] = node
+                vms.append(vm)
+                configs[vm["vmid"]] = pool.submit(source.get, f"nodes/{node}/qemu/{vm['vmid']}/config")
+        for vm in vms:
+            vm["config"] = configs[vm["vmid"]].result()
+        return {"nodes": nodes_future.result(), "status": status_future.result(), "vms": vms}
+
+
+def fqdn(name: str, domain: str = DOMAIN) -> str:
+    return name if "." in name else f"{name}.{domain}"
+
+
+def _tags(value: Optional[str]) -> List[str]:
+    return sorted({tag for tag in re.split(r"[;, ]+", value or "") if tag})
+
+
+def _cloud_init_ip(config: Dict[str, Any]) -> Optional[str]:
+    match = re.search(r"(?:^|,)ip=([\d.]+)", config.get("ipconfig0", ""))
+    return match.group(1) if match else None
+
+
+def _mac(config: Dict[str, Any]) -> Optional[str]:
+    match = re.search(r"=([0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5})", config.get("net0", ""))
+    return match.group(1).lower() if match else None
+
+
+def build_inventory(data: Dict[str, Any], domain: str = DOMAIN) -> Dict[str, Any]:
+    """Ansible --list JSON (groups plus _meta.hostvars) from fetched API data."""
+    groups: Dict[str, List[str]] = {}
+    hostvars: Dict[str, Dict[str, Any]] = {}
+
+    def add(group: str, host: str) -> None:
+        groups.setdefault(group, []).append(host)
+
+    addresses = {entry["name"]: entry.get("ip") for entry in data["status"] if entry.get("type") == "node"}
+    for node in sorted(data["nodes"], key=lambda n: n["node"]):
+        host = fqdn(node["node"], domain)
+        add("proxmox_hosts", host)
+        hostvars[host] = {
+            "ansible_host": addresses.get(node["node"]),
+            "proxmox_node": node["node"],
+            "proxmox_status": node.get("status"),
+            "proxmox_maxcpu": node.get("maxcpu"),
+            "proxmox_maxmem": node.get("maxmem"),
+        }
+
+    for vm in sorted(data["vms"], key=lambda v: v["vmid"]):
+        config = vm["config"]
+        host = fqdn(vm.get("name") or config.get("name") or f"vm{vm['vmid']}", domain)
+        tags = _tags(config.get("tags") or vm.get("tags"))
+        status = vm.get("status", "unknown")
+        hostvars[host] = {
+            "ansible_host": _cloud_init_ip(config),
+            "proxmox_vmid": vm["vmid"],
+            "proxmox_node": fqdn(vm["node"], domain),
+            "proxmox_status": status,
+            "proxmox_tags": tags,
+            "proxmox_vcpus": int(config.get("cores", vm.get("cpus", 1))) * int(config.get("sockets", 1)),
+            "proxmox_memory_mb": int(config.get("memory", (vm.get("maxmem") or 0) >> 20)),
+            "proxmox_mac": _mac(config),
+        }
+        for group in ["proxmox_vms", f"proxmox_node_{vm['node']}", f"proxmox_{status}",
+                      *(f"tag_{tag}" for tag in tags), *(TAG_GROUPS[tag] for tag in tags if tag in TAG_GROUPS)]:
+            add(re.sub(r"[^A-Za-z0-9_]", "_", group), host)
+
+    inventory: Dict[str, Any] = {name: {"hosts": sorted(set(hosts))} for name, hosts in sorted(groups.items())}
+    inventory["all"] = {"children": ["ungrouped", *sorted(groups)]}
+    inventory["_meta"] = {"hostvars": {host: {k: v for k, v in hv.items() if v is not None}
+                                       for host, hv in sorted(hostvars.items())}}
+    return inventory
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+def _write_json(path: Path, value: Any, indent: Optional[int] = None) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(value, indent=indent))
+    os.replace(tmp, path)
+
+
+def load_cache(path: Path, source_name: str) -> Optional[Dict[str, Any]]:
+    try:
+        cached = json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        warn(f"⚠️  Ignoring corrupt inventory cache {path}")
+        return None
+    return cached if cached.get("source") == source_name else None
+
+
+def inventory(ttl: float = INVENTORY_TTL, refresh: bool = False, fixture: Optional[Path] = None,
+              record: Optional[Path] = None, cache_path: Path = CACHE_PATH, workers: int = WORKERS,
+              source=None) -> Dict[str, Any]:
+    """The inventory: cached if younger than `ttl`, else fetched (and cached)."""
+    fixture = fixture or (Path(os.environ["PROXMOX_INVENTORY_FIXTURE"])
+                          if os.environ.get("PROXMOX_INVENTORY_FIXTURE") else None)
+    source_name = (source.name if source else f"fixture:{fixture.resolve()}" if fixture
+                   else os.environ.get("PROXMOX_API_HOST", API_HOST))
+    cached = load_cache(cache_path, source_name)
+    if cached and not refresh and not record and time.time() - cached["fetched_at"] < ttl:
+        return cached["inventory"]
+
+    try:
+        if source is None:
+            source = RecordedSource(fixture) if fixture else ProxmoxSource()
+        if record:
+            source = Recorder(source)
+        result = build_inventory(fetch(source, workers))
+    except Exception as exc:  # requests/proxmoxer raise a variety of transport errors
+        if not cached:
+            raise InventoryError(f"Proxmox API {source_name}: {exc}") from exc
+        age = time.time() - cached["fetched_at"]
+        warn(f"⚠️  Proxmox API {source_name} unavailable ({exc}); using inventory cached {age:.0f}s ago")
+        return cached["inventory"]
+
+    if record:
+        source.save(record)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_json(cache_path, {"source": source_name, "fetched_at": time.time(), "inventory": result})
+    return result
+
+
 def main():
-    print("Hello from ansible!")
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--list", action="store_true", help="print the whole inventory (the default)")
+    parser.add_argument("--host", help="print one host's variables")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cache and query the API")
+    parser.add_argument("--ttl", type=float, default=float(os.environ.get("PROXMOX_INVENTORY_TTL", INVENTORY_TTL)),
+                        help="seconds a cached inventory is reused")
+    parser.add_argument("--fixture", type=Path, help="replay recorded API responses instead of the live API")
+    parser.add_argument("--record", type=Path, help="save the API responses of this fetch as a fixture")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent API requests")
+    args = parser.parse_args()
+
+    try:
+        result = inventory(args.ttl, args.refresh, args.fixture, args.record, workers=args.workers)
+    except InventoryError as exc:
+        warn(f"❌ {exc}")
+        sys.exit(1)
+    if args.host:
+        result = result["_meta"]["hostvars"].get(args.host, {})
+    json.dump(result, sys.stdout, indent=2)
+    print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Asset Build Graph
+
+Brings everything under assets/ up to date with one command. Every asset is a
+node in an explicit dependency graph, and each node's recipe (drawing config,
+prompt, target sizes) is hashed into its fingerprint:
+
+  paint     icons/ and app_icons/, drawn from their configs
+            (discord_avatars.py, discord_app_icons.py), every Discord size
+  source    the raw Replicate output for an AI icon or banner, kept in
+            assets/.cache/sources/ (replicate_jobs.py: paced, resumable)
+  derive    ai_icons/, ai_app_icons/ and banners/, resized from a source
+  upload    avatars, app icons, banners and the server icon on Discord
+            (only with --upload; upload_manifest.py skips unchanged bytes)
+
+A node is stale when its fingerprint changed, an output is missing or changed
+on disk, or an input's outputs changed since it was built. Outputs are checked
+by mtime and size against assets/.cache/build-state.json, and a file is only
+hashed when its stat changed, so an up-to-date tree is checked without reading
+any image. Stale nodes start as soon as their inputs finish: paints in a
+process pool, Replicate jobs concurrently, derivations in threads and uploads
+through one AsyncDiscordClient per bot token. A node whose input failed is
+skipped.
+
+Generated assets that predate the graph are adopted instead of paid for again.
+On the first run a source or derive node whose outputs already exist is
+recorded as built, and a missing source is seeded from its existing 512px or
+banner file.
+
+Usage:
+    uv run --with aiohttp --with pillow --with numpy python3 scripts/asset_build.py [--plan]
+    uv run ... python3 scripts/asset_build.py 'banner:*' --tier paid
+    uv run ... --with ansible-core python3 scripts/asset_build.py --upload
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+import discord_ai_icons
+import discord_app_icons
+import discord_avatars
+import discord_banners
+import upload_ai_icons
+from discord_client import AsyncDiscordClient
+from icon_pipeline import asset_key
+from image_postprocess import REDUCING_GAP, derive_images
+from replicate_jobs import API_BASE, TIERS, JobQueue, JobRunner, QUEUE_PATH, flux_schnell_job
+from upload_manifest import UploadManifest
+from vault_secrets import VaultError, discord_bot_tokens
+
+ASSETS_DIR = Path("assets")
+SOURCE_DIR = ASSETS_DIR / ".cache" / "sources"
+STATE_PATH = ASSETS_DIR / ".cache" / "build-state.json"
+
+AVATAR_SIZE = (512, 512)
+BANNER_SIZE = (960, 540)
+
+
+@dataclass
+class Node:
+    """One buildable asset: what it is made from and the files it makes."""
+
+    name: str
+    kind: str  # "paint" | "source" | "derive" | "upload"
+    recipe: Dict[str, Any]
+    outputs: List[Path] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    adopt: bool = False  # existing outputs are recorded as built on the first run
+    seeds: List[Path] = field(default_factory=list)  # files a missing output can be adopted from
+
+    @property
+    def fingerprint(self) -> str:
+        payload = {"kind": self.kind, "recipe": self.recipe, "outputs": [str(path) for path in self.outputs]}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _paint_node(prefix: str, name: str, render, config: dict, output_dir: Path, sizes) -> Node:
+    """The largest size is output_dir/<name>.png, the others output_dir/<size>/<name>.png."""
+    sizes = sorted(sizes, reverse=True)
+    outputs = [output_dir / f"{name}.png"] + [output_dir / str(size) / f"{name}.png" for size in sizes[1:]]
+    recipe = {
+        "renderer": f"{render.__module__}.{render.__name__}",
+        "config": config,
+        "sizes": sizes,
+        "key": asset_key(render, config, sizes=sizes),
+    }
+    return Node(f"{prefix}:{name}", "paint", recipe, outputs)
+
+
+def build_graph(with_uploads: bool = False) -> Dict[str, Node]:
+    """Every asset node, inputs before the nodes that use them."""
+    nodes: List[Node] = []
+
+    for name, config in {**discord_avatars.BOT_CONFIGS, "mount_olympus": discord_avatars.SERVER_CONFIG}.items():
+        nodes.append(_paint_node("icon", name, discord_avatars.render_icon, config, ASSETS_DIR / "icons",
+                                 discord_avatars.ICON_SIZES))
+    for name, config in discord_app_icons.APP_ICON_CONFIGS.items():
+        nodes.append(_paint_node("app_icon", name, discord_app_icons.render_app_icon, config,
+                                 ASSETS_DIR / "app_icons", discord_app_icons.ICON_SIZES))
+
+    icon_prompts = {**discord_ai_icons.ICON_PROMPTS, "mount_olympus": discord_ai_icons.SERVER_PROMPT}
+    generated = [("icon", name, config["prompt"], "1:1",
+                  {ASSETS_DIR / "ai_icons" / f"{name}.png": AVATAR_SIZE,
+                   ASSETS_DIR / "ai_app_icons" / f"{name}.png": AVATAR_SIZE})
+                 for name, config in icon_prompts.items()]
+    generated += [("banner", name, config["prompt"], "16:9", {ASSETS_DIR / "banners" / f"{name}.png": BANNER_SIZE})
+                  for name, config in discord_banners.BANNER_PROMPTS.items()]
+    for kind, name, prompt, aspect_ratio, outputs in generated:
+        source = Node(f"source:{kind}:{name}", "source",
+                      {"prompt": prompt, "aspect_ratio": aspect_ratio},
+                      [SOURCE_DIR / f"{kind}-{name}.png"], adopt=True, seeds=list(outputs))
+        nodes.append(source)
+        nodes.append(Node(f"{'ai_icon' if kind == 'icon' else kind}:{name}", "derive",
+                          {"sizes": {str(path): size for path, size in outputs.items()}, "reducing_gap": REDUCING_GAP},
+                          list(outputs), [source.name], adopt=True))
+
+    if with_uploads:
+        for bot in upload_ai_icons.BOTS:
+            nodes.append(Node(f"upload:avatar:{bot}", "upload",
+                              {"bot": bot, "target": "avatar", "key": f"avatar:{bot}",
+                               "path": str(ASSETS_DIR / "ai_icons" / f"{bot}.png")}, inputs=[f"ai_icon:{bot}"]))
+        for bot, app_id in upload_ai_icons.APP_IDS.items():
+            nodes.append(Node(f"upload:app_icon:{bot}", "upload",
+                              {"bot": bot, "target": "app_icon", "key": f"app_icon:{app_id}", "app_id": app_id,
+                               "path": str(ASSETS_DIR / "ai_app_icons" / f"{bot}.png")}, inputs=[f"ai_icon:{bot}"]))
+            if bot in discord_banners.BANNER_PROMPTS:
+                nodes.append(Node(f"upload:banner:{bot}", "upload",
+                                  {"bot": bot, "target": "banner", "key": f"banner:{bot}",
+                                   "path": str(ASSETS_DIR / "banners" / f"{bot}.png")}, inputs=[f"banner:{bot}"]))
+        nodes.append(Node("upload:guild_icon", "upload",
+                          {"bot": "freya", "target": "guild_icon", "key": f"guild_icon:{upload_ai_icons.GUILD_ID}",
+                           "path": str(ASSETS_DIR / "ai_icons" / "mount_olympus.png")},
+                          inputs=["ai_icon:mount_olympus"]))
+
+    return {node.name: node for node in nodes}
+
+
+def select(graph: Dict[str, Node], patterns: List[str]) -> List[str]:
+    """Nodes matching any pattern plus everything they depend on, in graph order."""
+    wanted = set()
+    pending = [name for name in graph if not patterns or any(fnmatch.fnmatch(name, p) for p in patterns)]
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(graph[name].inputs)
+    return [name for name in graph if name in wanted]
+
+
+def _file_state(path: Path, recorded: Optional[dict]) -> dict:
+    """{"mtime_ns", "size", "sha256"}; the recorded hash is reused while the stat is unchanged."""
+    stat = path.stat()
+    if recorded and recorded["mtime_ns"] == stat.st_mtime_ns and recorded["size"] == stat.st_size:
+        return recorded
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest.hexdigest()}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _paint(renderer: str, config: dict) -> Dict[int, bytes]:
+    """Worker-process entry point: size → PNG bytes from a module-level renderer."""
+    module, name = renderer.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)(config)
+
+
+class BuildState:
+    """node → {"fingerprint", "inputs", "outputs"} of its last successful build, kept in a JSON file."""
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = path
+        try:
+            self.nodes: Dict[str, dict] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self.nodes = {}
+        except json.JSONDecodeError as e:
+            print(f"⚠️  Ignoring unreadable build state {path}: {e}")
+            self.nodes = {}
+
+    def output_digest(self, name: str) -> Optional[str]:
+        """One hash over a built node's outputs, which is what its dependents record."""
+        record = self.nodes.get(name)
+        if record is None:
+            return None
+        outputs = sorted((path, state["sha256"]) for path, state in record["outputs"].items())
+        return hashlib.sha256(json.dumps(outputs).encode()).hexdigest()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(self.nodes, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+
+class Builder:
+    """Runs the stale part of a graph; results are "built", "adopted", "current", "failed" or "blocked"."""
+
+    def __init__(
+        self,
+        graph: Dict[str, Node],
+        state: BuildState,
+        force: bool = False,
+        tier: str = "free",
+        replicate_token: Optional[str] = None,
+        replicate_api: Optional[str] = None,
+        discord_tokens: Optional[Dict[str, str]] = None,
+        discord_api: Optional[str] = None,
+        manifest: Optional[UploadManifest] = None,
+        queue_path: Path = QUEUE_PATH,
+        workers: Optional[int] = None,
+        **runner_options,
+    ):
+        self.graph = graph
+        self.state = state
+        self.force = force
+        self.tier = tier
+        self.replicate_token = replicate_token or os.environ.get("REPLICATE_API_TOKEN")
+        self.replicate_api = replicate_api or os.environ.get("REPLICATE_API_BASE", API_BASE)
+        self.discord_tokens = discord_tokens
+        self.discord_api = discord_api or upload_ai_icons.DISCORD_API_BASE
+        self.manifest = manifest
+        self.queue_path = queue_path
+        self.workers = workers
+        self.runner_options = runner_options
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._runner: Optional[JobRunner] = None
+        self._clients: Dict[str, AsyncDiscordClient] = {}
+        self._tokens_lock = asyncio.Lock()
+
+    # ── Staleness ──
+
+    def _input_digests(self, node: Node) -> Dict[str, Optional[str]]:
+        return {name: self.state.output_digest(name) for name in node.inputs}
+
+    def _outputs_current(self, node: Node, record: dict) -> Optional[str]:
+        """None if every output is as recorded, else why not (refreshing stats that moved)."""
+        for path in node.outputs:
+            if not path.exists():
+                return f"{path} missing"
+            recorded = record["outputs"].get(str(path))
+            current = _file_state(path, recorded)
+            if recorded is None or current["sha256"] != recorded["sha256"]:
+                return f"{path} changed"
+            record["outputs"][str(path)] = current
+        return None
+
+    def reason(self, node: Node) -> Optional[str]:
+        """Why `node` has to be built, or None if it is up to date."""
+        if self.force:
+            return "forced"
+        record = self.state.nodes.get(node.name)
+        if record is None:
+            return "new"
+        if record["fingerprint"] != node.fingerprint:
+            return "recipe changed"
+        stale = self._outputs_current(node, record)
+        if stale:
+            return stale
+        changed = [name for name, digest in self._input_digests(node).items() if record["inputs"].get(name) != digest]
+        if changed:
+            return f"{', '.join(changed)} changed"
+        return None
+
+    def _adoptable(self, node: Node) -> bool:
+        if not node.adopt or self.force or node.name in self.state.nodes:
+            return False
+        if all(path.exists() for path in node.outputs):
+            return True
+        return len(node.outputs) == 1 and any(seed.exists() for seed in node.seeds)
+
+    def _record(self, node: Node) -> None:
+        previous = (self.state.nodes.get(node.name) or {}).get("outputs", {})
+        self.state.nodes[node.name] = {
+            "fingerprint": node.fingerprint,
+            "inputs": self._input_digests(node),
+            "outputs": {str(path): _file_state(path, previous.get(str(path))) for path in node.outputs},
+        }
+        self.state.save()
+
+    # ── Actions ──
+
+    async def _build_paint(self, node: Node) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        images = await asyncio.get_running_loop().run_in_executor(
+            self._pool, _paint, node.recipe["renderer"], node.recipe["config"])
+        for path, size in zip(node.outputs, node.recipe["sizes"]):
+            if not path.exists() or path.read_bytes() != images[size]:
+                _write_atomic(path, images[size])
+
+    async def _build_source(self, node: Node) -> None:
+        if self._runner is None:
+            if not self.replicate_token:
+                raise RuntimeError("REPLICATE_API_TOKEN is not set")
+            self._runner = JobRunner(self._session, self.replicate_token, JobQueue(self.queue_path),
+                                     self.replicate_api, self.tier, **self.runner_options)
+        job = flux_schnell_job(node.name, node.recipe["prompt"], node.recipe["aspect_ratio"], {},
+                               source=str(node.outputs[0]))
+        # The graph decided this source is stale, so an existing file is out of date
+        node.outputs[0].unlink(missing_ok=True)
+        if await self._runner.run(job, self.force) == "failed":
+            raise RuntimeError(self._runner.queue.entries[job.key]["error"])
+
+    async def _build_derive(self, node: Node) -> None:
+        source = self.graph[node.inputs[0]].outputs[0]
+        await asyncio.to_thread(derive_images, source, node.recipe["sizes"], node.recipe["reducing_gap"])
+
+    async def _client(self, bot: str) -> AsyncDiscordClient:
+        async with self._tokens_lock:
+            if self.discord_tokens is None:
+                try:
+                    self.discord_tokens = await asyncio.to_thread(
+                        discord_bot_tokens, upload_ai_icons.BOTS, upload_ai_icons.TOKEN_VAR_OVERRIDES)
+                except VaultError:
+                    self.discord_tokens = {}  # report once; the other uploads fail on the missing token
+                    raise
+        if bot not in self.discord_tokens:
+            raise RuntimeError(f"no token for {bot}")
+        if bot not in self._clients:
+            self._clients[bot] = AsyncDiscordClient(self._session, self.discord_tokens[bot], self.discord_api)
+        return self._clients[bot]
+
+    async def _build_upload(self, node: Node) -> None:
+        recipe = node.recipe
+        data = Path(recipe["path"]).read_bytes()
+        if self.manifest is None:
+            self.manifest = UploadManifest()
+
+        async def upload(data: bytes) -> Optional[str]:
+            client = await self._client(recipe["bot"])
+            bot, target = recipe["bot"], recipe["target"]
+            if target == "avatar":
+                return await upload_ai_icons.upload_bot_avatar(client, bot, data)
+            if target == "app_icon":
+                return await upload_ai_icons.upload_app_icon(client, bot, recipe["app_id"], data)
+            if target == "banner":
+                return await upload_ai_icons.upload_app_banner(client, bot, data)
+            return await upload_ai_icons.upload_server_icon(client, data)
+
+        if await self.manifest.sync_asset_async(recipe["key"], data, upload, force=self.force) == "failed":
+            raise RuntimeError(f"upload of {recipe['key']} failed")
+
+    # ── Scheduling ──
+
+    async def _visit(self, node: Node, inputs: List["asyncio.Future[str]"]) -> str:
+        if any(result in ("failed", "blocked") for result in await asyncio.gather(*inputs)):
+            print(f"⏭️  Blocked: {node.name} (an input failed)")
+            return "blocked"
+
+        if self._adoptable(node):
+            for path in node.outputs:
+                if not path.exists():
+                    seed = next(seed for seed in node.seeds if seed.exists())
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(seed, path)
+            self._record(node)
+            print(f"📥 Adopted: {node.name}")
+            return "adopted"
+
+        why = self.reason(node)
+        if why is None:
+            return "current"
+        print(f"🔨 Building {node.name} ({why})")
+        try:
+            await getattr(self, f"_build_{node.kind}")(node)
+        except (RuntimeError, OSError, aiohttp.ClientError, asyncio.TimeoutError, VaultError) as e:
+            print(f"❌ Failed: {node.name}: {e}")
+            return "failed"
+        self._record(node)
+        print(f"✅ Built: {node.name}")
+        return "built"
+
+    async def run(self, names: List[str]) -> Dict[str, str]:
+        """Build `names` (inputs first, independent nodes concurrently); returns name → result."""
+        tasks: Dict[str, asyncio.Task] = {}
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300)) as self._session:
+            try:
+                for name in names:
+                    node = self.graph[name]
+                    tasks[name] = asyncio.ensure_future(self._visit(node, [tasks[dep] for dep in node.inputs]))
+                results = await asyncio.gather(*tasks.values())
+            finally:
+                if self._pool is not None:
+                    self._pool.shutdown()
+                    self._pool = None
+        if any(name in self.state.nodes for name in names):
+            self.state.save()  # keep refreshed output stats, so the next check stays stat-only
+        return dict(zip(tasks, results))
+
+    def plan(self, names: List[str]) -> Dict[str, str]:
+        """What run() would do, without building: name → reason, for nodes that would run."""
+        stale: Dict[str, str] = {}
+        for name in names:
+            node = self.graph[name]
+            if self._adoptable(node):
+                stale[name] = "adopt existing outputs"
+                continue
+            why = self.reason(node)
+            upstream = [dep for dep in node.inputs if dep in stale and not stale[dep].startswith("adopt")]
+            if why is None and upstream:
+                why = f"{', '.join(upstream)} will be rebuilt"
+            if why is not None:
+                stale[name] = why
+        return stale
+
+
+def build_assets(patterns: Optional[List[str]] = None, upload: bool = False, plan: bool = False,
+                 state_path: Path = STATE_PATH, **options) -> Dict[str, str]:
+    """Bring the nodes matching `patterns` (default: all) up to date; returns name → result."""
+    graph = build_graph(with_uploads=upload)
+    names = select(graph, patterns or [])
+    builder = Builder(graph, BuildState(state_path), **options)
+    if plan:
+        return builder.plan(names)
+    return asyncio.run(builder.run(names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("targets", nargs="*", help="node names or globs, e.g. 'banner:*' (default: everything)")
+    parser.add_argument("--plan", action="store_true", help="list what would be built, and why, then exit")
+    parser.add_argument("--upload", action="store_true", help="also upload changed assets to Discord")
+    parser.add_argument("--force", action="store_true", help="rebuild every selected node")
+    parser.add_argument("--tier", choices=TIERS, default="free", help="Replicate account rate-limit tier")
+    parser.add_argument("--list", action="store_true", help="list the graph's nodes and their inputs")
+    args = parser.parse_args()
+
+    if args.list:
+        for node in build_graph(with_uploads=True).values():
+            print(f"{node.name:<34} {node.kind:<7} ← {', '.join(node.inputs) or '-'}")
+        return
+
+    print("🏗️  Asset Build")
+    print("=" * 60)
+    start = time.perf_counter()
+    results = build_assets(args.targets, args.upload, args.plan, force=args.force, tier=args.tier)
+
+    if args.plan:
+        for name, why in results.items():
+            print(f"  {name:<34} {why}")
+        print(f"\nPlan: {len(results)} to build" if results else "✓ Everything is up to date")
+        return
+
+    counts = {result: sum(1 for r in results.values() if r == result)
+              for result in ("built", "adopted", "current", "failed", "blocked")}
+    print("\n" + "=" * 60)
+    print(f"✅ Built: {counts['built']}   📥 Adopted: {counts['adopted']}   ♻️  Up to date: {counts['current']}")
+    if counts["failed"] or counts["blocked"]:
+        print(f"❌ Failed: {counts['failed']}   ⏭️  Blocked: {counts['blocked']}")
+    print(f"⏱️  {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Asset Build Graph Benchmark
+
+Builds the whole asset tree with asset_build.py in an empty work directory,
+against the local mock Replicate and Discord APIs, then changes one thing at a
+time and checks that exactly the dependent nodes rebuild:
+
+  cold       — everything: paints, predictions, derived sizes, uploads
+  no-op      — nothing changed: no node runs, no API request is made
+  touch      — every output's mtime bumped, bytes unchanged: rehashed, not rebuilt
+  delete     — one banner removed: re-derived from its cached source, no
+               prediction and (same bytes) no upload
+  prompt     — one banner prompt edited: one prediction, one derive, one upload
+  config     — one drawn icon's color edited: only that icon repainted
+
+Usage:
+    uv run --with aiohttp --with pillow --with numpy python3 scripts/bench_asset_build.py
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import asset_build
+import discord_avatars
+import discord_banners
+import replicate_jobs
+import upload_ai_icons
+from mock_discord_api import MockDiscordAPI
+from mock_replicate_api import MockReplicateAPI
+
+
+def timed(label: str, replicate: MockReplicateAPI, discord: MockDiscordAPI, options: dict) -> dict:
+    replicate_before = replicate.state.stats()
+    discord_before = discord.state.stats()["requests"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asset_build.build_assets(upload=True, **options)
+    elapsed = time.perf_counter() - start
+    creates = replicate.state.stats()["creates"] - replicate_before["creates"]
+    replicate_requests = replicate.state.stats()["requests"] - replicate_before["requests"]
+    uploads = discord.state.stats()["requests"] - discord_before
+    built = sorted(name for name, result in results.items() if result == "built")
+    failed = sorted(name for name, result in results.items() if result in ("failed", "blocked"))
+    print(f"{label:<8} {elapsed:6.2f}s  {len(built):3d} built  {creates:3d} predictions  "
+          f"{replicate_requests:4d} replicate + {uploads:3d} discord requests")
+    return {"built": built, "failed": failed, "creates": creates, "requests": replicate_requests + uploads,
+            "uploads": uploads, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--gen-seconds", type=float, default=0.5, help="mock generation time")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="asset-build-bench-"))
+    replicate_jobs.TIERS["bench"] = (600 / 60, 10)
+    tokens = {bot: f"bench-{bot}" for bot in dict.fromkeys(upload_ai_icons.BOTS + list(upload_ai_icons.APP_IDS))}
+
+    print("Asset Build Graph Benchmark")
+    print("=" * 84)
+
+    with MockReplicateAPI(rate=600, burst=10, gen_seconds=args.gen_seconds) as replicate, \
+            MockDiscordAPI(limit=50, global_limit=1000) as discord:
+        options = {"tier": "bench", "replicate_token": "bench", "replicate_api": replicate.url,
+                   "discord_tokens": tokens, "discord_api": discord.url, "poll_interval": 0.1, "backoff": 0.1}
+        graph = asset_build.build_graph(with_uploads=True)
+        print(f"{len(graph)} nodes\n")
+
+        cold = timed("cold", replicate, discord, options)
+        noop = timed("no-op", replicate, discord, options)
+
+        for node in graph.values():
+            for path in node.outputs:
+                os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        touch = timed("touch", replicate, discord, options)
+
+        Path("assets/banners/zeus.png").unlink()
+        delete = timed("delete", replicate, discord, options)
+
+        discord_banners.BANNER_PROMPTS["athena"]["prompt"] += ", at night"
+        prompt = timed("prompt", replicate, discord, options)
+
+        discord_avatars.BOT_CONFIGS["zeus"]["color"] = "#FFC700"
+        config = timed("config", replicate, discord, options)
+
+    generated = sum(1 for node in graph.values() if node.kind == "source")
+    checks = {
+        "cold build completes": not cold["failed"] and cold["creates"] == generated,
+        "no-op makes no requests": not noop["built"] and noop["requests"] == 0,
+        "touched outputs are not rebuilt": not touch["built"] and touch["requests"] == 0,
+        "deleted banner re-derived only": delete["built"] == ["banner:zeus"] and delete["requests"] == 0,
+        "edited prompt rebuilds its chain": prompt["built"] == ["banner:athena", "source:banner:athena",
+                                                                "upload:banner:athena"]
+                                            and prompt["creates"] == 1 and prompt["uploads"] == 1,
+        "edited config repaints one icon": config["built"] == ["icon:zeus"] and config["requests"] == 0,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Build graph {'rebuilds exactly what changed' if ok else 'misbehaved'} "
+          f"(no-op in {noop['seconds']:.2f}s)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Discord Asset Upload Benchmark
+
+Uploads the AI icons, app icons, banners and server icon for every bot to
+the local mock Discord API twice — bots one after another, then one
+concurrent worker per bot token (upload_ai_icons.upload_all) — and then
+re-runs the concurrent upload against the manifest to confirm that nothing
+is sent when nothing changed.
+
+Usage:
+    uv run --with aiohttp python3 scripts/bench_asset_upload.py --latency 0.15
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import upload_ai_icons
+from mock_discord_api import MockDiscordAPI
+from upload_manifest import UploadManifest
+
+ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
+
+
+async def serial(tokens, manifest, api_base):
+    results = {"uploaded": 0, "skipped": 0, "failed": 0}
+    for bot_name in dict.fromkeys(upload_ai_icons.BOTS + list(upload_ai_icons.APP_IDS)):
+        await upload_ai_icons.sync_bot(bot_name, tokens[bot_name], manifest, results, force=True, api_base=api_base)
+    return results
+
+
+def timed(label: str, api: MockDiscordAPI, coro) -> float:
+    before = api.state.stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(coro)
+    elapsed = time.perf_counter() - start
+    after = api.state.stats()
+    print(f"{label:<28} {elapsed:6.2f}s  {after['requests'] - before['requests']:4d} requests  "
+          f"{after['uploads'] - before['uploads']:3d} uploads  "
+          f"{results['skipped']:3d} skipped  {results['failed']:2d} failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.15, help="mock response latency (s)")
+    args = parser.parse_args()
+
+    upload_ai_icons.AI_ICONS_DIR = ASSETS_DIR / "ai_icons"
+    upload_ai_icons.AI_APP_ICONS_DIR = ASSETS_DIR / "ai_app_icons"
+    upload_ai_icons.BANNERS_DIR = ASSETS_DIR / "banners"
+    bots = list(dict.fromkeys(upload_ai_icons.BOTS + list(upload_ai_icons.APP_IDS)))
+    tokens = {bot_name: f"bench-{bot_name}" for bot_name in bots}
+
+    print("Discord Asset Upload Benchmark")
+    print("=" * 80)
+    print(f"{len(bots)} bots, {args.latency * 1000:.0f} ms per request\n")
+
+    with MockDiscordAPI(limit=5, window=1.0, latency=args.latency) as api:
+        work = Path(tempfile.mkdtemp(prefix="upload-bench-"))
+        one_by_one = timed("serial, bot after bot", api, serial(tokens, UploadManifest(work / "serial.json"), api.url))
+        manifest = UploadManifest(work / "concurrent.json")
+        concurrent = timed("concurrent, worker per bot", api,
+                           upload_ai_icons.upload_all(tokens, manifest, force=True, api_base=api.url))
+        before = api.state.stats()["requests"]
+        timed("concurrent, unchanged", api, upload_ai_icons.upload_all(tokens, manifest, api_base=api.url))
+        quiet_requests = api.state.stats()["requests"] - before
+
+    print(f"\nSpeedup: {one_by_one / concurrent:.1f}x; requests when nothing changed: {quiet_requests}")
+    sys.exit(0 if quiet_requests == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
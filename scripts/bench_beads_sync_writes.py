@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+GitHub-Beads Sync Write Benchmark
+
+Imports the same batch of synthetic GitHub issues into a scratch database two
+ways and times them:
+
+  per-issue  — what bd create costs the sync: one process and one fresh SQL
+               connection (plus a Dolt commit) per issue
+  batched    — the sync's DoltBeads path: one connection, one transaction,
+               one Dolt commit for the whole run
+
+Point it at a local `dolt sql-server` (or any MySQL-compatible server; Dolt
+commits are skipped there). The scratch database is created and dropped.
+
+Usage:
+    dolt sql-server --port 3307 &
+    uv run --with pymysql --with jinja2 --with pyyaml \
+      python3 scripts/bench_beads_sync_writes.py --port 3307 --issues 1000
+"""
+
+import argparse
+import importlib.util
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import jinja2
+import pymysql
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ROLE_DIR = REPO_ROOT / "ansible/roles/olympus_bus"
+
+# The bd tables and columns the sync touches, plus a required text column
+# (bd's description) that DoltBeads has to discover and fill itself.
+SCHEMA = [
+    """CREATE TABLE issues (
+        id VARCHAR(255) PRIMARY KEY,
+        title VARCHAR(500) NOT NULL,
+        description TEXT NOT NULL,
+        status VARCHAR(32) NOT NULL DEFAULT 'open',
+        priority INT NOT NULL DEFAULT 2,
+        issue_type VARCHAR(32) NOT NULL DEFAULT 'task',
+        assignee VARCHAR(255),
+        external_ref VARCHAR(255),
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        closed_at DATETIME
+    )""",
+    "CREATE TABLE labels (issue_id VARCHAR(255) NOT NULL, label VARCHAR(255) NOT NULL, PRIMARY KEY (issue_id, label))",
+    "CREATE TABLE config (`key` VARCHAR(255) PRIMARY KEY, value TEXT)",
+    "INSERT INTO config VALUES ('issue_prefix', 'olympus')",
+]
+
+# Stand-in for `bd create`: a fresh interpreter, a fresh connection, one insert, one commit.
+BD_STUB = '''#!{python}
+import hashlib, sys, pymysql
+args = sys.argv[1:]
+title = args[args.index("--title") + 1]
+url = args[args.index("--external-ref") + 1]
+labels = [args[i + 1] for i, a in enumerate(args) if a == "--label"]
+bead_id = "olympus-" + hashlib.sha1(url.encode()).hexdigest()[:8]
+conn = pymysql.connect(host="127.0.0.1", port={port}, user="{user}", password="{password}", database="{database}")
+with conn.cursor() as cur:
+    cur.execute("INSERT INTO issues (id, title, description, external_ref, created_at, updated_at) "
+                "VALUES (%s, %s, '', %s, NOW(), NOW())", (bead_id, title, url))
+    cur.executemany("INSERT INTO labels VALUES (%s, %s)", [(bead_id, l) for l in labels])
+conn.commit()
+if {dolt}:
+    with conn.cursor() as cur:
+        cur.execute("CALL DOLT_COMMIT('-Am', %s)", ("bd create " + bead_id,))
+print('{{"id": "%s"}}' % bead_id)
+'''
+
+
+def load_sync(**variables):
+    """Render github-beads-sync.py.j2 with role defaults and import it as a module."""
+    defaults = yaml.safe_load((ROLE_DIR / "defaults/main.yml").read_text())
+    defaults.setdefault("vault_redis_password", "")
+    defaults.update(variables)
+    env = jinja2.Environment(undefined=jinja2.StrictUndefined, keep_trailing_newline=True)
+    source = env.from_string((ROLE_DIR / "templates/github-beads-sync.py.j2").read_text()).render(**defaults)
+    path = Path(tempfile.mkdtemp(prefix="beads-sync-")) / "sync.py"
+    path.write_text(source)
+    spec = importlib.util.spec_from_file_location("beads_sync", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_issues(count: int) -> list[dict]:
+    return [
+        {
+            "number": i,
+            "title": f"Synthetic issue {i}",
+            "url": f"https://github.com/infiquetra/bench-{i % 20}/issues/{i}",
+            "state": "open",
+            "updated_at": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z",
+            "labels": ["priority:P2", f"area:{i % 5}"],
+        }
+        for i in range(count)
+    ]
+
+
+def reset_database(args, name: str) -> bool:
+    """Create a fresh scratch database; returns True when the server is Dolt."""
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user, password=args.password, autocommit=True)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {name}")
+        cur.execute(f"CREATE DATABASE {name}")
+        cur.execute(f"USE {name}")
+        for statement in SCHEMA:
+            cur.execute(statement)
+        try:
+            cur.execute("SELECT dolt_version()")
+            is_dolt = True
+            cur.execute("CALL DOLT_COMMIT('-Am', 'schema')")
+        except pymysql.Error:
+            is_dolt = False
+    conn.close()
+    return is_dolt
+
+
+def install_bd_stub(args, is_dolt: bool) -> None:
+    """Put BD_STUB first on PATH as `bd`, writing to args.database."""
+    bin_dir = Path(tempfile.mkdtemp(prefix="bd-stub-"))
+    stub = bin_dir / "bd"
+    stub.write_text(BD_STUB.format(
+        python=sys.executable, port=args.port, user=args.user, password=args.password,
+        database=args.database, dolt=is_dolt,
+    ))
+    stub.chmod(stub.stat().st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = f"{bin_dir}:{os.environ['PATH']}"
+
+
+def count_rows(args, name: str) -> int:
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user, password=args.password, database=name)
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM issues")
+        rows = cur.fetchone()[0]
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="beads_bench")
+    parser.add_argument("--issues", type=int, default=1000)
+    args = parser.parse_args()
+
+    issues = make_issues(args.issues)
+    state_dir = tempfile.mkdtemp(prefix="beads-sync-state-")
+    os.environ["STATE_DIRECTORY"] = state_dir
+    sync = load_sync(
+        dolt_port=args.port, dolt_user=args.user, dolt_database=args.database,
+        vault_dolt_agent_password=args.password,
+    )
+
+    print("GitHub-Beads Sync Write Benchmark")
+    print("=" * 55)
+
+    # Per-issue path: the sync's bd fallback, with bd create stood in by BD_STUB.
+    is_dolt = reset_database(args, args.database)
+    print(f"Server: {'Dolt' if is_dolt else 'MySQL-compatible (no Dolt commits)'}, {args.issues} issues\n")
+    install_bd_stub(args, is_dolt)
+
+    index: dict = {}
+    start = time.perf_counter()
+    for issue in issues:
+        sync.apply_issue(issue, index)
+    per_issue = time.perf_counter() - start
+    per_issue_rows = count_rows(args, args.database)
+    print(f"per-issue bd create : {per_issue:7.2f}s  {args.issues / per_issue:8.1f} issues/s  rows: {per_issue_rows}")
+
+    # Batched path: DoltBeads over one connection.
+    reset_database(args, args.database)
+    store = sync.DoltBeads()
+    if not store.connect():
+        sys.exit(1)
+    print(f"Schema check: filling {store.blank} on insert")
+    index = {}
+    start = time.perf_counter()
+    store.apply(issues, index)
+    batched = time.perf_counter() - start
+    batched_rows = count_rows(args, args.database)
+    print(f"batched DoltBeads   : {batched:7.2f}s  {args.issues / batched:8.1f} issues/s  rows: {batched_rows}")
+    print(f"\nSpeedup: {per_issue / batched:.1f}x")
+
+    sys.exit(0 if per_issue_rows == batched_rows == args.issues and store.blank == ["description"] else 1)
+
+
+if __name__ == "__main__":
+    main()
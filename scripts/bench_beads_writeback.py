@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+GitHub-Beads Write-Back Check
+
+Runs full sync passes against the mock GitHub API and a scratch Dolt
+database, with an edit on one side between two passes, and checks what the
+write-back sends to GitHub:
+
+  label round-trip — a label added on GitHub is imported, then removed on
+                     GitHub; the next pass must not put it back
+  webhook          — the same, with the label arriving by webhook delivery
+  claim (batched)  — an agent claims a bead straight after the pass that
+                     imported it; the claim becomes the issue's assignee
+  claim (bd)       — the same for a bead imported through bd subprocesses,
+                     which first shows up in the Dolt diff as an added row
+
+Write-back reads dolt_log/dolt_diff, so this needs a `dolt sql-server`.
+The scratch database is created and dropped.
+
+Usage:
+    dolt sql-server --port 3307 &
+    uv run --with pymysql --with jinja2 --with pyyaml --with requests --with prometheus-client \
+      python3 scripts/bench_beads_writeback.py --port 3307
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pymysql
+
+from bench_beads_sync_writes import install_bd_stub, load_sync, reset_database
+from mock_github_api import MockGitHubAPI
+
+REPO = "infiquetra/repo-00"
+
+
+def bead(args, url: str) -> tuple[str | None, list[str]]:
+    """(assignee, labels) of the bead tracking `url`."""
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user, password=args.password,
+                           database=args.database)
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, assignee FROM issues WHERE external_ref = %s", (url,))
+        bead_id, assignee = cur.fetchone()
+        cur.execute("SELECT label FROM labels WHERE issue_id = %s ORDER BY label", (bead_id,))
+        labels = [row[0] for row in cur.fetchall()]
+    conn.close()
+    return assignee, labels
+
+
+def claim(args, url: str, actor: str) -> None:
+    """What `bd update <id> --claim` does: assign, mark in progress, commit."""
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user, password=args.password,
+                           database=args.database, autocommit=True)
+    with conn.cursor() as cur:
+        cur.execute("UPDATE issues SET assignee = %s, status = 'in_progress' WHERE external_ref = %s", (actor, url))
+        cur.execute("CALL DOLT_COMMIT('-Am', %s)", (f"bd update --claim {url}",))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="beads_writeback_bench")
+    args = parser.parse_args()
+
+    os.environ["STATE_DIRECTORY"] = tempfile.mkdtemp(prefix="beads-sync-state-")
+    sync = load_sync(
+        dolt_port=args.port, dolt_user=args.user, dolt_database=args.database,
+        vault_dolt_agent_password=args.password, github_assignee_map={"athena": "athena-gh"},
+    )
+
+    print("GitHub-Beads Write-Back Check")
+    print("=" * 55)
+    if not reset_database(args, args.database):
+        print("❌ Write-back needs Dolt (dolt_log/dolt_diff); this server is not Dolt")
+        sys.exit(1)
+    install_bd_stub(args, True)
+
+    with MockGitHubAPI(repos=2, issues=4, latency=0) as api:
+        sync.GITHUB_API = api.url
+        syncer = sync.Syncer("bench-token")
+        syncer.redis = None
+        github = api.state
+        syncer.poll()  # first pass: import everything, start write-back from here
+
+        def labels_patched(label: str) -> bool:
+            return any(label in body.get("labels", []) for _, _, body in github.patches)
+
+        # Label added on GitHub and imported by a poll, then removed on GitHub
+        url = github.edit(REPO, 1, ["priority:P2", "triage"])["html_url"]
+        syncer.poll()
+        imported = bead(args, url)[1]
+        github.edit(REPO, 1, ["priority:P2"])
+        syncer.poll()
+        syncer.poll()
+        round_trip = "triage" in imported and not labels_patched("triage") and bead(args, url)[1] == ["priority:P2"]
+        print(f"label round-trip  : imported {imported}, GitHub now {github.find_issue(REPO, 1)['labels']}")
+
+        # The same with the label arriving by webhook between two polls
+        item = github.edit(REPO, 2, ["priority:P2", "wontfix"])
+        syncer.handle_delivery(sync.to_issue(item, REPO))
+        github.edit(REPO, 2, ["priority:P2"])
+        syncer.poll()
+        syncer.poll()
+        webhook = not labels_patched("wontfix") and bead(args, item["html_url"])[1] == ["priority:P2"]
+        print(f"webhook           : GitHub now {github.find_issue(REPO, 2)['labels']}")
+
+        # A new issue, imported in one transaction and claimed before the next pass
+        github.touch(REPO, count=0)
+        batched_url = github.repos[REPO][-1]["html_url"]
+        syncer.poll()
+        claim(args, batched_url, "athena")
+        syncer.poll()
+        batched = github.repos[REPO][-1]["assignees"]
+        print(f"claim (batched)   : assignees {batched}")
+
+        # The same, imported through bd: the bead is an added row in the next diff
+        sync.BATCH_WRITES = False
+        github.touch(REPO, count=0)
+        bd_url = github.repos[REPO][-1]["html_url"]
+        syncer.poll()
+        claim(args, bd_url, "hermes")
+        syncer.poll()
+        via_bd = github.repos[REPO][-1]["assignees"]
+        print(f"claim (bd)        : assignees {via_bd}")
+        patches = list(github.patches)
+
+    checks = {
+        "label removed on GitHub stays removed": round_trip,
+        "webhook-applied label not written back": webhook,
+        "claim after batched import written back": batched == [{"login": "athena-gh"}],
+        "claim after bd import written back": via_bd == [{"login": "olympus-bot"}],
+        "only the two claims were PATCHed": len(patches) == 2,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Write-back {'sends only bead-side edits' if ok else 'regressed'} "
+          f"({len(patches)} PATCHes)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Discord Client Rate-Limit Benchmark
+
+Drives the shared discord_client against the local mock Discord API and
+compares it with the old "fire, sleep on 429, recurse" request loop. The mock
+enforces per-bucket and global limits, so the number of 429s it hands out is a
+direct measure of how well a client schedules.
+
+Usage:
+    uv run --with aiohttp python3 scripts/bench_discord_client.py --requests 120 --channels 6
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from discord_client import AsyncDiscordClient, DiscordClient, RateLimiter
+from mock_discord_api import MockDiscordAPI
+
+
+def legacy_request(api_base: str, method: str, endpoint: str, data=None):
+    """The pre-existing DiscordSetup._request retry behaviour."""
+    body = json.dumps(data).encode() if data is not None else None
+    req = Request(f"{api_base}{endpoint}", data=body, method=method,
+                  headers={"Authorization": "Bot legacy", "Content-Type": "application/json"})
+    try:
+        with urlopen(req, timeout=10) as response:
+            return json.loads(response.read() or b"null")
+    except HTTPError as e:
+        if e.code == 429:
+            time.sleep(json.loads(e.read()).get("retry_after", 1))
+            return legacy_request(api_base, method, endpoint, data)
+        raise
+
+
+def workload(count: int, channels: int):
+    return [("PATCH", f"/channels/{1000 + i % channels}", {"topic": f"update {i}"}) for i in range(count)]
+
+
+def run_threads(fn, jobs, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda job: fn(*job), jobs))
+    return time.perf_counter() - start
+
+
+async def run_async(api_base: str, jobs) -> float:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        client = AsyncDiscordClient(session, token="async", api_base=api_base, limiter=RateLimiter())
+        start = time.perf_counter()
+        await asyncio.gather(*(client.request(*job) for job in jobs))
+        return time.perf_counter() - start
+
+
+def report(label: str, elapsed: float, stats: dict, count: int) -> None:
+    print(f"{label:<28} {elapsed:6.2f}s  {count / elapsed:7.1f} req/s  "
+          f"429s: {stats['rate_limited']} bucket, {stats['global_rate_limited']} global")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--channels", type=int, default=6)
+    parser.add_argument("--limit", type=int, default=5, help="mock bucket size")
+    parser.add_argument("--window", type=float, default=1.0, help="mock bucket window (s)")
+    parser.add_argument("--workers", type=int, default=8, help="threads for the blocking clients")
+    args = parser.parse_args()
+
+    jobs = workload(args.requests, args.channels)
+    per_bucket = args.requests / args.channels
+    ideal = max(per_bucket / args.limit - 1, 0) * args.window
+    print("Discord Client Rate-Limit Benchmark")
+    print("=" * 72)
+    print(f"{args.requests} PATCHes over {args.channels} channel buckets "
+          f"({args.limit}/{args.window}s each) — ideal ≈ {ideal:.1f}s\n")
+
+    failures = 0
+    with MockDiscordAPI(args.limit, args.window) as api:
+        elapsed = run_threads(lambda *job: legacy_request(api.url, *job), jobs, args.workers)
+        report("legacy sleep-and-recurse", elapsed, api.state.stats(), args.requests)
+
+    with MockDiscordAPI(args.limit, args.window) as api:
+        client = DiscordClient(token="sync", api_base=api.url)
+        elapsed = run_threads(client.request, jobs, args.workers)
+        stats = api.state.stats()
+        report("DiscordClient (threads)", elapsed, stats, args.requests)
+        failures += stats["rate_limited"] + stats["global_rate_limited"]
+
+    with MockDiscordAPI(args.limit, args.window) as api:
+        elapsed = asyncio.run(run_async(api.url, jobs))
+        stats = api.state.stats()
+        report("AsyncDiscordClient", elapsed, stats, args.requests)
+        failures += stats["rate_limited"] + stats["global_rate_limited"]
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
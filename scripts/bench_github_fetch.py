@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+GitHub Fetch Benchmark for the Beads Sync
+
+Runs the sync's GitHub fetch stage against the local mock GitHub API and
+compares it with the serial search-API loop it replaced. Each strategy does a
+cold sync, a quiet sync (nothing changed; repos whose cursor just moved
+still pay one request for the new since= URL) and then a sync after a few
+repos change. "Charged" requests are those that count against the rate
+limit (everything except 304s).
+
+Usage:
+    uv run --with requests --with jinja2 --with pyyaml \
+      python3 scripts/bench_github_fetch.py --repos 40 --issues 60 --changed 3
+"""
+
+import argparse
+import sys
+import time
+
+import requests
+
+from bench_beads_sync_writes import load_sync
+from mock_github_api import MockGitHubAPI
+
+
+def search_sync(api_url: str, limit: int = 500) -> int:
+    """The old `gh search issues --state open --limit 500`: serial pages of 100."""
+    session = requests.Session()
+    found = 0
+    for page in range(1, limit // 100 + 1):
+        response = session.get(f"{api_url}/search/issues",
+                               params={"q": "org:infiquetra state:open is:issue", "per_page": 100, "page": page})
+        items = response.json()["items"]
+        found += len(items)
+        if len(items) < 100:
+            break
+    return found
+
+
+def run_sync(sync, gh, cursors: dict, workers: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    changed = sync.fetch_changed_issues(gh, cursors, workers=workers)
+    elapsed = time.perf_counter() - start
+    for repo, issues in changed.items():
+        cursors[repo] = issues[-1]["updated_at"]
+    return elapsed, sum(len(issues) for issues in changed.values())
+
+
+def report(label: str, elapsed: float, issues: int, before: dict, after: dict) -> None:
+    requests_made = after["requests"] - before["requests"]
+    charged = after["rate_limited_requests"] - before["rate_limited_requests"]
+    print(f"{label:<34} {elapsed:6.2f}s  {issues:5d} issues  {requests_made:4d} requests  {charged:4d} charged")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=40)
+    parser.add_argument("--issues", type=int, default=60, help="issues per repo")
+    parser.add_argument("--changed", type=int, default=3, help="repos that change between the two syncs")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock response latency (s)")
+    args = parser.parse_args()
+
+    sync = load_sync(vault_dolt_agent_password="", github_sync_workers=args.workers)
+
+    print("GitHub Fetch Benchmark")
+    print("=" * 80)
+    print(f"{args.repos} repos × {args.issues} issues, {args.changed} repos change between syncs, "
+          f"{args.latency * 1000:.0f} ms latency\n")
+
+    with MockGitHubAPI(repos=args.repos, issues=args.issues, latency=args.latency) as api:
+        open_issues = sum(1 for issues in api.state.repos.values() for i in issues
+                          if i["state"] == "open" and "pull_request" not in i)
+        before = api.state.stats()
+        start = time.perf_counter()
+        found = search_sync(api.url)
+        report("old: serial search (cap 500)", time.perf_counter() - start, found, before, api.state.stats())
+        if found < open_issues:
+            print(f"{'':<34} ⚠️  missed {open_issues - found} of {open_issues} open issues")
+
+    results = {}
+    for label, workers, use_etags in (("serial per-repo, no ETags", 1, False),
+                                      (f"{args.workers} workers + ETags", args.workers, True)):
+        with MockGitHubAPI(repos=args.repos, issues=args.issues, latency=args.latency) as api:
+            sync.GITHUB_API = api.url
+            etags: dict = {}
+            cursors: dict = {}
+            for phase in ("cold", "quiet", "churn"):
+                if phase == "churn":
+                    for r in range(args.changed):
+                        api.state.touch(f"infiquetra/repo-{r:02d}", count=2)
+                gh = sync.GitHub("bench-token", etags if use_etags else {})
+                before = api.state.stats()
+                elapsed, issues = run_sync(sync, gh, cursors, workers)
+                after = api.state.stats()
+                report(f"{label} ({phase})", elapsed, issues, before, after)
+                results[(workers, phase)] = (elapsed, after["rate_limited_requests"] - before["rate_limited_requests"])
+
+    serial_cold, _ = results[(1, "cold")]
+    pooled_cold, _ = results[(args.workers, "cold")]
+    _, serial_churn_charged = results[(1, "churn")]
+    _, pooled_churn_charged = results[(args.workers, "churn")]
+    print(f"\nCold speedup: {serial_cold / pooled_cold:.1f}x; "
+          f"charged requests after churn: {serial_churn_charged} → {pooled_churn_charged}")
+    sys.exit(0 if pooled_churn_charged <= args.changed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Guild Reconciler Benchmark
+
+Runs discord_setup's reconciler against a guild seeded in the local mock
+Discord API (human members plus the bots), and checks it converges:
+
+  fresh      — empty guild: every role, category, channel, bot role and
+               nickname is created, changes within a wave sent concurrently
+  serial     — the same plan on a second empty guild, one call at a time
+  converged  — re-run with nothing changed: the plan must be empty
+  drift      — hand edits (topic, overwrites, role color, channel rename,
+               lost bot role, nickname) must plan as exactly those changes
+               and converge again after apply
+
+Usage:
+    uv run --with aiohttp python3 scripts/bench_guild_reconcile.py --members 3000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+import discord_setup
+import member_index
+from discord_client import AsyncDiscordClient
+from discord_setup import BOTS
+from guild_reconciler import GuildReconciler
+from mock_discord_api import MockDiscordAPI
+
+
+async def plan_and_apply(api_url: str, config_path: Path, serial: bool = False):
+    async with aiohttp.ClientSession() as session:
+        client = AsyncDiscordClient(session, "bench", api_url)
+        reconciler = GuildReconciler(client, discord_setup.GUILD_ID, discord_setup.desired_state(),
+                                     discord_setup.load_config(config_path))
+        changes = reconciler.plan(await reconciler.snapshot())
+        if serial:
+            for change in changes:
+                await reconciler._apply_one(change)
+        else:
+            await reconciler.apply(changes)
+        discord_setup.save_config(reconciler.config, config_path)
+        return changes
+
+
+def timed(label: str, api: MockDiscordAPI, coro) -> list:
+    before = api.state.stats()["requests"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        changes = asyncio.run(coro)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:6.2f}s  {api.state.stats()['requests'] - before:4d} requests  {len(changes):3d} changes")
+    return changes
+
+
+def drift(api: MockDiscordAPI) -> int:
+    """Edit the guild behind the reconciler's back; returns how many changes that should plan."""
+    guild = api.state.guilds[discord_setup.GUILD_ID]
+    channels = {ch["name"]: ch for ch in guild["channels"].values()}
+    roles = {role["name"]: role for role in guild["roles"].values()}
+    bots = {m["user"]["username"]: m for m in guild["members"].values() if m["user"]["bot"]}
+    channels["general"]["topic"] = "edited by hand"
+    channels["mimir-dev"]["permission_overwrites"] = []
+    channels["random"]["name"] = "random-old"
+    roles["Olympus"]["color"] = 0
+    bots["Athena"]["roles"].remove(roles["Olympus"]["id"])
+    bots["Apollo"]["nick"] = "apollo"
+    return 6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", type=int, default=3000, help="human members to seed")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock response latency (s)")
+    args = parser.parse_args()
+
+    print("Guild Reconciler Benchmark")
+    print("=" * 60)
+    print(f"{args.members} members + {len(BOTS)} bots, {args.latency * 1000:.0f} ms per request\n")
+
+    work = Path(tempfile.mkdtemp(prefix="reconcile-bench-"))
+    member_index.CACHE_DIR = work / "cache"
+    # Project role creates share one bucket; a roomy limit shows the concurrency
+    with MockDiscordAPI(limit=50, latency=args.latency) as api, \
+            MockDiscordAPI(limit=50, latency=args.latency) as serial_api:
+        for mock in (api, serial_api):
+            mock.state.seed_guild(discord_setup.GUILD_ID, args.members, tuple(BOTS))
+        fresh = timed("fresh", api, plan_and_apply(api.url, work / "config.json"))
+        serial = timed("serial", serial_api, plan_and_apply(serial_api.url, work / "serial.json", serial=True))
+        converged = timed("converged", api, plan_and_apply(api.url, work / "config.json"))
+        expected = drift(api)
+        drifted = timed("drift", api, plan_and_apply(api.url, work / "config.json"))
+        settled = timed("settled", api, plan_and_apply(api.url, work / "config.json"))
+
+    ok = len(fresh) == len(serial) and not converged and len(drifted) == expected and not settled
+    for change in drifted:
+        print(f"  {change.describe()}")
+    print(f"\n{'✅' if ok else '❌'} Reconciler {'converges and plans only real drift' if ok else 'did not converge'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
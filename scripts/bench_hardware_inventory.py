@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Hardware Inventory Collector Benchmark
+
+Checks hardware_inventory.py's parsers against the inventory files the old
+playbook wrote (docs/inventory/*.json, raw command output inline), then times
+collection for the six Proxmox hosts against a fake `ssh` whose probe
+commands replay those fixtures after a fixed latency:
+
+  parsers    — every fixture parses, and the records agree with the pvesh
+               API's own view (threads, sockets, memory, disk serials and
+               sizes, NICs) and with docs/HARDWARE_INVENTORY.md
+  size       — compact record + gzip sidecar vs the legacy file, and the
+               time to load each
+  playbook   — hardware_inventory.yml's shape: one SSH round trip per probe
+               and per smartctl device, task by task across hosts (5 forks)
+  collector  — one SSH session per host, all probes at once, hosts concurrent
+
+The collected raw output must match the fixtures byte for byte, and a
+`--reparse` from the sidecar must reproduce the record.
+
+Usage:
+    python3 scripts/bench_hardware_inventory.py --ssh-latency 0.15
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import hardware_inventory
+
+FIXTURES = hardware_inventory.OUTPUT_DIR
+HOSTS = ["r420.infiquetra.com", "r640-1.infiquetra.com", "r640-2.infiquetra.com",
+         "r720xd.infiquetra.com", "r820.infiquetra.com", "r640-3.infiquetra.com"]
+# Seconds per command on the fake hosts (pvesh starts a Perl interpreter)
+LATENCY = {"dmidecode": 0.2, "pvesh": 0.5, "smartctl": 0.1, "lspci": 0.05, "lscpu": 0.03,
+           "zpool": 0.03, "zfs": 0.03, "lsblk": 0.02}
+# Facts from docs/HARDWARE_INVENTORY.md: service tag, sockets, DIMMs used/total, data vdev
+EXPECTED = {
+    "r420.infiquetra.com": ("F8QXX12", 2, (12, 12), {"sas-data": ("raidz1", 3)}),
+    "r8202.infiquetra.com": ("5DZXBW1", 2, (13, 24), {}),
+    "r820.infiquetra.com": ("G1J77Y1", 4, (48, 48), {"sas-data": ("raidz2", 8)}),
+}
+
+FAKE_SSH = r"""#!/bin/sh
+prev=
+for arg; do target=$prev; prev=$arg; done
+sleep "$FAKE_SSH_LATENCY"
+export FAKE_HOST="${target#*@}"
+export PATH="$FAKE_BIN:$PATH"
+exec sh -c "$prev"
+"""
+
+FAKE_PROBE = r"""#!/bin/sh
+name=${0##*/}
+case "$name" in
+    hostname) echo "${FAKE_HOST%%.*}"; exit 0 ;;
+    dmidecode) key=dmidecode_$2 ;;
+    pvesh) case "$2" in
+        */status) key=pvesh_status ;;
+        */disks/list) key=pvesh_disks ;;
+        */hardware/pci) key=pvesh_pci ;;
+        */network) key=pvesh_network ;;
+    esac ;;
+    zpool|zfs) key=${name}_$1 ;;
+    smartctl) if [ "$1" = --scan ]; then key=scan
+        elif [ "$2" = -d ]; then key=smartctl:$3
+        else key=smartctl:${2##*/}; fi ;;
+    *) key=$name ;;
+esac
+eval "sleep \${FAKE_LATENCY_$name:-0}"
+cat "$FAKE_DIR/$FAKE_HOST/$key"
+"""
+
+
+def legacy_fixtures() -> dict:
+    fixtures = {}
+    for path in sorted(FIXTURES.glob("[!.]*.json")):
+        doc = json.loads(path.read_text())
+        if hardware_inventory.is_legacy(doc):
+            fixtures[doc["host"]] = (path, doc)
+    return fixtures
+
+
+def consistency(raw: dict, record: dict) -> list:
+    """Problems with a parsed record, cross-checked against the raw pvesh JSON."""
+    problems = []
+    status = json.loads(raw["probes"]["pvesh_status"])
+    cpuinfo, cpu, memory = status["cpuinfo"], record["cpu"], record["memory"]
+    if (cpu["threads"], cpu["sockets"]) != (cpuinfo["cpus"], cpuinfo["sockets"]):
+        problems.append(f"cpu {cpu['threads']}t/{cpu['sockets']}s vs pvesh {cpuinfo['cpus']}t/{cpuinfo['sockets']}s")
+    # The kernel reserves some memory, so pvesh sees a little less than the DIMMs hold
+    if not status["memory"]["total"] <= memory["total_bytes"] <= status["memory"]["total"] * 1.1:
+        problems.append(f"DIMMs total {memory['total_bytes']} vs pvesh {status['memory']['total']}")
+    pvesh_disks = {d["serial"]: d["size"] for d in json.loads(raw["probes"]["pvesh_disks"])}
+    disks = {d["serial"]: d for d in record["disks"]}
+    if set(pvesh_disks) - set(disks):
+        problems.append(f"disks missing: {sorted(set(pvesh_disks) - set(disks))}")
+    for device, text in raw["probes"].items():
+        smart = hardware_inventory.parse_smartctl(text) if device.startswith("smartctl:") else {}
+        if smart and smart["serial"] in pvesh_disks and smart["size_bytes"] != pvesh_disks[smart["serial"]]:
+            problems.append(f"{device} capacity {smart['size_bytes']} vs pvesh {pvesh_disks[smart['serial']]}")
+    eth = [n for n in json.loads(raw["probes"]["pvesh_network"]) if n["type"] == "eth"]
+    if len(record["nics"]) != len(eth) or not all(nic["model"] and nic["mac"] for nic in record["nics"]):
+        problems.append("NICs incomplete")
+    devices = {disk["device"] for disk in record["disks"]}
+    for pool in record["pools"]:
+        if not pool["size_bytes"] or not pool["vdevs"] or any(v["size_bytes"] is None for v in pool["vdevs"]):
+            problems.append(f"pool {pool['name']} missing sizes")
+        if any(device not in devices for vdev in pool["vdevs"] for device in vdev["devices"]):
+            problems.append(f"pool {pool['name']} has unknown devices")
+    serial, sockets, dimms, vdevs = EXPECTED.get(record["host"], (None, None, None, {}))
+    if serial and (record["system"]["serial"], cpu["sockets"]) != (serial, sockets):
+        problems.append(f"system {record['system']['serial']}/{cpu['sockets']} ≠ {serial}/{sockets}")
+    if dimms and (len(memory["dimms"]), memory["slots"]) != dimms:
+        problems.append(f"DIMMs {len(memory['dimms'])}/{memory['slots']} ≠ {dimms[0]}/{dimms[1]}")
+    pools = {p["name"]: p for p in record["pools"]}
+    for name, (kind, width) in vdevs.items():
+        vdev = pools.get(name, {}).get("vdevs", [{}])[0]
+        if (vdev.get("type"), len(vdev.get("devices", []))) != (kind, width):
+            problems.append(f"pool {name} ≠ {kind} × {width}")
+    return problems
+
+
+def make_fake_hosts(work: Path, fixtures: dict) -> dict:
+    """Per-host probe replay directories; the six hosts reuse the three fixtures in turn."""
+    bin_dir = work / "bin"
+    bin_dir.mkdir()
+    for name, script in [("ssh", FAKE_SSH), ("probe", FAKE_PROBE)]:
+        (bin_dir / name).write_text(script)
+        (bin_dir / name).chmod(stat.S_IRWXU)
+    for name in [*LATENCY, "hostname"]:
+        (bin_dir / name).symlink_to(bin_dir / "probe")
+
+    raws = {}
+    for host, (_, doc) in zip(HOSTS, [fixtures[h] for h in sorted(fixtures)] * 2):
+        raw = hardware_inventory.raw_from_legacy(doc)
+        raws[host] = raw
+        host_dir = work / "hosts" / host
+        host_dir.mkdir(parents=True)
+        for key, output in raw["probes"].items():
+            (host_dir / key).write_text(output)
+        devices = [key.split(":", 1)[1] for key in raw["probes"] if key.startswith("smartctl:")]
+        (host_dir / "lsblk").write_text("".join(f"{dev} disk\n" for dev in devices if "," not in dev))
+        (host_dir / "scan").write_text("".join(f"/dev/bus/0 -d {dev} # megaraid\n" for dev in devices if "," in dev))
+
+    os.environ.update({"FAKE_BIN": str(bin_dir), "FAKE_DIR": str(work / "hosts")})
+    os.environ.update({f"FAKE_LATENCY_{name}": str(seconds) for name, seconds in LATENCY.items()})
+    return raws
+
+
+async def ssh(host: str, command: str) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        os.environ["FAKE_BIN"] + "/ssh", f"root@{host}", command,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    stdout, _ = await proc.communicate()
+    return stdout.decode()
+
+
+async def playbook(hosts: list, forks: int = 5) -> None:
+    """hardware_inventory.yml's access pattern: each task on every host (5 forks), then the next."""
+    semaphore = asyncio.Semaphore(forks)
+
+    async def task(host: str, command: str) -> str:
+        async with semaphore:
+            return await ssh(host, command)
+
+    async def each(command) -> list:
+        return await asyncio.gather(*(task(host, command(host) if callable(command) else command) for host in hosts))
+
+    node = lambda path: lambda host: f"pvesh get /nodes/{host.split('.')[0]}/{path} --output-format json"  # noqa: E731
+    for command in ["dmidecode -t system", "dmidecode -t bios", node("status"), "lscpu",
+                    "dmidecode -t memory", node("disks/list")]:
+        await each(command)
+    devices = dict(zip(hosts, [out.split() for out in await each("lsblk -d -o NAME,TYPE --noheadings | "
+                                                                 "awk '$2==\"disk\"{print $1}'")]))
+    # `loop:` runs the items of one host in sequence
+    for index in range(max(map(len, devices.values()))):
+        await asyncio.gather(*(task(host, f"smartctl -i /dev/{devices[host][index]}")
+                               for host in hosts if index < len(devices[host])))
+    for command in [node("hardware/pci"), "lspci -vmm", node("network"),
+                    "for i in $(ls /sys/class/net/ | grep -E '^(eth|eno|enp|ens)'); do echo $i; done",
+                    "zpool status -v", "zpool list -v", "zfs list -o name,used,avail,refer,mountpoint"]:
+        await each(command)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ssh-latency", type=float, default=0.15, help="fake SSH connection setup (s)")
+    parser.add_argument("--loads", type=int, default=50, help="loads per file for the load-time comparison")
+    args = parser.parse_args()
+
+    print("Hardware Inventory Collector Benchmark")
+    print("=" * 78)
+    fixtures = legacy_fixtures()
+    if not fixtures:
+        print(f"❌ No legacy inventory fixtures in {FIXTURES}")
+        sys.exit(1)
+
+    work = Path(tempfile.mkdtemp(prefix="hw-inventory-bench-"))
+    checks = {}
+    print(f"\n{'host':<22} {'legacy':>9} {'record':>9} {'sidecar':>9} {'load legacy':>12} {'load record':>12}")
+    for host, (path, doc) in fixtures.items():
+        raw = hardware_inventory.raw_from_legacy(doc)
+        record = hardware_inventory.write_inventory(raw, work / "parsed")
+        compact = work / "parsed" / f"{host}.json"
+        sidecar = hardware_inventory.sidecar_path(work / "parsed", host)
+        legacy_text, compact_text = path.read_text(), compact.read_text()
+        timings = []
+        for text in (legacy_text, compact_text):
+            start = time.perf_counter()
+            for _ in range(args.loads):
+                json.loads(text)
+            timings.append((time.perf_counter() - start) / args.loads)
+        print(f"{host:<22} {path.stat().st_size / 1024:7.1f}KB {compact.stat().st_size / 1024:7.1f}KB "
+              f"{sidecar.stat().st_size / 1024:7.1f}KB {timings[0] * 1e3:10.2f}ms {timings[1] * 1e3:10.2f}ms")
+        problems = consistency(raw, record)
+        for problem in problems:
+            print(f"    ⚠️  {problem}")
+        checks[f"{host} parses consistently"] = not problems
+        checks[f"{host} record ≤ 1/5 of legacy"] = compact.stat().st_size * 5 <= path.stat().st_size
+        checks[f"{host} record round-trips"] = json.loads(compact_text) == record
+
+    raws = make_fake_hosts(work, fixtures)
+    os.environ["FAKE_SSH_LATENCY"] = str(args.ssh_latency)
+    print(f"\nCollecting {len(HOSTS)} hosts, {args.ssh_latency * 1000:.0f} ms per SSH connection")
+    start = time.perf_counter()
+    asyncio.run(playbook(HOSTS))
+    serial = time.perf_counter() - start
+    print(f"  playbook   {serial:6.2f}s")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(hardware_inventory.collect_all(
+            {host: None for host in HOSTS}, work / "collected", ssh_command=os.environ["FAKE_BIN"] + "/ssh"))
+    concurrent = time.perf_counter() - start
+    print(f"  collector  {concurrent:6.2f}s  ({serial / concurrent:.1f}x faster)")
+
+    collected_ok = reparse_ok = True
+    for host, raw in raws.items():
+        if isinstance(results[host], Exception):
+            print(f"    ❌ {host}: {results[host]}")
+            collected_ok = False
+            continue
+        got = hardware_inventory.load_raw(work / "collected", host)["probes"]
+        want = {key: text for key, text in raw["probes"].items() if key != "iface_speeds"
+                and not key.startswith("smartctl:zd")}
+        got.pop("iface_speeds", None)
+        if got != want:
+            print(f"    ❌ {host}: probes differ: {sorted(k for k in set(got) | set(want) if got.get(k) != want.get(k))}")
+            collected_ok = False
+        reparsed = hardware_inventory.parse_inventory(hardware_inventory.load_raw(work / "collected", host))
+        reparse_ok &= reparsed == results[host]
+    checks["collected output matches the fixtures"] = collected_ok
+    checks["--reparse reproduces the records"] = reparse_ok
+    checks["collector faster than the playbook"] = concurrent < serial
+
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Inventory collector {'parses every fixture' if ok else 'regressed'} "
+          f"({serial / concurrent:.1f}x faster collection)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Icon Render Pipeline Benchmark
+
+Times regenerating the bot/server avatars and the app icons three ways:
+
+  serial    — one icon after another in this process, no cache (the old loop)
+  cold      — render_icons with an empty cache: every icon rendered in the pool
+  warm      — render_icons again with nothing changed: every icon a cache hit
+
+and checks that all three produce byte-identical PNGs.
+
+Usage:
+    uv run --with pillow python3 scripts/bench_icon_pipeline.py --repeat 3
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import discord_app_icons
+import discord_avatars
+from icon_pipeline import render_icons
+
+SETS = {
+    "avatars": (discord_avatars.render_icon,
+                {**discord_avatars.BOT_CONFIGS, "mount_olympus": discord_avatars.SERVER_CONFIG}),
+    "app icons": (discord_app_icons.render_app_icon, discord_app_icons.APP_ICON_CONFIGS),
+}
+SIZES = discord_avatars.ICON_SIZES
+
+
+def run(render, configs, output_dir: Path, cache_dir: Path, workers=None) -> tuple[float, dict]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        images = render_icons(render, configs, output_dir, cache_dir=cache_dir, workers=workers,
+                              sizes=SIZES, size=512)
+    return time.perf_counter() - start, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per strategy (best is reported)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print("Icon Render Pipeline Benchmark")
+    print("=" * 60)
+    identical = True
+    for label, (render, configs) in SETS.items():
+        best = {}
+        for _ in range(args.repeat):
+            work = Path(tempfile.mkdtemp(prefix="icon-bench-"))
+            serial, serial_images = run(render, configs, work / "serial", work / "serial-cache", workers=1)
+            cold, cold_images = run(render, configs, work / "out", work / "cache", args.workers)
+            warm, warm_images = run(render, configs, work / "out", work / "cache", args.workers)
+            identical &= serial_images == cold_images == warm_images
+            for name, elapsed in (("serial", serial), ("cold", cold), ("warm", warm)):
+                best[name] = min(best.get(name, elapsed), elapsed)
+        print(f"{label} ({len(configs)} icons)")
+        for name, elapsed in best.items():
+            print(f"  {name:<7} {elapsed * 1000:8.1f} ms  {best['serial'] / elapsed:6.1f}x")
+
+    print(f"\n{'✅' if identical else '❌'} Output {'identical' if identical else 'differs'} across strategies")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
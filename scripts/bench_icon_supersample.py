@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Supersampled Icon Rendering Benchmark
+
+Renders every avatar and app icon at each Discord size (512/128/64/32/16)
+three ways:
+
+  direct     — painted straight at each size, no antialiasing (the old
+               rendering, repeated per size)
+  per-size   — supersampled at 4x, but painted separately for each size
+  single     — icon_geometry.supersample: one 4x paint, one reduce to 512,
+               the smaller sizes downsampled from that
+
+Quality is the mean absolute error (over RGBA, 0-255) against a reference
+painted separately at each size at 8x. The single render has to be closer to
+the reference than direct painting, at every size, and cheaper than per-size
+supersampling.
+
+Usage:
+    uv run --with pillow --with numpy python3 scripts/bench_icon_supersample.py --repeat 3
+"""
+
+import argparse
+import io
+import sys
+import time
+from functools import partial
+
+import numpy as np
+from PIL import Image
+
+import discord_app_icons
+import discord_avatars
+from icon_geometry import DISCORD_SIZES, supersample
+
+PAINTS = [partial(discord_avatars.paint_icon, config=config)
+          for config in (*discord_avatars.BOT_CONFIGS.values(), discord_avatars.SERVER_CONFIG)] + \
+         [partial(discord_app_icons.paint_app_icon, config=config)
+          for config in discord_app_icons.APP_ICON_CONFIGS.values()]
+
+
+def direct(paint) -> dict:
+    return {size: supersample(paint, size, (size,), factor=1)[size] for size in DISCORD_SIZES}
+
+
+def per_size(paint) -> dict:
+    return {size: supersample(paint, size, (size,))[size] for size in DISCORD_SIZES}
+
+
+def single(paint) -> dict:
+    return supersample(paint, 512, DISCORD_SIZES)
+
+
+def reference(paint) -> dict:
+    return {size: supersample(paint, size, (size,), factor=8)[size] for size in DISCORD_SIZES}
+
+
+def pixels(png: bytes) -> np.ndarray:
+    return np.asarray(Image.open(io.BytesIO(png)).convert("RGBA"), dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per strategy (best is reported)")
+    args = parser.parse_args()
+
+    print("Supersampled Icon Rendering Benchmark")
+    print("=" * 60)
+    print(f"{len(PAINTS)} icons × sizes {'/'.join(map(str, DISCORD_SIZES))}\n")
+
+    references = [reference(paint) for paint in PAINTS]
+    timings, errors = {}, {}
+    for strategy in (direct, per_size, single):
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            rendered = [strategy(paint) for paint in PAINTS]
+            elapsed = time.perf_counter() - start
+            timings[strategy.__name__] = min(timings.get(strategy.__name__, elapsed), elapsed)
+        errors[strategy.__name__] = {
+            size: np.mean([np.abs(pixels(images[size]) - pixels(ref[size])).mean()
+                           for images, ref in zip(rendered, references)])
+            for size in DISCORD_SIZES
+        }
+
+    print(f"{'':<10} {'time':>9}   " + "  ".join(f"{f'err@{size}':>8}" for size in DISCORD_SIZES))
+    for name, elapsed in timings.items():
+        print(f"{name:<10} {elapsed * 1000:7.0f} ms   " + "  ".join(f"{errors[name][size]:8.2f}" for size in DISCORD_SIZES))
+
+    sharper = all(errors["single"][size] < errors["direct"][size] for size in DISCORD_SIZES)
+    cheaper = timings["single"] < timings["per_size"]
+    print(f"\nSingle render vs per-size supersampling: {timings['per_size'] / timings['single']:.1f}x faster")
+    ok = sharper and cheaper
+    print(f"\n{'✅' if ok else '❌'} Supersampling {'is closer to the reference at every size, painted once' if ok else 'regressed'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Image Post-Processing Benchmark
+
+Derives every asset size from a folder of sample images two ways, each in its
+own process so peak memory can be compared:
+
+  old    — read the whole body into memory (like resp.content), then
+           Image.open(BytesIO(...)) and a full-size LANCZOS resize per output
+  new    — image_postprocess.derive_images: one decode from disk with
+           draft/reduce pre-downscaling and one PNG encode per distinct size
+
+Square sources become a 512 avatar, a 512 app icon and 128/64 thumbnails. Wide
+sources become a 960x540 banner and a 128x72 thumbnail. Without --samples, a
+folder of Replicate-sized PNGs and large JPEGs is generated first. The outputs
+are compared pixel by pixel to confirm the cheaper path looks the same.
+
+Usage:
+    uv run --with pillow python3 scripts/bench_image_postprocess.py [--samples DIR] [--repeat 3]
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageStat
+
+from image_postprocess import derive_images
+
+SQUARE_SIZES = {"avatar": (512, 512), "app_icon": (512, 512), "thumb128": (128, 128), "thumb64": (64, 64)}
+WIDE_SIZES = {"banner": (960, 540), "thumb128": (128, 72)}
+SAMPLES = [("png", (1024, 1024)), ("png", (1344, 768)), ("jpg", (2048, 2048)), ("jpg", (4096, 2304))]
+EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def make_samples(directory: Path) -> None:
+    for i, (fmt, size) in enumerate(SAMPLES):
+        noise = Image.effect_noise(size, 48)
+        gradient = Image.linear_gradient("L").resize(size)
+        img = Image.merge("RGB", (gradient, noise, Image.radial_gradient("L").resize(size)))
+        img.save(directory / f"sample{i}-{size[0]}x{size[1]}.{fmt}", quality=92)
+
+
+def targets(source: Path, out_dir: Path) -> dict:
+    with Image.open(source) as img:
+        width, height = img.size
+    sizes = WIDE_SIZES if width > height else SQUARE_SIZES
+    return {str(out_dir / f"{source.stem}-{name}.png"): size for name, size in sizes.items()}
+
+
+def process_old(source: Path, outputs: dict) -> None:
+    data = source.read_bytes()
+    for path, size in outputs.items():
+        img = Image.open(io.BytesIO(data))
+        img = img.resize(size, Image.Resampling.LANCZOS)
+        img.save(path, format="PNG")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives exec, so a child would report this benchmark's own
+    # peak from generating samples; Linux's VmHWM is per process image.
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 2**10
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def worker(strategy: str, samples: list, out_dir: Path, repeat: int) -> None:
+    """Runs in a child process; prints {"seconds", "peak_mb"} as JSON."""
+    process = process_old if strategy == "old" else derive_images
+    jobs = [(source, targets(source, out_dir)) for source in samples]
+    baseline = peak_rss_mb()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source, outputs in jobs:
+            process(source, outputs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(json.dumps({"seconds": best, "peak_mb": peak_rss_mb() - baseline}))
+
+
+def mean_difference(a: Path, b: Path) -> float:
+    with Image.open(a) as left, Image.open(b) as right:
+        diff = ImageChops.difference(left.convert("RGB"), right.convert("RGB"))
+        return sum(ImageStat.Stat(diff).mean) / 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--samples", type=Path, help="folder of source images (default: generated)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per strategy (best is reported)")
+    parser.add_argument("--worker", choices=["old", "new"], help=argparse.SUPPRESS)
+    parser.add_argument("--out", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    samples = sorted(p for p in (args.samples or Path()).glob("*") if p.suffix.lower() in EXTENSIONS)
+    if args.worker:
+        worker(args.worker, samples, args.out, args.repeat)
+        return
+
+    work = Path(tempfile.mkdtemp(prefix="postprocess-bench-"))
+    if args.samples is None:
+        args.samples = work / "samples"
+        args.samples.mkdir()
+        make_samples(args.samples)
+        samples = sorted(args.samples.glob("*"))
+
+    print("Image Post-Processing Benchmark")
+    print("=" * 60)
+    print(f"{len(samples)} sources from {args.samples}\n")
+
+    results = {}
+    for strategy in ("old", "new"):
+        out_dir = work / strategy
+        out_dir.mkdir()
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", strategy, "--samples", str(args.samples),
+             "--out", str(out_dir), "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results[strategy] = json.loads(output)
+        print(f"{strategy:<4} {results[strategy]['seconds'] * 1000:8.1f} ms   peak +{results[strategy]['peak_mb']:6.1f} MB")
+
+    worst = max(mean_difference(path, work / "new" / path.name) for path in (work / "old").glob("*.png"))
+    old, new = results["old"], results["new"]
+    print(f"\nSpeedup: {old['seconds'] / new['seconds']:.1f}x; "
+          f"peak memory {new['peak_mb']:.1f} MB vs {old['peak_mb']:.1f} MB")
+    print(f"Largest mean pixel difference from the old output: {worst:.2f}/255")
+    ok = new["seconds"] < old["seconds"] and new["peak_mb"] <= old["peak_mb"] and worst < 4
+    print(f"\n{'✅' if ok else '❌'} Post-processing {'is faster and leaner with matching output' if ok else 'regressed'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Hardware Inventory Index Benchmark
+
+Builds a scratch git repository whose docs/inventory history starts with the
+real legacy fixtures and then carries `--rounds` more collections per host.
+Every round changes pool usage (noise the diff must ignore). A few rounds
+inject real hardware changes:
+
+  round 5    r820  disk sdc replaced (new serial)
+  round 9    r8202 DIMM_A5 pulled
+  round 12   r8202 DIMM_A5 back, different module (new serial)
+  round 15   r420  sas-data raidz1-0 DEGRADED
+
+Then checks and times inventory_index.py:
+
+  cold       — index the whole history (one git log, one cat-file --batch)
+  warm       — re-run with nothing new: no file is parsed
+  queries    — hosts, free-slots, serial-changes, diff: must answer in ms
+  grep       — the same serial question answered by reading every version
+               back out of git and parsing it, as done by hand today
+
+Usage:
+    python3 scripts/bench_inventory_index.py --rounds 40
+"""
+
+import argparse
+import copy
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import hardware_inventory
+import inventory_index
+
+FIXTURES = hardware_inventory.OUTPUT_DIR
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True, check=True).stdout
+
+
+def mutate(record: dict, host: str, round_no: int) -> dict:
+    """The record one day (round) later."""
+    record = copy.deepcopy(record)
+    collected = datetime.strptime(record["collected_at"], "%Y-%m-%dT%H:%M:%SZ") + timedelta(days=1)
+    record["collected_at"] = collected.strftime("%Y-%m-%dT%H:%M:%SZ")
+    for pool in record["pools"]:
+        if pool["alloc_bytes"] is not None:
+            pool["alloc_bytes"] += round_no * 1 << 30
+            pool["free_bytes"] -= round_no * 1 << 30
+    disks = {disk["device"]: disk for disk in record["disks"]}
+    dimms = record["memory"]["dimms"]
+    if host.startswith("r820.") and round_no == 5:
+        disks["sdc"]["serial"] = "6b8ca3a0ec08dc0031c0ffee00000001"
+    if host.startswith("r8202.") and round_no == 9:
+        record["memory"]["dimms"] = [dimm for dimm in dimms if dimm["locator"] != "DIMM_A5"]
+    if host.startswith("r8202.") and round_no == 12:
+        dimms.append({**dimms[0], "locator": "DIMM_A5", "serial": "BENCH0A5"})
+    if host.startswith("r420.") and round_no == 15:
+        record["pools"][-1]["vdevs"][0]["state"] = "DEGRADED"
+    record["memory"]["total_bytes"] = sum(dimm["size_bytes"] for dimm in record["memory"]["dimms"])
+    return record
+
+
+def build_repo(rounds: int) -> Path:
+    repo = Path(tempfile.mkdtemp(prefix="inventory-index-bench-"))
+    inventory = repo / "docs" / "inventory"
+    inventory.mkdir(parents=True)
+    git(repo, "init", "-q")
+    git(repo, "config", "user.email", "bench@localhost")
+    git(repo, "config", "user.name", "bench")
+    records = {}
+    for path in sorted(FIXTURES.glob("[!.]*.json")):
+        doc = json.loads(path.read_text())
+        if hardware_inventory.is_legacy(doc):
+            (inventory / path.name).write_text(path.read_text())
+            records[doc["host"]] = hardware_inventory.parse_inventory(hardware_inventory.raw_from_legacy(doc))
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "legacy inventory")
+    for round_no in range(1, rounds + 1):
+        for host, record in records.items():
+            records[host] = mutate(record, host, round_no)
+            (inventory / f"{host}.json").write_text(hardware_inventory.render(records[host]))
+        git(repo, "commit", "-q", "-am", f"inventory round {round_no}")
+    return repo
+
+
+def timed(fn, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def grep_serials(repo: Path) -> set:
+    """Serial changes the slow way: every committed version out of git, parsed, compared in order."""
+    previous, changes = {}, set()
+    for rev in reversed(git(repo, "rev-list", "HEAD").split()):
+        for name in git(repo, "ls-tree", "--name-only", rev, "docs/inventory/").split():
+            record = inventory_index.record_from(git(repo, "show", f"{rev}:{name}").encode())
+            serials = {(kind, item[key]): item.get("serial")
+                       for kind, items, key in (("disk", record["disks"], "device"),
+                                                ("dimm", record["memory"]["dimms"], "locator"))
+                       for item in items}
+            before = previous.get(record["host"], {})
+            changes.update((record["host"], *slot) for slot, serial in serials.items()
+                           if before and before.get(slot, serial) != serial or before and slot not in before)
+            previous[record["host"]] = serials
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=40, help="collections per host after the fixtures")
+    args = parser.parse_args()
+
+    print("Hardware Inventory Index Benchmark")
+    print("=" * 64)
+    repo = build_repo(args.rounds)
+    db_path = repo / "index.sqlite"
+    hosts = len(list((repo / "docs" / "inventory").glob("*.json")))
+    print(f"{hosts} hosts × {args.rounds + 1} collections in git history\n")
+
+    db = inventory_index.connect(db_path)
+    start = time.perf_counter()
+    cold = inventory_index.update(db, repo)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = inventory_index.update(db, repo)
+    warm_s = time.perf_counter() - start
+    print(f"cold index   {cold_s:7.2f}s   {cold['collections']} collections from {cold['files']} file versions")
+    print(f"warm update  {warm_s * 1000:7.1f}ms  {warm['files']} files parsed")
+
+    serials, serials_s = timed(lambda: inventory_index.serial_changes(db))
+    free, free_s = timed(lambda: inventory_index.free_slots(db))
+    _, hosts_s = timed(lambda: inventory_index.hosts(db))
+    r8202 = inventory_index.collections(db, "r8202.infiquetra.com")
+    r420 = inventory_index.collections(db, "r420.infiquetra.com")
+    pulled, diff_s = timed(lambda: inventory_index.diff(db, r8202[8]["id"], r8202[9]["id"]))
+    degraded = inventory_index.diff(db, r420[14]["id"], r420[15]["id"])
+    quiet = inventory_index.diff(db, r420[20]["id"], r420[21]["id"])
+    start = time.perf_counter()
+    grepped = grep_serials(repo)
+    grep_s = time.perf_counter() - start
+
+    print(f"\n{'query':<16} {'time':>10}")
+    for label, seconds in [("hosts", hosts_s), ("free-slots", free_s), ("serial-changes", serials_s),
+                           ("diff", diff_s), ("grep (by hand)", grep_s)]:
+        print(f"{label:<16} {seconds * 1000:8.2f}ms")
+    print()
+    for row in serials:
+        print(f"  {row['collected_at']} {row['host']} {row['component']} {row['key']}: "
+              f"{row['previous_serial']} → {row['serial']}")
+
+    found = {(row["host"], row["component"], row["key"]) for row in serials}
+    checks = {
+        "every collection indexed once": cold["collections"] == hosts * (args.rounds + 1),
+        "warm update parses nothing": warm["files"] == 0,
+        "serial changes found": found == {("r820.infiquetra.com", "disk", "sdc"),
+                                          ("r8202.infiquetra.com", "dimm", "DIMM_A5")},
+        "index agrees with grep": found <= grepped and len(serials) == 2,
+        "pulled DIMM is the whole diff": [c[:3] for c in pulled] == [("dimm", "DIMM_A5", "-"),
+                                                                     ("memory", "memory", "~")],
+        "degraded vdev is the whole diff": [(c[0], c[1], list(c[3])) for c in degraded]
+                                           == [("vdev", "sas-data/raidz1-0", ["state"])],
+        "usage churn is not drift": quiet == [],
+        "r8202 has free slots": [row["host"] for row in free] == ["r8202.infiquetra.com"],
+        "queries answer in milliseconds": max(hosts_s, free_s, serials_s, diff_s) < 0.05,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Inventory index {'answers drift queries in ms' if ok else 'regressed'} "
+          f"(serial-changes {serials_s * 1000:.1f}ms vs {grep_s:.1f}s by hand)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
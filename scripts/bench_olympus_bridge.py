@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Olympus Bridge Delivery Benchmark
+
+Renders the olympus-bridge template with local settings, points it at a fake
+Discord webhook server, and compares the old one-blocking-POST-per-event loop
+with the async, coalescing delivery pipeline.
+
+Usage:
+    uv run --with aiohttp --with redis --with requests --with jinja2 --with pyyaml \
+      python3 scripts/bench_olympus_bridge.py --events 2000 --channels 8 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import jinja2
+import requests
+import yaml
+from aiohttp import web
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ROLE_DIR = REPO_ROOT / "ansible/roles/olympus_bus"
+
+
+def render_bridge(webhook_url: str, **overrides) -> Path:
+    """Render olympus-bridge.py.j2 with role defaults into a temp dir; returns bridge.py."""
+    variables = yaml.safe_load((ROLE_DIR / "defaults/main.yml").read_text())
+    variables.update({
+        "vault_redis_password": "",
+        "vault_discord_webhook_url_olympus_bus": webhook_url,
+        "bridge_metrics_bind": "127.0.0.1",
+        "bridge_metrics_port": 0,
+    })
+    variables.update(overrides)
+    env = jinja2.Environment(undefined=jinja2.StrictUndefined, keep_trailing_newline=True)
+    source = env.from_string((ROLE_DIR / "templates/olympus-bridge.py.j2").read_text()).render(**variables)
+
+    path = Path(tempfile.mkdtemp(prefix="olympus-bridge-")) / "bridge.py"
+    path.write_text(source)
+    return path
+
+
+def load_bridge(webhook_url: str, **overrides):
+    """Render olympus-bridge.py.j2 with role defaults and import it as a module."""
+    path = render_bridge(webhook_url, **overrides)
+    spec = importlib.util.spec_from_file_location("olympus_bridge", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeWebhook:
+    """Local Discord webhook stand-in that records every delivered line."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.posts = 0
+        self.lines: list[str] = []
+        self._runner = None
+        self.url = ""
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.posts += 1
+        self.lines.extend(payload["content"].split("\n"))
+        return web.Response(status=204)
+
+    async def start(self, port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/webhook", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/webhook"
+        return self.url
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+def make_events(count: int, channels: int) -> list[tuple[str, str]]:
+    return [(f"olympus:discord:bench-{i % channels}", f"event {i} deployed step ok") for i in range(count)]
+
+
+async def wait_for(webhook: FakeWebhook, count: int) -> None:
+    while len(webhook.lines) < count:
+        await asyncio.sleep(0.005)
+
+
+async def bench_sync(webhook: FakeWebhook, events: list[tuple[str, str]]) -> float:
+    """Old behaviour: one blocking requests.post per event, in subscriber order."""
+    def deliver():
+        for channel, message in events:
+            requests.post(webhook.url, json={"content": f"`[{channel}]` {message}"}, timeout=10)
+
+    start = time.perf_counter()
+    await asyncio.to_thread(deliver)
+    return time.perf_counter() - start
+
+
+async def bench_async(bridge, webhook: FakeWebhook, events: list[tuple[str, str]]) -> float:
+    """New pipeline: bounded queue → coalescing senders over one session."""
+    import aiohttp
+
+    queue = bridge.ChannelQueue(len(events))
+    connector = aiohttp.TCPConnector(limit=bridge.SENDERS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        client = bridge.AsyncDiscordClient(session)
+        senders = [asyncio.create_task(bridge.sender(queue, client)) for _ in range(bridge.SENDERS)]
+        start = time.perf_counter()
+        for channel, message in events:
+            queue.put_nowait(channel, message)
+            # Yield like the subscriber does between Redis reads.
+            await asyncio.sleep(0)
+        await wait_for(webhook, len(events))
+        elapsed = time.perf_counter() - start
+        for task in senders:
+            task.cancel()
+    return elapsed
+
+
+async def main_async(args) -> int:
+    sync_hook = FakeWebhook(args.latency)
+    async_hook = FakeWebhook(args.latency)
+    await sync_hook.start()
+    await async_hook.start()
+    bridge = load_bridge(async_hook.url, bridge_senders=args.senders)
+
+    sync_events = make_events(args.sync_events, args.channels)
+    events = make_events(args.events, args.channels)
+
+    print("Olympus Bridge Delivery Benchmark")
+    print("=" * 55)
+    print(f"Webhook latency: {args.latency * 1000:.0f} ms, channels: {args.channels}, senders: {args.senders}")
+
+    sync_time = await bench_sync(sync_hook, sync_events)
+    sync_rate = len(sync_events) / sync_time
+    print(f"\nBlocking per-event POST: {len(sync_events)} events in {sync_time:.2f}s "
+          f"→ {sync_rate:,.0f} events/s, {sync_hook.posts} POSTs")
+
+    async_time = await bench_async(bridge, async_hook, events)
+    async_rate = len(events) / async_time
+    print(f"Async coalescing bridge: {len(events)} events in {async_time:.2f}s "
+          f"→ {async_rate:,.0f} events/s, {async_hook.posts} POSTs")
+
+    lost = len(events) - len(async_hook.lines)
+    print(f"\nSpeedup: {async_rate / sync_rate:.1f}x, lost events: {lost}")
+
+    await sync_hook.stop()
+    await async_hook.stop()
+    return 0 if lost == 0 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=5000, help="events through the async pipeline")
+    parser.add_argument("--sync-events", type=int, default=200, help="events through the blocking baseline")
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--senders", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated webhook latency (s)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
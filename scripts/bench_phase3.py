@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Phase 3 Member Indexing Benchmark
+
+Runs discord_phase3 against a large guild in the local mock Discord API. The
+bots joined last, so they sit past the first thousand members. The benchmark
+compares:
+
+  single page — the old `?limit=1000` member listing: how many bots it finds
+  first run   — paged member index; roles and nicknames assigned
+  re-run      — within the index TTL: must make no API calls at all
+  refresh     — re-lists members (--refresh): only the member pages, no
+                role PUTs or nickname PATCHes, because nothing differs
+
+Usage:
+    uv run --with aiohttp python3 scripts/bench_phase3.py --members 25000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+import discord_phase3
+import member_index
+from discord_phase3 import GUILD_ID
+from discord_setup import BOTS
+from mock_discord_api import MockDiscordAPI
+
+ROLE_NAMES = ["Olympus", "Project: CAMPPS", "Project: Mimir", "Project: JCE"]
+
+
+def seed(api: MockDiscordAPI, members: int) -> dict:
+    """Seed the guild and return the discord_config.json phase 3 reads."""
+    api.state.seed_guild(GUILD_ID, members, tuple(BOTS))
+    roles = {}
+    for name in ROLE_NAMES:
+        status, role = api.state.guild("POST", f"/guilds/{GUILD_ID}/roles", {}, {"name": name})
+        roles[name] = role["id"]
+    return {"guild_id": GUILD_ID, "roles": roles}
+
+
+def timed(label: str, api: MockDiscordAPI, member_ttl: float) -> tuple:
+    before = api.state.stats()["requests"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(discord_phase3.run("bench", member_ttl, api.url))
+    elapsed = time.perf_counter() - start
+    requests_made = api.state.stats()["requests"] - before
+    changes = results["applied"] + results["failed"]
+    print(f"{label:<12} {elapsed:6.2f}s  {requests_made:5d} requests  {changes:3d} changes")
+    return requests_made, changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", type=int, default=25000, help="human members to seed")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="phase3-bench-"))
+    member_index.CACHE_DIR = work / "cache"
+    os.chdir(work)
+
+    print("Phase 3 Member Indexing Benchmark")
+    print("=" * 60)
+    print(f"{args.members} members + {len(BOTS)} bots\n")
+
+    with MockDiscordAPI(limit=50, global_limit=1000) as api:
+        Path("discord_config.json").write_text(json.dumps(seed(api, args.members)))
+
+        page = requests.get(f"{api.url}/guilds/{GUILD_ID}/members?limit=1000",
+                            headers={"Authorization": "Bot bench"}).json()
+        found = sum(1 for member in page if member["user"]["bot"])
+        print(f"{'single page':<12} finds {found}/{len(BOTS)} bots in {len(page)} members")
+
+        _, first = timed("first run", api, member_index.MEMBER_TTL)
+        rerun, rerun_changes = timed("re-run", api, member_index.MEMBER_TTL)
+        refreshed, refresh_changes = timed("refresh", api, 0)
+
+    pages = args.members // member_index.PAGE_SIZE + 1
+    ok = first > 0 and rerun == 0 and rerun_changes == 0 and refresh_changes == 0 and refreshed == pages
+    print(f"\n{'✅' if ok else '❌'} Phase 3 {'is idempotent and sees every member' if ok else 'misbehaved'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+VM Provisioning Benchmark
+
+Provisions every agent and service VM from roles/proxmox_vm/defaults/main.yml
+against fake_proxmox.py, whose tasks take scaled-down but proportionate times
+(a clone costs the most, a config change the least):
+
+  serial     — one task at a time, as the create_vm.yml loops run today
+  bounded    — provision_vms.py with its default per-node / per-pool limits
+  unbounded  — limits lifted: the fleet should take about as long as its slowest VM
+  failure    — a resize fails twice; the re-run resumes without re-cloning
+  crash      — the orchestrator is killed mid-clone; the re-run polls the
+               recorded UPIDs instead of cloning again
+  idempotent — a run over a finished fleet submits nothing
+  cloudinit  — --cloudinit-only regenerates every drive and reboots
+
+Usage:
+    python3 scripts/bench_provision_vms.py --scale 1.0
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import fake_proxmox
+import provision_vms
+
+
+def cluster(scale: float) -> fake_proxmox.FakeProxmox:
+    durations = {task: seconds * scale for task, seconds in fake_proxmox.DURATIONS.items()}
+    return fake_proxmox.FakeProxmox.from_fixture(durations=durations, clone_seconds_per_gb=0.1 * scale)
+
+
+def peak(intervals) -> int:
+    """Most intervals open at once."""
+    edges = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    running = best = 0
+    for _, delta in edges:
+        running += delta
+        best = max(best, running)
+    return best
+
+
+def peaks(fake: fake_proxmox.FakeProxmox, node_of: dict, key: str) -> dict:
+    by = {}
+    for task in fake.task_log():
+        group = node_of.get(int(task["id"])) if key == "node" else task["pool"]
+        if group:
+            by.setdefault(group, []).append((task["start"], task["end"]))
+    return {group: peak(intervals) for group, intervals in by.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on the fake task durations")
+    args = parser.parse_args()
+
+    print("VM Provisioning Benchmark")
+    print("=" * 64)
+    declared = provision_vms.load_targets()
+    targets, template, user = declared["targets"], declared["template_vmid"], declared["user"]
+    node_of = {target.vmid: target.node for target in targets}
+    scratch = Path(tempfile.mkdtemp(prefix="provision-bench-"))
+    poll = 0.05
+    print(f"{len(targets)} VMs on {len(set(node_of.values()))} nodes\n")
+
+    def run(fake, server, name, **kwargs):
+        api = provision_vms.connect(server.address, "fake")
+        # Open the pooled TLS connections first: a one-off ~50ms each, not what is being measured
+        with ThreadPoolExecutor(provision_vms.WORKERS) as pool:
+            list(pool.map(lambda _: api.get("nodes"), range(provision_vms.WORKERS)))
+        return provision_vms.provision(api, targets, template, user, state_path=scratch / f"{name}.json",
+                                       poll=poll, quiet=True, **kwargs)
+
+    timings = {}
+    for name, limits in [("serial", {"max_tasks": 1}), ("bounded", {}),
+                         ("unbounded", {"per_node": len(targets), "per_pool": len(targets)})]:
+        fake = cluster(args.scale)
+        with fake_proxmox.FakeServer(fake) as server:
+            report = run(fake, server, name, **limits)
+        timings[name] = (report, fake)
+        print(f"{name:<10} {report['seconds']:7.2f}s  {report['submitted']} tasks  "
+              f"{'ok' if report['ok'] else 'FAILED'}")
+
+    serial, serial_fake = timings["serial"]
+    bounded, bounded_fake = timings["bounded"]
+    unbounded, _ = timings["unbounded"]
+    # Uncontended pipeline time per VM: its steps when nothing else was running
+    slowest = max(sum(vm["seconds"].values()) for vm in serial["vms"].values())
+    node_peaks = peaks(bounded_fake, node_of, "node")
+    pool_peaks = peaks(bounded_fake, node_of, "pool")
+    print(f"\nslowest single VM {slowest:.2f}s; bounded peaks per node {max(node_peaks.values())}, "
+          f"per pool {pool_peaks}")
+    running = [vm for vm in bounded_fake.vms.values() if not vm.get("template")]
+    configured = all(vm["status"] == "running" and vm["config"]["scsi0"].endswith(f"size={node['disk_gb']}G")
+                     and vm["config"]["ipconfig0"].startswith(f"ip={node['ip']}/")
+                     and vm["node"] == node["node"] and "cloudinit" in vm
+                     for vm, node in ((bounded_fake.vms[t.vmid], t.__dict__) for t in targets))
+
+    # A resize that fails twice: one retry is not enough, so the run stops and the re-run resumes
+    fake = cluster(args.scale)
+    with fake_proxmox.FakeServer(fake) as server:
+        fake.fail("qmresize", 101, times=2)
+        failed = run(fake, server, "failure")
+        resumed = run(fake, server, "failure")
+        clones_after_failure = Counter(t["id"] for t in fake.task_log() if t["type"] == "qmclone")
+        again = run(fake, server, "again")
+        cloudinit = run(fake, server, "cloudinit", mode="cloudinit")
+        reboots = sum(1 for t in fake.task_log() if t["type"] in ("qmreboot", "qmstart"))
+    print(f"failure    athena: {failed['vms']['athena']['error']}; resumed in {resumed['seconds']:.2f}s "
+          f"with {resumed['submitted']} tasks")
+
+    # Kill the CLI mid-clone, then resume from its state file
+    fake = cluster(args.scale)
+    with fake_proxmox.FakeServer(fake) as server:
+        env = {**os.environ, "PROXMOX_API_HOST": server.address, "PROXMOX_API_TOKEN_SECRET": "fake"}
+        state = scratch / "crash.json"
+        cli = subprocess.Popen([sys.executable, str(Path(__file__).with_name("provision_vms.py")),
+                                "--state", str(state), "--poll", str(poll)],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline, in_flight = time.monotonic() + 30, 0
+        while in_flight < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+                in_flight = sum(1 for vm in json.loads(state.read_text())["vms"].values() if vm["task"])
+        cli.send_signal(signal.SIGKILL)
+        cli.wait()
+        crash = run(fake, server, "crash")
+        clones = Counter(t["id"] for t in fake.task_log() if t["type"] == "qmclone")
+    print(f"crash      killed with {in_flight} tasks in flight; resumed in {crash['seconds']:.2f}s")
+
+    checks = {
+        "every VM provisioned": serial["ok"] and bounded["ok"] and unbounded["ok"] and len(running) == len(targets),
+        "VMs configured like create_vm.yml": configured,
+        "bounded at least 4x faster than serial": serial["seconds"] / bounded["seconds"] >= 4,
+        "unbounded takes about the slowest VM": unbounded["seconds"] <= 1.5 * slowest,
+        "per-node limit held": max(node_peaks.values()) <= provision_vms.PER_NODE,
+        "per-pool limit held": max(pool_peaks.values()) <= provision_vms.PER_POOL,
+        "failure stops only that VM": not failed["ok"] and sum(not ok for ok in failed["results"].values()) == 1,
+        "resume finishes without re-cloning": resumed["ok"] and max(clones_after_failure.values()) == 1,
+        "crash resume clones each VM once": crash["ok"] and in_flight >= 4 and set(clones.values()) == {1}
+                                            and len(clones) == len(targets),
+        "finished fleet submits nothing": again["ok"] and again["submitted"] == 0,
+        "cloud-init regenerated and rebooted": cloudinit["ok"] and reboots == 2 * len(targets),
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Provisioning {'concurrent and resumable' if ok else 'regressed'} "
+          f"({serial['seconds']:.1f}s serial → {bounded['seconds']:.1f}s bounded, "
+          f"{unbounded['seconds']:.1f}s unbounded vs {slowest:.1f}s slowest VM)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
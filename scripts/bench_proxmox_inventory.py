@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Proxmox Dynamic Inventory Benchmark
+
+Replays the recorded API fixture (ansible/fixtures/proxmox-api.json) with a
+simulated per-request round trip and checks ansible/main.py:
+
+  serial     — the same fetch with one worker, one request after another
+  cold       — concurrent fetch: node listings and VM configs in parallel
+  warm       — a run inside the TTL: no API requests at all
+  expired    — a run past the TTL fetches again
+  api down   — an expired cache is served when the API fails
+  static     — groups and ansible_host agree with inventory/hosts.yml
+
+Usage:
+    python3 scripts/bench_proxmox_inventory.py --latency 0.03
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ANSIBLE_DIR = Path(__file__).resolve().parent.parent / "ansible"
+sys.path.insert(0, str(ANSIBLE_DIR))
+import main as proxmox_inventory  # noqa: E402
+
+FIXTURE = ANSIBLE_DIR / "fixtures" / "proxmox-api.json"
+STATIC_GROUPS = ["proxmox_hosts", "agent_vms", "service_vms", "runner_vms"]
+
+
+class DownSource:
+    name = f"fixture:{FIXTURE.resolve()}"
+
+    def get(self, path):
+        raise ConnectionError("Connection refused")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def static_groups() -> dict:
+    """group → {host: ansible_host} from inventory/hosts.yml."""
+    doc = yaml.safe_load((ANSIBLE_DIR / "inventory" / "hosts.yml").read_text())["all"]
+    groups = {}
+    for name in STATIC_GROUPS:
+        hosts = doc["children"][name].get("hosts") or {}
+        groups[name] = {host: (hostvars or {}).get("ansible_host", doc["hosts"].get(host, {}).get("ansible_host"))
+                        for host, hostvars in hosts.items()}
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated seconds per API request")
+    args = parser.parse_args()
+
+    print("Proxmox Dynamic Inventory Benchmark")
+    print("=" * 64)
+    cache = Path(tempfile.mkdtemp(prefix="proxmox-inventory-bench-")) / "proxmox-inventory.json"
+
+    def run(workers=proxmox_inventory.WORKERS, ttl=proxmox_inventory.INVENTORY_TTL, refresh=False, source=None):
+        source = source or proxmox_inventory.RecordedSource(FIXTURE, latency=args.latency)
+        result, seconds = timed(lambda: proxmox_inventory.inventory(ttl, refresh, cache_path=cache,
+                                                                    workers=workers, source=source))
+        return result, seconds, getattr(source, "calls", None)
+
+    serial, serial_s, requests = run(workers=1, refresh=True)
+    cold, cold_s, _ = run(refresh=True)
+    warm, warm_s, warm_calls = run()
+    _, expired_s, expired_calls = run(ttl=0)
+    stale, stale_s, _ = run(ttl=0, source=DownSource())
+    cache.unlink()
+    try:
+        proxmox_inventory.inventory(0, cache_path=cache, source=DownSource())
+        no_cache_error = False
+    except proxmox_inventory.InventoryError:
+        no_cache_error = True
+
+    # What ansible-inventory pays per run: a fresh interpreter answering from the cache
+    env = {"PROXMOX_INVENTORY_FIXTURE": str(FIXTURE), "HOME": str(cache.parent), "PATH": "/usr/bin:/bin"}
+    subprocess.run([sys.executable, str(ANSIBLE_DIR / "main.py"), "--list"], env=env, capture_output=True, check=True)
+    script, script_s = timed(lambda: subprocess.run([sys.executable, str(ANSIBLE_DIR / "main.py"), "--list"],
+                                                    env=env, capture_output=True, text=True, check=True))
+
+    print(f"{requests} API requests at {args.latency * 1000:.0f}ms each\n")
+    print(f"{'run':<22} {'time':>10} {'requests':>9}")
+    for label, seconds, calls in [("serial (1 worker)", serial_s, requests),
+                                  (f"cold ({proxmox_inventory.WORKERS} workers)", cold_s, requests),
+                                  ("warm (cached)", warm_s, warm_calls), ("expired TTL", expired_s, expired_calls),
+                                  ("api down (stale)", stale_s, "-"), ("main.py --list", script_s, "-")]:
+        print(f"{label:<22} {seconds * 1000:8.1f}ms {calls:>9}")
+
+    hostvars = cold["_meta"]["hostvars"]
+    dynamic = {name: {host: hostvars[host].get("ansible_host") for host in cold.get(name, {}).get("hosts", [])}
+               for name in STATIC_GROUPS}
+    checks = {
+        "concurrent fetch matches serial": cold == serial,
+        "concurrent fetch at least 4x faster": serial_s / cold_s >= 4,
+        "warm run makes no API requests": warm_calls == 0 and warm == cold,
+        "warm run answers in milliseconds": warm_s < 0.01,
+        "expired TTL fetches again": expired_calls == requests,
+        "stale cache served when API is down": stale == cold,
+        "no cache and API down is an error": no_cache_error,
+        "template is not a host": "ubuntu-cloud-template.infiquetra.com" not in hostvars,
+        "groups and IPs match hosts.yml": dynamic == static_groups(),
+        "script prints the cached inventory": '"agent_vms"' in script.stdout,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Dynamic inventory {'ready' if ok else 'regressed'} "
+          f"(cold {cold_s * 1000:.0f}ms vs {serial_s * 1000:.0f}ms serial, warm {warm_s * 1000:.2f}ms)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Replicate Generation Runner Benchmark
+
+Generates the bot banners against the local mock Replicate API, which fails
+some predictions and some downloads, and compares two approaches:
+
+  serial    — the old loop: create, poll until done, download with an
+              unpooled requests.get, then sleep one rate-limit interval
+  runner    — replicate_jobs.run_jobs: token-bucket pacing, concurrent
+              polling, streamed downloads and retries
+
+It then checks that the runner resumes correctly. A fresh run is cancelled
+partway through and started again; the second run must poll the predictions
+the first one created instead of paying for them again. A final run with
+nothing changed must make no requests.
+
+Usage:
+    uv run --with aiohttp --with pillow --with requests python3 scripts/bench_replicate_jobs.py --rate 60
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from PIL import Image
+
+import replicate_jobs
+from discord_banners import BANNER_PROMPTS
+from mock_replicate_api import MockReplicateAPI
+from replicate_jobs import FLUX_SCHNELL, flux_schnell_job, run_jobs, run_jobs_async
+
+
+def banner_jobs(out_dir: Path):
+    return [flux_schnell_job(f"banner:{name}", config["prompt"], "16:9", {str(out_dir / f"{name}.png"): (960, 540)})
+            for name, config in BANNER_PROMPTS.items()]
+
+
+def serial(jobs, api_url: str, interval: float) -> int:
+    """The pre-runner approach; returns how many banners it produced."""
+    headers = {"Authorization": "Bearer bench"}
+    done = 0
+    for job in jobs:
+        try:
+            prediction = requests.post(f"{api_url}/models/{FLUX_SCHNELL}/predictions",
+                                       json={"input": job.input}, headers=headers).json()
+            while prediction.get("status") not in ("succeeded", "failed", "canceled"):
+                time.sleep(0.5)
+                prediction = requests.get(prediction["urls"]["get"], headers=headers).json()
+            response = requests.get(prediction["output"][0])
+            response.raise_for_status()
+            img = Image.open(io.BytesIO(response.content)).resize((960, 540), Image.Resampling.LANCZOS)
+            img.save(next(iter(job.outputs)), format="PNG")
+            done += 1
+        except Exception:
+            pass
+        time.sleep(interval)
+    return done
+
+
+def timed(label: str, api: MockReplicateAPI, func) -> tuple:
+    before = api.state.stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    elapsed = time.perf_counter() - start
+    after = api.state.stats()
+    delta = {key: after[key] - before[key] for key in after}
+    print(f"{label:<26} {elapsed:6.2f}s  {delta['requests']:4d} requests  {delta['creates']:3d} creates  "
+          f"{delta['throttled']:3d} throttled  {delta['failed_predictions']:2d}+{delta['download_errors']} failures")
+    return elapsed, result, delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=60, help="mock prediction creates per minute")
+    parser.add_argument("--gen-seconds", type=float, default=1.0, help="mock generation time")
+    args = parser.parse_args()
+
+    # A tier matching the mock's limits, so the runner paces itself instead of eating 429s
+    replicate_jobs.TIERS["bench"] = (args.rate / 60, 1)
+    options = {"token": "bench", "tier": "bench", "poll_interval": 0.25, "backoff": 0.2}
+
+    print("Replicate Generation Runner Benchmark")
+    print("=" * 90)
+    print(f"{len(BANNER_PROMPTS)} banners, {args.rate:.0f} creates/min, {args.gen_seconds:.1f}s per prediction, "
+          "every 5th prediction and 7th download fails\n")
+
+    ok = True
+    with MockReplicateAPI(rate=args.rate, burst=1, gen_seconds=args.gen_seconds,
+                          fail_every=5, flaky_downloads=7) as api:
+        work = Path(tempfile.mkdtemp(prefix="replicate-bench-"))
+
+        jobs = banner_jobs(work / "serial")
+        (work / "serial").mkdir()
+        old, produced, _ = timed("serial, fixed sleeps", api, lambda: serial(jobs, api.url, 60 / args.rate))
+
+        jobs = banner_jobs(work / "runner")
+        new, results, _ = timed("runner", api, lambda: run_jobs(
+            jobs, queue_path=work / "runner.json", api_base=api.url, **options))
+        generated = sum(1 for result in results.values() if result == "generated")
+        ok &= generated == len(jobs) and all(job.outputs_exist() for job in jobs)
+
+        # Resume: cancel a fresh run once a few predictions are in flight, then finish it.
+        jobs = banner_jobs(work / "resume")
+
+        async def interrupted():
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(run_jobs_async(
+                    jobs, queue_path=work / "resume.json", api_base=api.url, **options), 4 * 60 / args.rate)
+
+        _, _, first = timed("runner, interrupted", api, lambda: asyncio.run(interrupted()))
+        _, results, second = timed("runner, resumed", api, lambda: run_jobs(
+            jobs, queue_path=work / "resume.json", api_base=api.url, **options))
+        paid = first["creates"] + second["creates"] - first["failed_predictions"] - second["failed_predictions"]
+        ok &= all(result != "failed" for result in results.values()) and paid == len(jobs)
+
+        _, _, quiet = timed("runner, unchanged", api, lambda: run_jobs(
+            jobs, queue_path=work / "resume.json", api_base=api.url, **options))
+        ok &= quiet["requests"] == 0
+
+    print(f"\nserial produced {produced}/{len(jobs)} banners, runner {generated}/{len(jobs)}; "
+          f"speedup {old / new:.1f}x")
+    print(f"resume paid for {paid} successful predictions for {len(jobs)} banners; "
+          f"requests when nothing changed: {quiet['requests']}")
+    print(f"\n{'✅' if ok else '❌'} Runner {'completed, resumed and stayed quiet' if ok else 'misbehaved'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+VM Placement Benchmark
+
+Compares the hand-pinned layout in roles/proxmox_vm/defaults/main.yml with
+the plan from vm_placement.py, on the node capacity recorded in
+ansible/fixtures/proxmox-api.json:
+
+  balance    — spread between the busiest and idlest node (larger of CPU/RAM share)
+  idle       — nodes carrying no VMs
+  stability  — re-planning from the plan itself migrates nothing
+  drain      — excluding r820 moves everything off it within the rules
+  infeasible — more agents than the cluster can hold is an error, not a bad plan
+  scale      — 12 nodes and 72 VMs solve in well under a second
+
+Usage:
+    python3 scripts/bench_vm_placement.py
+"""
+
+import argparse
+import copy
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import vm_placement
+from vm_placement import PlacementError, Plan, proxmox_inventory
+
+FIXTURE = vm_placement.ANSIBLE_DIR / "fixtures" / "proxmox-api.json"
+
+
+def hand_plan(nodes, vms) -> Plan:
+    plan = Plan(nodes, vms, vm_placement.anti_affinity(vms), vm_placement.MIGRATION_COST)
+    for vm in vms:
+        plan.assign(vm.name, vm.current)
+    return plan
+
+
+def shares(plan: Plan):
+    return [max(plan.utilisation(node)) for node in plan.nodes]
+
+
+def scaled(data: dict, vms, factor: int):
+    """The fixture's nodes and VMs repeated `factor` times."""
+    data = copy.deepcopy(data)
+    nodes = data["nodes"]
+    data["nodes"] = [{**node, "node": f"{node['node']}-{i}"} for i in range(factor) for node in nodes]
+    big = []
+    for i in range(factor * 4):
+        for vm in vms:
+            big.append(vm_placement.Vm(**{**vm.__dict__, "name": f"{vm.name}-x{i}", "vmid": vm.vmid + 1000 * (i + 1),
+                                          "current": None, "pinned": False}))
+    return data, big[:6 * len(data["nodes"])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixture", type=Path, default=FIXTURE, help="recorded Proxmox API responses")
+    args = parser.parse_args()
+
+    print("VM Placement Benchmark")
+    print("=" * 64)
+    data = proxmox_inventory.fetch(proxmox_inventory.RecordedSource(args.fixture))
+    nodes = vm_placement.load_nodes(data)
+    vms = vm_placement.load_vms(data)
+    hand = hand_plan(nodes, vms)
+    start = time.perf_counter()
+    plan = vm_placement.place(nodes, vms)
+    plan_s = time.perf_counter() - start
+
+    print("Hand-pinned (defaults/main.yml):")
+    vm_placement.print_plan(hand)
+    print("\nPlanned:")
+    vm_placement.print_plan(plan)
+
+    settled = [vm_placement.Vm(**{**vm.__dict__, "current": plan.where[vm.name]}) for vm in vms]
+    replanned = vm_placement.place(nodes, settled)
+    drained_nodes = vm_placement.load_nodes(data, exclude=("r820",))
+    drained = vm_placement.place(drained_nodes, vms)
+    crowd = vms + [vm_placement.Vm(name=f"extra{i}", vmid=300 + i, kind="agent", vcpus=4, memory_mb=16384,
+                                   disk_gb=250, storage="ceph-fast", current=None) for i in range(40)]
+    try:
+        vm_placement.place(nodes, crowd)
+        infeasible = False
+    except PlacementError as exc:
+        infeasible = True
+        print(f"\ninfeasible: {exc}")
+    big_data, big_vms = scaled(data, vms, 2)
+    big_nodes = vm_placement.load_nodes(big_data)
+    start = time.perf_counter()
+    big = vm_placement.place(big_nodes, big_vms)
+    big_s = time.perf_counter() - start
+
+    hand_shares, plan_shares = shares(hand), shares(plan)
+    print(f"\n{'layout':<12} {'busiest':>8} {'idlest':>7} {'stdev':>7} {'idle nodes':>11}")
+    for label, values, layout in [("hand", hand_shares, hand), ("planned", plan_shares, plan)]:
+        idle = sum(1 for node in layout.nodes if not layout.cpu[node])
+        print(f"{label:<12} {max(values):>8.0%} {min(values):>7.0%} {statistics.pstdev(values):>7.3f} {idle:>11}")
+    print(f"\nsolve {plan_s * 1000:.1f}ms; {len(big_nodes)} nodes × {len(big_vms)} VMs {big_s * 1000:.0f}ms")
+
+    checks = {
+        "plan respects capacity and anti-affinity": plan.valid() and drained.valid() and big.valid(),
+        "every VM placed": set(plan.where) == {vm.name for vm in vms},
+        "service VMs stay put": all(plan.where[vm.name] == vm.current for vm in vms if vm.pinned),
+        "no idle node": all(plan.cpu[node] for node in plan.nodes),
+        "busiest node less loaded than by hand": max(plan_shares) < max(hand_shares),
+        "load more even than by hand": statistics.pstdev(plan_shares) < statistics.pstdev(hand_shares),
+        "few migrations": len(vm_placement.migrations(plan)) <= 3,
+        "re-planning the plan migrates nothing": vm_placement.migrations(replanned) == [],
+        "drained node is empty": "r820" not in set(drained.where.values()),
+        "overcommit is refused": infeasible,
+        "72 VMs solve in under a second": big_s < 1.0,
+    }
+    print()
+    for label, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {label}")
+    ok = all(checks.values())
+    print(f"\n{'✅' if ok else '❌'} Placement {'balanced' if ok else 'regressed'} "
+          f"(busiest node {max(hand_shares):.0%} → {max(plan_shares):.0%}, "
+          f"{len(vm_placement.migrations(plan))} migrations)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,25 @@
 Discord AI Icon Generator using Replicate
 
 Generates professional mythological-themed icons for Discord bots using AI.
-Uses Replicate API with FLUX or Stable Diffusion models.
+Uses Replicate API with FLUX or Stable Diffusion models. The icons are nodes of
+the asset build graph (asset_build.py): each raw output is kept in the source
+cache and resized into the avatar and app icon, icons that are up to date are
+skipped, and generation goes through the shared job runner
+(replicate_jobs.py), which retries failures and resumes an interrupted run.
 
 Usage:
-    REPLICATE_API_TOKEN=your_token .env/bin/python scripts/discord_ai_icons.py
+    REPLICATE_API_TOKEN=your_token .env/bin/python scripts/discord_ai_icons.py [--tier paid] [--force]
 """
 
+import argparse
 import os
 import sys
 from pathlib import Path
-from typing import Dict
-import replicate
-import requests
-from PIL import Image
-from io import BytesIO
+
+from replicate_jobs import TIERS
+
+AVATAR_DIR = Path("assets/ai_icons")
+APP_DIR = Path("assets/ai_app_icons")
 
 # Icon configurations with AI prompts
 ICON_PROMPTS = {
@@ -84,119 +89,55 @@ SERVER_PROMPT = {
 }
 
 
-def generate_image(prompt: str, api_token: str, output_path: Path) -> bool:
-    """Generate an image using Replicate API."""
-    try:
-        # Use FLUX-schnell for fast, high-quality generation
-        # Alternative: black-forest-labs/flux-1.1-pro for even better quality
-        output = replicate.run(
-            "black-forest-labs/flux-schnell",
-            input={
-                "prompt": prompt,
-                "aspect_ratio": "1:1",  # Square for Discord icons
-                "output_format": "png",
-                "output_quality": 100,
-                "num_outputs": 1
-            }
-        )
-
-        # Download the generated image
-        if output and len(output) > 0:
-            image_url = output[0]
-            response = requests.get(image_url)
-            response.raise_for_status()
-
-            # Open and resize to 512x512 (Discord's preferred size)
-            img = Image.open(BytesIO(response.content))
-            img = img.resize((512, 512), Image.Resampling.LANCZOS)
-
-            # Save as PNG
-            img.save(output_path, format='PNG', quality=95)
-            print(f"✅ Generated: {output_path.name}")
-            return True
-        else:
-            print(f"❌ No output received for {output_path.name}")
-            return False
-
-    except Exception as e:
-        print(f"❌ Failed to generate {output_path.name}: {e}")
-        return False
-
-
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Generate AI bot and server icons via Replicate")
+    parser.add_argument("--tier", choices=TIERS, default="free", help="Replicate account rate-limit tier")
+    parser.add_argument("--force", action="store_true", help="regenerate icons that already exist")
+    args = parser.parse_args()
+
     print("🎨 AI-Powered Discord Icon Generator (Replicate)")
     print("=" * 60)
 
-    # Get API token from environment
-    api_token = os.environ.get("REPLICATE_API_TOKEN")
-    if not api_token:
+    if not os.environ.get("REPLICATE_API_TOKEN"):
         print("❌ Error: REPLICATE_API_TOKEN environment variable not set")
         print("\nUsage:")
         print("  export REPLICATE_API_TOKEN='your_token'")
         print("  .env/bin/python scripts/discord_ai_icons.py")
         sys.exit(1)
 
-    # Set token for replicate client
-    os.environ["REPLICATE_API_TOKEN"] = api_token
-
-    # Create output directories
-    avatar_dir = Path("assets/ai_icons")
-    avatar_dir.mkdir(parents=True, exist_ok=True)
-
-    app_dir = Path("assets/ai_app_icons")
-    app_dir.mkdir(parents=True, exist_ok=True)
-
-    # Generate bot avatars
+    # Generate bot avatars and the server icon
     print("\n🎨 Generating AI bot avatars...")
     print("   (Using FLUX model for high quality)\n")
 
-    success_count = 0
-    total_count = len(ICON_PROMPTS) + 1
+    # Imported here: asset_build reads ICON_PROMPTS from this module
+    from asset_build import build_assets
 
-    for bot_name, config in ICON_PROMPTS.items():
-        print(f"🖼️  Generating {config['name']}...")
-        print(f"   Prompt: {config['prompt'][:80]}...")
-
-        avatar_path = avatar_dir / f"{bot_name}.png"
-        if generate_image(config["prompt"], api_token, avatar_path):
-            success_count += 1
-
-            # Also save to app_icons directory (same image works for both)
-            app_path = app_dir / f"{bot_name}.png"
-            Image.open(avatar_path).save(app_path)
-
-        print()  # Blank line for readability
-
-    # Generate server icon
-    print(f"🖼️  Generating {SERVER_PROMPT['name']}...")
-    print(f"   Prompt: {SERVER_PROMPT['prompt'][:80]}...")
-
-    server_path = avatar_dir / "mount_olympus.png"
-    if generate_image(SERVER_PROMPT["prompt"], api_token, server_path):
-        success_count += 1
-        app_path = app_dir / "mount_olympus.png"
-        Image.open(server_path).save(app_path)
-
-    print()
+    results = build_assets(["ai_icon:*"], tier=args.tier, force=args.force)
+    icons = {name: result for name, result in results.items() if name.startswith("ai_icon:")}
+    generated = sum(1 for name, result in results.items() if name.startswith("source:") and result == "built")
+    failed = [name for name, result in icons.items() if result in ("failed", "blocked")]
+    total_count = len(icons)
 
     # Summary
+    print()
     print("=" * 60)
-    print(f"✅ Successfully generated: {success_count}/{total_count}")
-    print(f"📁 AI Avatars saved to: {avatar_dir}")
-    print(f"📁 AI App Icons saved to: {app_dir}")
+    print(f"✅ Successfully generated: {generated}/{total_count} ({total_count - generated - len(failed)} already up to date)")
+    print(f"📁 AI Avatars saved to: {AVATAR_DIR}")
+    print(f"📁 AI App Icons saved to: {APP_DIR}")
 
-    if success_count == total_count:
+    if not failed:
         print("\n🎉 All icons generated successfully!")
         print("\n📝 Next steps:")
         print("1. Review the generated icons")
         print("2. Upload bot avatars via API (run discord_avatars.py)")
         print("3. Upload app icons to Discord Developer Portal")
     else:
-        print(f"\n⚠️  {total_count - success_count} icons failed to generate")
+        print(f"\n⚠️  {len(failed)} icons failed to generate: {', '.join(failed)}")
+        print("   Re-run to retry them; finished icons are not regenerated.")
 
     # Cost estimate
-    cost_estimate = total_count * 0.003  # ~$0.003 per FLUX-schnell image
+    cost_estimate = generated * 0.003  # ~$0.003 per FLUX-schnell image
     print(f"\n💰 Estimated cost: ~${cost_estimate:.2f}")
 
 
@@ -3,22 +3,32 @@
 Discord Bot & Server Icon Generator
 
 Generates distinctive icons for Mount Olympus Discord server and all mythological bots,
-then uploads them via Discord API.
+then uploads the ones that changed since the last successful upload
+(upload_manifest.py) via Discord API. Icons go through the shared render pipeline
+(icon_pipeline.py), so unchanged icons come from its cache and the rest render
+in parallel. Each icon is painted once, supersampled (icon_geometry.py), and
+every Discord size comes from that one render: 512px to assets/icons/<name>.png,
+128/64/32/16px to assets/icons/<size>/<name>.png.
 
 Usage:
-    .env/bin/python scripts/discord_avatars.py
+    .env/bin/python scripts/discord_avatars.py [--verify] [--force]
 """
 
+import argparse
 import base64
-import json
-import subprocess
 import sys
-from io import BytesIO
+from functools import partial
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
-import requests
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import ImageDraw, ImageFont
+
+from discord_client import DiscordAPIError, DiscordClient
+from icon_geometry import DISCORD_SIZES, Pen, mirrored, polar, rays, supersample
+from icon_pipeline import render_icons
+from upload_manifest import UNVERIFIED, UploadManifest
+from vault_secrets import VaultError, discord_bot_tokens
 
 # Discord API Configuration
 DISCORD_API_BASE = "https://discord.com/api/v10"
@@ -29,6 +39,8 @@ ICON_SIZE = 512
 BACKGROUND_RADIUS = ICON_SIZE // 2
 SYMBOL_SIZE = int(ICON_SIZE * 0.4)  # Symbol occupies 40% of icon
 TEXT_Y_OFFSET = int(ICON_SIZE * 0.75)  # Text starts at 75% down
+LABEL_FONT = "/System/Library/Fonts/Helvetica.ttc"
+ICON_SIZES = DISCORD_SIZES  # Painted once at 4x, then downsampled to each
 
 # Bot icon configurations
 BOT_CONFIGS = {
@@ -85,61 +97,17 @@ SERVER_CONFIG = {
     "name": "Mount Olympus"
 }
 
+_CLIENTS: Dict[str, DiscordClient] = {}
 
-def get_vault_tokens() -> Dict[str, str]:
-    """Extract Discord bot tokens from Ansible Vault using ansible localhost."""
-    vault_pass = Path.home() / ".vault_pass.txt"
-    inventory_path = Path.home() / "workspace/infiquetra/home-lab/ansible/inventory/hosts.yml"
 
-    if not vault_pass.exists():
-        print(f"❌ Vault password file not found: {vault_pass}")
+def get_vault_tokens() -> Dict[str, str]:
+    """Extract Discord bot tokens from Ansible Vault (decrypted in-process, see vault_secrets.py)."""
+    try:
+        tokens = discord_bot_tokens(BOT_CONFIGS.keys())
+    except VaultError as e:
+        print(f"❌ {e}")
         sys.exit(1)
 
-    tokens = {}
-
-    # Use ansible to decrypt and print each token
-    for bot_name in BOT_CONFIGS.keys():
-        token_var = f"vault_discord_bot_token_{bot_name}"
-
-        try:
-            # Use ansible to decrypt the variable
-            result = subprocess.run(
-                [
-                    "ansible", "localhost",
-                    "-i", str(inventory_path),
-                    "-m", "debug",
-                    "-a", f"var={token_var}",
-                    "--vault-password-file", str(vault_pass)
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
-                cwd=Path.home() / "workspace/infiquetra/home-lab"
-            )
-
-            # Parse JSON output from ansible
-            # Format: localhost | SUCCESS => { "var_name": "value" }
-            # JSON may span multiple lines
-            if 'SUCCESS =>' in result.stdout:
-                json_start = result.stdout.find('{')
-                json_end = result.stdout.rfind('}')
-                if json_start != -1 and json_end != -1:
-                    json_str = result.stdout[json_start:json_end+1]
-                    try:
-                        data = json.loads(json_str)
-                        if token_var in data:
-                            # Strip whitespace and newlines
-                            token = data[token_var].strip()
-                            if token:
-                                tokens[bot_name] = token
-                    except json.JSONDecodeError as e:
-                        print(f"⚠️  Failed to parse JSON for {bot_name}: {e}")
-
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️  Failed to decrypt token for {bot_name}: {e}")
-            print(f"   STDERR: {e.stderr}")
-            continue
-
     if not tokens:
         print("❌ No tokens could be decrypted!")
         sys.exit(1)
@@ -153,290 +121,184 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
 
-def draw_lightning(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_lightning(pen: Pen):
     """Draw a lightning bolt symbol."""
-    points = [
-        (center_x, center_y - size//2),
-        (center_x + size//4, center_y - size//6),
-        (center_x + size//6, center_y),
-        (center_x + size//3, center_y + size//6),
-        (center_x, center_y + size//2),
-        (center_x - size//6, center_y + size//8),
-        (center_x - size//8, center_y - size//8),
-    ]
-    draw.polygon(points, fill="white")
-
-
-def draw_owl(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+    pen.polygon([(0, -1/2), (1/4, -1/6), (1/6, 0), (1/3, 1/6), (0, 1/2), (-1/6, 1/8), (-1/8, -1/8)], "white")
+
+
+def draw_owl(pen: Pen):
     """Draw an owl face symbol."""
     # Owl body (rounded rectangle)
-    draw.ellipse([center_x - size//3, center_y - size//3, center_x + size//3, center_y + size//2], fill="white")
+    pen.ellipse((-1/3, -1/3, 1/3, 1/2), "white")
 
     # Eyes
-    eye_radius = size // 8
-    eye_y = center_y - size // 6
-    draw.ellipse([center_x - size//4 - eye_radius, eye_y - eye_radius,
-                  center_x - size//4 + eye_radius, eye_y + eye_radius], fill="#2C3E50")
-    draw.ellipse([center_x + size//4 - eye_radius, eye_y - eye_radius,
-                  center_x + size//4 + eye_radius, eye_y + eye_radius], fill="#2C3E50")
+    pen.circles(mirrored((1/4, -1/6)), 1/8, "#2C3E50")
 
     # Beak
-    beak_points = [
-        (center_x, center_y),
-        (center_x - size//10, center_y + size//8),
-        (center_x + size//10, center_y + size//8)
-    ]
-    draw.polygon(beak_points, fill="#E67E22")
+    pen.polygon([(0, 0), (-1/10, 1/8), (1/10, 1/8)], "#E67E22")
 
 
-def draw_sun(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_sun(pen: Pen):
     """Draw a sun with rays symbol."""
     # Central circle
-    circle_radius = size // 4
-    draw.ellipse([center_x - circle_radius, center_y - circle_radius,
-                  center_x + circle_radius, center_y + circle_radius], fill="white")
+    circle_radius = 1/4
+    pen.circle((0, 0), circle_radius, "white")
 
     # Rays
-    for angle in range(0, 360, 45):
-        import math
-        rad = math.radians(angle)
-        start_x = center_x + int(circle_radius * 1.2 * math.cos(rad))
-        start_y = center_y + int(circle_radius * 1.2 * math.sin(rad))
-        end_x = center_x + int(size//2 * math.cos(rad))
-        end_y = center_y + int(size//2 * math.sin(rad))
-        draw.line([start_x, start_y, end_x, end_y], fill="white", width=size//20)
+    pen.polygons(rays(8, circle_radius * 1.2, 1/2, 1/20), "white")
 
 
-def draw_moon_arrow(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_moon_arrow(pen: Pen):
     """Draw a crescent moon with arrow symbol."""
     # Crescent moon (two overlapping circles)
-    draw.ellipse([center_x - size//3, center_y - size//3,
-                  center_x + size//6, center_y + size//3], fill="white")
-    draw.ellipse([center_x - size//4, center_y - size//3,
-                  center_x + size//4, center_y + size//3], fill=hex_to_rgb("#708090"))
+    pen.ellipse((-1/3, -1/3, 1/6, 1/3), "white")
+    pen.ellipse((-1/4, -1/3, 1/4, 1/3), hex_to_rgb("#708090"))
 
     # Arrow
-    arrow_y = center_y
-    draw.line([center_x + size//6, arrow_y, center_x + size//2, arrow_y], fill="white", width=size//25)
+    pen.segments((1/6, 0), (1/2, 0), 1/25, "white")
     # Arrowhead
-    draw.polygon([
-        (center_x + size//2, arrow_y),
-        (center_x + size//2 - size//10, arrow_y - size//15),
-        (center_x + size//2 - size//10, arrow_y + size//15)
-    ], fill="white")
+    pen.polygon([(1/2, 0), (1/2 - 1/10, -1/15), (1/2 - 1/10, 1/15)], "white")
 
 
-def draw_sandal(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_sandal(pen: Pen):
     """Draw a winged sandal symbol."""
     # Sandal base
-    draw.ellipse([center_x - size//3, center_y - size//6,
-                  center_x + size//3, center_y + size//4], fill="white")
+    pen.ellipse((-1/3, -1/6, 1/3, 1/4), "white")
 
     # Wings (simplified)
-    wing_points_left = [
-        (center_x - size//3, center_y),
-        (center_x - size//2, center_y - size//6),
-        (center_x - size//4, center_y + size//12)
-    ]
-    wing_points_right = [
-        (center_x + size//3, center_y),
-        (center_x + size//2, center_y - size//6),
-        (center_x + size//4, center_y + size//12)
-    ]
-    draw.polygon(wing_points_left, fill="white")
-    draw.polygon(wing_points_right, fill="white")
-
-
-def draw_sword_shield(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+    pen.polygons(mirrored([(1/3, 0), (1/2, -1/6), (1/4, 1/12)]), "white")
+
+
+def draw_sword_shield(pen: Pen):
     """Draw a sword and shield symbol."""
     # Shield (circle)
-    shield_radius = size // 3
-    draw.ellipse([center_x - shield_radius, center_y - shield_radius,
-                  center_x + shield_radius, center_y + shield_radius], fill="white", outline="#2C3E50", width=size//30)
-
-    # Sword (vertical line with crossguard and pommel)
-    sword_x = center_x
-    draw.line([sword_x, center_y - size//2, sword_x, center_y + size//2], fill="#34495E", width=size//20)
-    # Crossguard
-    draw.line([sword_x - size//6, center_y - size//4, sword_x + size//6, center_y - size//4],
-              fill="#34495E", width=size//15)
+    pen.circle((0, 0), 1/3, "white", outline="#2C3E50", width=1/30)
+
+    # Sword (vertical line with crossguard)
+    pen.segments([(0, -1/2), (-1/6, -1/4)], [(0, 1/2), (1/6, -1/4)], [1/20, 1/15], "#34495E")
     # Blade
-    draw.polygon([
-        (sword_x, center_y - size//2),
-        (sword_x - size//30, center_y - size//4),
-        (sword_x + size//30, center_y - size//4)
-    ], fill="#BDC3C7")
+    pen.polygon([(0, -1/2), (-1/30, -1/4), (1/30, -1/4)], "#BDC3C7")
 
 
-def draw_flame(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_flame(pen: Pen):
     """Draw a stylized flame symbol."""
-    flame_points = [
-        (center_x, center_y - size//2),
-        (center_x + size//4, center_y - size//4),
-        (center_x + size//6, center_y),
-        (center_x + size//4, center_y + size//4),
-        (center_x, center_y + size//2),
-        (center_x - size//4, center_y + size//4),
-        (center_x - size//6, center_y),
-        (center_x - size//4, center_y - size//4),
-    ]
-    draw.polygon(flame_points, fill="white")
+    pen.polygon([(0, -1/2), (1/4, -1/4), (1/6, 0), (1/4, 1/4),
+                 (0, 1/2), (-1/4, 1/4), (-1/6, 0), (-1/4, -1/4)], "white")
 
     # Inner flame detail
-    inner_points = [
-        (center_x, center_y - size//3),
-        (center_x + size//8, center_y),
-        (center_x, center_y + size//3),
-        (center_x - size//8, center_y),
-    ]
-    draw.polygon(inner_points, fill="#E67E22")
+    pen.polygon([(0, -1/3), (1/8, 0), (0, 1/3), (-1/8, 0)], "#E67E22")
 
 
-def draw_crossed_swords(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_crossed_swords(pen: Pen):
     """Draw two crossed swords symbol."""
-    import math
-
-    # First sword (diagonal \)
-    angle1 = math.radians(45)
-    x1_start = center_x - int(size//2 * math.cos(angle1))
-    y1_start = center_y - int(size//2 * math.sin(angle1))
-    x1_end = center_x + int(size//2 * math.cos(angle1))
-    y1_end = center_y + int(size//2 * math.sin(angle1))
-    draw.line([x1_start, y1_start, x1_end, y1_end], fill="white", width=size//15)
-
-    # Second sword (diagonal /)
-    angle2 = math.radians(-45)
-    x2_start = center_x - int(size//2 * math.cos(angle2))
-    y2_start = center_y - int(size//2 * math.sin(angle2))
-    x2_end = center_x + int(size//2 * math.cos(angle2))
-    y2_end = center_y + int(size//2 * math.sin(angle2))
-    draw.line([x2_start, y2_start, x2_end, y2_end], fill="white", width=size//15)
-
-
-def draw_cat(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+    # Both swords (diagonal \ and /) in one batch
+    tips = polar(1/2, [45, -45])
+    pen.segments(-tips, tips, 1/15, "white")
+
+
+def draw_cat(pen: Pen):
     """Draw a sitting cat silhouette."""
     # Body
-    draw.ellipse([center_x - size//4, center_y - size//6,
-                  center_x + size//4, center_y + size//2], fill="white")
+    pen.ellipse((-1/4, -1/6, 1/4, 1/2), "white")
 
     # Head
-    head_radius = size // 5
-    draw.ellipse([center_x - head_radius, center_y - size//2,
-                  center_x + head_radius, center_y - size//6], fill="white")
+    head_radius = 1/5
+    pen.ellipse((-head_radius, -1/2, head_radius, -1/6), "white")
 
     # Ears (triangles)
-    left_ear = [
-        (center_x - head_radius, center_y - size//2),
-        (center_x - head_radius - size//8, center_y - size//2 - size//6),
-        (center_x - head_radius//2, center_y - size//2)
-    ]
-    right_ear = [
-        (center_x + head_radius, center_y - size//2),
-        (center_x + head_radius + size//8, center_y - size//2 - size//6),
-        (center_x + head_radius//2, center_y - size//2)
-    ]
-    draw.polygon(left_ear, fill="white")
-    draw.polygon(right_ear, fill="white")
+    pen.polygons(mirrored([(head_radius, -1/2), (head_radius + 1/8, -1/2 - 1/6), (head_radius / 2, -1/2)]), "white")
 
     # Tail
-    draw.ellipse([center_x + size//6, center_y + size//4,
-                  center_x + size//2, center_y + size//2 + size//8], fill="white")
+    pen.ellipse((1/6, 1/4, 1/2, 1/2 + 1/8), "white")
 
 
-def draw_temple(draw: ImageDraw.ImageDraw, center_x: int, center_y: int, size: int):
+def draw_temple(pen: Pen):
     """Draw a mountain with temple symbol."""
     # Mountain (triangle)
-    mountain_points = [
-        (center_x, center_y - size//3),
-        (center_x - size//2, center_y + size//4),
-        (center_x + size//2, center_y + size//4)
-    ]
-    draw.polygon(mountain_points, fill="white", outline="white")
+    pen.polygon([(0, -1/3), (-1/2, 1/4), (1/2, 1/4)], "white")
 
     # Temple columns (simplified Parthenon)
-    temple_width = size // 3
-    temple_height = size // 4
-    temple_y = center_y + size//4
+    temple_width = 1/3
+    temple_height = 1/4
+    temple_y = 1/4
 
     # Roof triangle
-    roof_points = [
-        (center_x, temple_y - temple_height),
-        (center_x - temple_width//2, temple_y - temple_height//2),
-        (center_x + temple_width//2, temple_y - temple_height//2)
-    ]
-    draw.polygon(roof_points, fill="#34495E")
+    pen.polygon([(0, temple_y - temple_height),
+                 (-temple_width / 2, temple_y - temple_height / 2),
+                 (temple_width / 2, temple_y - temple_height / 2)], "#34495E")
 
     # Columns
-    col_width = size // 30
+    col_width = 1/30
     num_cols = 4
-    col_spacing = temple_width // (num_cols + 1)
-    for i in range(num_cols):
-        col_x = center_x - temple_width//2 + (i + 1) * col_spacing
-        draw.rectangle([col_x - col_width, temple_y - temple_height//2,
-                       col_x + col_width, temple_y], fill="#34495E")
+    col_x = -temple_width / 2 + np.arange(1, num_cols + 1) * temple_width / (num_cols + 1)
+    pen.rectangles(np.stack([col_x - col_width, np.full(num_cols, temple_y - temple_height / 2),
+                             col_x + col_width, np.full(num_cols, temple_y)], axis=1), "#34495E")
+
+
+SYMBOLS = {
+    "lightning": draw_lightning,
+    "owl": draw_owl,
+    "sun": draw_sun,
+    "moon_arrow": draw_moon_arrow,
+    "sandal": draw_sandal,
+    "sword_shield": draw_sword_shield,
+    "flame": draw_flame,
+    "crossed_swords": draw_crossed_swords,
+    "cat": draw_cat,
+    "temple": draw_temple
+}
 
 
-def generate_icon(config: dict, output_path: Path) -> BytesIO:
-    """Generate a single icon based on configuration."""
-    # Create image with transparent background
-    img = Image.new('RGBA', (ICON_SIZE, ICON_SIZE), (255, 255, 255, 0))
-    draw = ImageDraw.Draw(img)
+def paint_icon(draw: ImageDraw.ImageDraw, size: int, config: dict):
+    """Paint one icon onto a `size`-pixel canvas (any scale of ICON_SIZE)."""
+    scale = size / ICON_SIZE
 
     # Draw colored circular background
-    bg_color = hex_to_rgb(config["color"])
-    draw.ellipse([0, 0, ICON_SIZE, ICON_SIZE], fill=bg_color)
+    draw.ellipse([0, 0, size, size], fill=hex_to_rgb(config["color"]))
 
     # Draw symbol
-    center_x, center_y = ICON_SIZE // 2, int(ICON_SIZE * 0.4)
-    symbol_func = {
-        "lightning": draw_lightning,
-        "owl": draw_owl,
-        "sun": draw_sun,
-        "moon_arrow": draw_moon_arrow,
-        "sandal": draw_sandal,
-        "sword_shield": draw_sword_shield,
-        "flame": draw_flame,
-        "crossed_swords": draw_crossed_swords,
-        "cat": draw_cat,
-        "temple": draw_temple
-    }[config["symbol"]]
-
-    symbol_func(draw, center_x, center_y, SYMBOL_SIZE)
+    SYMBOLS[config["symbol"]](Pen(draw, (size / 2, size * 0.4), SYMBOL_SIZE * scale))
 
     # Add text label
     try:
         # Try to use a nice system font
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size=48)
-    except:
+        font = ImageFont.truetype(LABEL_FONT, size=round(48 * scale))
+    except OSError:
         # Fallback to default font
-        font = ImageFont.load_default()
+        font = ImageFont.load_default(size=round(48 * scale))
 
     text = config["name"]
     bbox = draw.textbbox((0, 0), text, font=font)
     text_width = bbox[2] - bbox[0]
-    text_x = (ICON_SIZE - text_width) // 2
+    text_x = (size - text_width) // 2
 
-    draw.text((text_x, TEXT_Y_OFFSET), text, fill="white", font=font)
+    draw.text((text_x, round(TEXT_Y_OFFSET * scale)), text, fill="white", font=font)
 
-    # Save to file
-    img.save(output_path, format='PNG')
-    print(f"✅ Generated: {output_path.name}")
 
-    # Also return as BytesIO for upload
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    return buffer
+def render_icon(config: dict) -> Dict[int, bytes]:
+    """Render one icon at every size in ICON_SIZES from a single supersampled paint; returns size → PNG bytes."""
+    return supersample(partial(paint_icon, config=config), ICON_SIZE, ICON_SIZES)
 
 
-def upload_bot_avatar(bot_name: str, token: str, image_data: bytes) -> bool:
-    """Upload avatar for a specific bot."""
-    url = f"{DISCORD_API_BASE}/users/@me"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
+def generate_icons(output_dir: Path) -> Dict[str, bytes]:
+    """Render every bot icon plus the server icon ("mount_olympus"); returns name → 512px PNG bytes.
+
+    The smaller Discord sizes are written alongside, to output_dir/<size>/<name>.png.
+    """
+    configs = {**BOT_CONFIGS, "mount_olympus": SERVER_CONFIG}
+    font = LABEL_FONT if Path(LABEL_FONT).exists() else "default"
+    return render_icons(render_icon, configs, output_dir, sizes=ICON_SIZES, size=ICON_SIZE, font=font)
+
+
+def discord_client(token: str) -> DiscordClient:
+    """One client (and rate-limit state) per bot token."""
+    if token not in _CLIENTS:
+        _CLIENTS[token] = DiscordClient(token, DISCORD_API_BASE)
+    return _CLIENTS[token]
+
 
+def upload_bot_avatar(bot_name: str, token: str, image_data: bytes) -> Optional[str]:
+    """Upload avatar for a specific bot; returns Discord's avatar hash, None on failure."""
     # Encode image as base64
     base64_image = base64.b64encode(image_data).decode('utf-8')
     data_uri = f"data:image/png;base64,{base64_image}"
@@ -444,25 +306,20 @@ def upload_bot_avatar(bot_name: str, token: str, image_data: bytes) -> bool:
     payload = {"avatar": data_uri}
 
     try:
-        response = requests.patch(url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = discord_client(token).request("PATCH", "/users/@me", payload) or {}
         print(f"✅ Uploaded avatar for {bot_name}")
-        return True
-    except requests.exceptions.RequestException as e:
+        return data.get("avatar") or ""
+    except DiscordAPIError as e:
+        print(f"❌ Failed to upload avatar for {bot_name}: HTTP {e.status}")
+        print(f"   Response: {e.body}")
+        return None
+    except OSError as e:
         print(f"❌ Failed to upload avatar for {bot_name}: {e}")
-        if hasattr(e.response, 'text'):
-            print(f"   Response: {e.response.text}")
-        return False
+        return None
 
 
-def upload_server_icon(token: str, image_data: bytes) -> bool:
-    """Upload server icon (requires admin token - using Freya's)."""
-    url = f"{DISCORD_API_BASE}/guilds/{GUILD_ID}"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
-
+def upload_server_icon(token: str, image_data: bytes) -> Optional[str]:
+    """Upload server icon (requires admin token - using Freya's); returns the icon hash, None on failure."""
     # Encode image as base64
     base64_image = base64.b64encode(image_data).decode('utf-8')
     data_uri = f"data:image/png;base64,{base64_image}"
@@ -470,19 +327,26 @@ def upload_server_icon(token: str, image_data: bytes) -> bool:
     payload = {"icon": data_uri}
 
     try:
-        response = requests.patch(url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = discord_client(token).request("PATCH", f"/guilds/{GUILD_ID}", payload) or {}
         print(f"✅ Uploaded server icon")
-        return True
-    except requests.exceptions.RequestException as e:
+        return data.get("icon") or ""
+    except DiscordAPIError as e:
+        print(f"❌ Failed to upload server icon: HTTP {e.status}")
+        print(f"   Response: {e.body}")
+        return None
+    except OSError as e:
         print(f"❌ Failed to upload server icon: {e}")
-        if hasattr(e.response, 'text'):
-            print(f"   Response: {e.response.text}")
-        return False
+        return None
 
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Generate and upload bot avatars and the server icon")
+    parser.add_argument("--verify", action="store_true",
+                        help="compare against each bot's current avatar (one GET /users/@me per bot)")
+    parser.add_argument("--force", action="store_true", help="upload everything, ignoring the manifest")
+    args = parser.parse_args()
+
     print("🎨 Discord Icon Generator")
     print("=" * 50)
 
@@ -495,50 +359,52 @@ def main():
     tokens = get_vault_tokens()
     print(f"   Found {len(tokens)} bot tokens")
 
-    # Generate bot icons
-    print("\n🎨 Generating bot icons...")
-    bot_images = {}
-    for bot_name, config in BOT_CONFIGS.items():
-        output_path = output_dir / f"{bot_name}.png"
-        image_buffer = generate_icon(config, output_path)
-        bot_images[bot_name] = image_buffer.read()
-
-    # Generate server icon
-    print("\n🎨 Generating server icon...")
-    server_output_path = output_dir / "mount_olympus.png"
-    server_image_buffer = generate_icon(SERVER_CONFIG, server_output_path)
-    server_image_data = server_image_buffer.read()
+    # Generate bot and server icons
+    print("\n🎨 Generating bot and server icons...")
+    images = generate_icons(output_dir)
+    server_image_data = images.pop("mount_olympus")
+    bot_images = images
 
     # Upload bot avatars
     print("\n📤 Uploading bot avatars...")
-    upload_success = 0
-    upload_failed = 0
+    manifest = UploadManifest()
+    results = {"uploaded": 0, "skipped": 0, "failed": 0}
 
     for bot_name, image_data in bot_images.items():
         if bot_name in tokens:
-            if upload_bot_avatar(bot_name, tokens[bot_name], image_data):
-                upload_success += 1
-            else:
-                upload_failed += 1
+            token = tokens[bot_name]
+            remote_hash = UNVERIFIED
+            if args.verify:
+                try:
+                    remote_hash = (discord_client(token).request("GET", "/users/@me") or {}).get("avatar")
+                except (DiscordAPIError, OSError) as e:
+                    print(f"⚠️  Could not read current avatar for {bot_name}: {e}")
+            result = manifest.sync_asset(
+                f"avatar:{bot_name}", image_data,
+                lambda data: upload_bot_avatar(bot_name, token, data), remote_hash, args.force,
+            )
+            results[result] += 1
         else:
             print(f"⚠️  Skipping {bot_name} - no token available")
-            upload_failed += 1
+            results["failed"] += 1
 
     # Upload server icon (using Freya's token as admin)
     print("\n📤 Uploading server icon...")
     if "freya" in tokens:
-        if upload_server_icon(tokens["freya"], server_image_data):
-            upload_success += 1
-        else:
-            upload_failed += 1
+        result = manifest.sync_asset(
+            f"guild_icon:{GUILD_ID}", server_image_data,
+            lambda data: upload_server_icon(tokens["freya"], data), force=args.force,
+        )
+        results[result] += 1
     else:
         print("⚠️  Cannot upload server icon - Freya's token not available")
-        upload_failed += 1
+        results["failed"] += 1
 
     # Summary
     print("\n" + "=" * 50)
-    print(f"✅ Successfully uploaded: {upload_success}")
-    print(f"❌ Failed uploads: {upload_failed}")
+    print(f"✅ Successfully uploaded: {results['uploaded']}")
+    print(f"⏭️  Unchanged, skipped: {results['skipped']}")
+    print(f"❌ Failed uploads: {results['failed']}")
     print(f"📁 Icons saved to: {output_dir}")
     print("\n🎉 Done! Check Discord to see the new icons.")
 
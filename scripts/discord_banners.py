@@ -3,22 +3,26 @@
 Discord Bot Banner Generator using Replicate
 
 Generates 960x540 landscape banners for each Discord bot, depicting their
-mythological domain as an immersive environment.
+mythological domain as an immersive environment. The banners are nodes of the
+asset build graph (asset_build.py): each raw FLUX output is kept in the source
+cache and resized from there, and only banners whose prompt changed, or whose
+file is missing, are built. Generation goes through the shared job runner
+(replicate_jobs.py), which paces creates to the account tier, retries
+failures and resumes an interrupted run.
 
 Usage:
-    REPLICATE_API_TOKEN=your_token uv run --with replicate --with pillow --with requests \
-      python3 scripts/discord_banners.py
+    REPLICATE_API_TOKEN=your_token uv run --with aiohttp --with pillow --with numpy \
+      python3 scripts/discord_banners.py [--tier paid] [--force]
 """
 
+import argparse
 import os
 import sys
-import time
 from pathlib import Path
 
-import replicate
-import requests
-from PIL import Image
-from io import BytesIO
+from replicate_jobs import TIERS
+
+OUT_DIR = Path("assets/banners")
 
 BANNER_PROMPTS = {
     "zeus": {
@@ -68,40 +72,12 @@ BANNER_PROMPTS = {
 }
 
 
-def generate_banner(name: str, prompt: str, output_path: Path) -> bool:
-    """Generate a 960x540 landscape banner via Replicate FLUX-schnell."""
-    try:
-        output = replicate.run(
-            "black-forest-labs/flux-schnell",
-            input={
-                "prompt": prompt,
-                "aspect_ratio": "16:9",
-                "output_format": "png",
-                "output_quality": 100,
-                "num_outputs": 1,
-            },
-        )
-
-        if not output:
-            print(f"  {name}: no output received")
-            return False
-
-        url = str(output[0])
-        resp = requests.get(url)
-        resp.raise_for_status()
-
-        img = Image.open(BytesIO(resp.content))
-        img = img.resize((960, 540), Image.Resampling.LANCZOS)
-        img.save(output_path, format="PNG")
-        print(f"  {name}: saved ({output_path.stat().st_size // 1024}KB)")
-        return True
-
-    except Exception as e:
-        print(f"  {name}: FAILED — {e}")
-        return False
-
-
 def main():
+    parser = argparse.ArgumentParser(description="Generate Discord bot banners via Replicate")
+    parser.add_argument("--tier", choices=TIERS, default="free", help="Replicate account rate-limit tier")
+    parser.add_argument("--force", action="store_true", help="regenerate banners that already exist")
+    args = parser.parse_args()
+
     print("Discord Banner Generator (Replicate FLUX-schnell)")
     print("=" * 55)
 
@@ -109,27 +85,19 @@ def main():
         print("Error: REPLICATE_API_TOKEN not set")
         sys.exit(1)
 
-    out_dir = Path("assets/banners")
-    out_dir.mkdir(parents=True, exist_ok=True)
+    # Imported here: asset_build reads BANNER_PROMPTS from this module
+    from asset_build import build_assets
 
-    ok = 0
-    for i, (bot_name, config) in enumerate(BANNER_PROMPTS.items()):
-        out_path = out_dir / f"{bot_name}.png"
-        if out_path.exists():
-            print(f"\n  {config['name']}: already exists, skipping")
-            ok += 1
-            continue
-        print(f"\nGenerating {config['name']} ({i+1}/{len(BANNER_PROMPTS)})...")
-        if generate_banner(config["name"], config["prompt"], out_path):
-            ok += 1
-        # Rate limit: free-tier Replicate allows 6 req/min burst=1
-        if i < len(BANNER_PROMPTS) - 1:
-            time.sleep(12)
+    results = build_assets(["banner:*"], tier=args.tier, force=args.force)
+    generated = sum(1 for name, result in results.items() if name.startswith("source:") and result == "built")
+    ok = sum(1 for name, result in results.items() if name.startswith("banner:") and result not in ("failed", "blocked"))
 
     print(f"\n{'=' * 55}")
-    print(f"Done: {ok}/{len(BANNER_PROMPTS)} banners generated")
-    print(f"Saved to: {out_dir}/")
-    print(f"Estimated cost: ~${len(BANNER_PROMPTS) * 0.003:.2f}")
+    print(f"Done: {ok}/{len(BANNER_PROMPTS)} banners up to date")
+    print(f"Saved to: {OUT_DIR}/")
+    print(f"Estimated cost: ~${generated * 0.003:.2f}")
+    if ok < len(BANNER_PROMPTS):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Discord REST Client with Bucket-Aware Rate Limiting
+
+Shared by the Discord setup/upload scripts and the olympus-bridge. Requests are
+scheduled against the rate-limit state Discord reports in its response headers
+instead of reacting to 429s after the fact:
+
+    X-RateLimit-Bucket       opaque bucket hash; several routes may share one
+    X-RateLimit-Remaining    requests left in the current window
+    X-RateLimit-Reset-After  seconds until the window resets
+    X-RateLimit-Reset        epoch at which the window resets
+
+Buckets are keyed by bucket hash plus the route's major parameters (channel,
+guild or webhook id), as Discord documents. Until a route's bucket is known its
+requests are queued one at a time; after that they proceed concurrently while
+the bucket has room. A token bucket enforces the per-token global limit, and a
+global 429 pauses every route.
+
+Usage:
+    from discord_client import DiscordClient
+
+    client = DiscordClient(token)
+    roles = client.request("GET", f"/guilds/{guild_id}/roles")
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Set
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+API_BASE = "https://discord.com/api/v10"
+USER_AGENT = "DiscordBot (https://github.com/infiquetra/home-lab, 1.0)"
+
+# Discord's documented global limit is 50 requests/second per bot token.
+GLOBAL_RATE = 50.0
+
+# Grace period before trusting our own clock that a bucket window has reset.
+# Lets responses from the new window (which carry authoritative counts) land
+# first, so requests sent just before the reset aren't double-counted.
+RESET_MARGIN = 0.05
+
+# Path segments whose following id is a "major parameter" — it scopes the bucket.
+MAJOR_PARAMS = ("channels", "guilds", "webhooks")
+
+log = logging.getLogger(__name__)
+
+
+class DiscordAPIError(Exception):
+    """Non-2xx response from Discord (after rate-limit retries)."""
+
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.body = body
+        super().__init__(f"HTTP {status}: {body}")
+
+
+def route_key(method: str, endpoint: str) -> str:
+    """Collapse an endpoint to its rate-limit route.
+
+    Major parameter ids (and webhook tokens) are kept; every other snowflake is
+    replaced with a placeholder, so `/guilds/1/members/2` and
+    `/guilds/1/members/3` share a route but `/guilds/1/...` and `/guilds/9/...`
+    do not.
+    """
+    path = urlsplit(endpoint).path
+    path = re.sub(r"^/api(/v\d+)?", "", path)
+    parts = path.strip("/").split("/")
+    route = []
+    for i, part in enumerate(parts):
+        previous = parts[i - 1] if i else ""
+        is_major = previous in MAJOR_PARAMS or (i >= 2 and parts[i - 2] == "webhooks")
+        if part.isdigit() and not is_major:
+            part = "{id}"
+        route.append(part)
+    return f"{method.upper()} /{'/'.join(route)}"
+
+
+def _major_params(route: str) -> str:
+    parts = route.split(" ", 1)[1].strip("/").split("/")
+    major = [parts[i + 1] for i, part in enumerate(parts[:-1]) if part in MAJOR_PARAMS]
+    return "/".join(major)
+
+
+@dataclass
+class Bucket:
+    limit: int = 1
+    remaining: int = 1
+    reset_at: float = 0.0
+    window: float = 0.0
+    # Longest Reset-After seen — our estimate of the window length.
+    period: float = 0.0
+    # True when we assumed the window reset on our own clock and have not yet
+    # seen a response from the new window.
+    local: bool = False
+
+
+class RateLimiter:
+    """Thread-safe rate-limit bookkeeping, independent of the HTTP library.
+
+    Callers ask `reserve(route)` for permission before each request and feed
+    the response back through `update(...)`. `reserve` never blocks: it either
+    takes a slot and returns 0.0, or returns how long to wait before asking
+    again, so the same limiter drives both time.sleep and asyncio.sleep.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[str, Bucket] = {}
+        self._seen_routes: Set[str] = set()
+        self._global_rate = global_rate
+        self._global_tokens = global_rate
+        self._global_stamp = clock()
+        self._global_until = 0.0
+
+    def _bucket_key(self, route: str) -> str:
+        bucket_hash = self._route_buckets.get(route)
+        if bucket_hash is None:
+            return route
+        return f"{bucket_hash}:{_major_params(route)}"
+
+    def known(self, route: str) -> bool:
+        """True once a response on `route` has told us its rate-limit state."""
+        with self._lock:
+            return route in self._seen_routes
+
+    def reserve(self, route: str) -> float:
+        """Take a request slot for `route`, or return the seconds to wait first."""
+        with self._lock:
+            now = self._clock()
+            delay = max(self._global_until - now, 0.0)
+
+            self._global_tokens = min(
+                self._global_rate,
+                self._global_tokens + (now - self._global_stamp) * self._global_rate,
+            )
+            self._global_stamp = now
+            if self._global_tokens < 1:
+                delay = max(delay, (1 - self._global_tokens) / self._global_rate)
+
+            bucket = self._buckets.get(self._bucket_key(route))
+            if bucket is not None:
+                if now >= bucket.reset_at + RESET_MARGIN:
+                    bucket.remaining = bucket.limit
+                    bucket.reset_at = now + bucket.period
+                    bucket.local = True
+                elif bucket.remaining <= 0:
+                    delay = max(delay, bucket.reset_at + RESET_MARGIN - now)
+
+            if delay > 0:
+                return delay
+            self._global_tokens -= 1
+            if bucket is not None:
+                bucket.remaining -= 1
+            return 0.0
+
+    def update(self, route: str, status: int, headers: Mapping[str, str], body: Any = None) -> float:
+        """Record rate-limit headers from a response; returns retry_after for 429s (else 0)."""
+        with self._lock:
+            now = self._clock()
+            self._seen_routes.add(route)
+            bucket_hash = headers.get("X-RateLimit-Bucket")
+            if bucket_hash:
+                self._route_buckets[route] = bucket_hash
+            key = self._bucket_key(route)
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is not None:
+                reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
+                reset_at = now + reset_after
+                limit = int(headers.get("X-RateLimit-Limit", 1))
+                # X-RateLimit-Reset is an absolute epoch, identical for every
+                # response in one window; fall back to our own clock without it.
+                reset = headers.get("X-RateLimit-Reset")
+                window = float(reset) if reset else reset_at
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = Bucket(limit, int(remaining), reset_at, window)
+                elif window > bucket.window + (0.01 if reset else 0.05):
+                    # A new window. If we already opened it locally, requests we
+                    # sent since are still in flight and not in this count.
+                    fresh = int(remaining)
+                    bucket.remaining = min(bucket.remaining, fresh) if bucket.local else fresh
+                    bucket.limit, bucket.reset_at, bucket.window = limit, reset_at, window
+                    bucket.local = False
+                else:
+                    # Same window: responses can arrive out of order, so keep
+                    # the lower count (it already accounts for in-flight requests).
+                    bucket.limit = limit
+                    bucket.remaining = min(bucket.remaining, int(remaining))
+                    bucket.reset_at = max(bucket.reset_at, reset_at)
+                bucket.period = max(bucket.period, reset_after)
+
+            if status != 429:
+                return 0.0
+
+            body = body if isinstance(body, dict) else {}
+            retry_after = float(body.get("retry_after") or headers.get("Retry-After") or 1)
+            if body.get("global") or headers.get("X-RateLimit-Global"):
+                self._global_until = max(self._global_until, now + retry_after)
+            else:
+                bucket = self._buckets.setdefault(key, Bucket())
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            return retry_after
+
+
+def _decode(data: bytes) -> Any:
+    if not data:
+        return None
+    try:
+        return json.loads(data.decode("utf-8"))
+    except ValueError:
+        return data.decode("utf-8", errors="replace")
+
+
+class DiscordClient:
+    """Blocking Discord client on urllib (no third-party dependencies)."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        api_base: str = API_BASE,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 5,
+        timeout: float = 10,
+    ):
+        self.api_base = api_base.rstrip("/")
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT}
+        if token:
+            self.headers["Authorization"] = f"Bot {token}"
+        self._route_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _url(self, endpoint: str) -> str:
+        return endpoint if endpoint.startswith("http") else f"{self.api_base}{endpoint}"
+
+    def _route_lock(self, route: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._route_locks.setdefault(route, threading.Lock())
+
+    def request(self, method: str, endpoint: str, data: Optional[Any] = None) -> Any:
+        """Send a request, waiting on rate limits; raises DiscordAPIError on failure."""
+        route = route_key(method, endpoint)
+        if self.limiter.known(route):
+            return self._send(method, endpoint, route, data)
+        # Bucket not discovered yet: queue requests on this route one at a time.
+        with self._route_lock(route):
+            return self._send(method, endpoint, route, data)
+
+    def _send(self, method: str, endpoint: str, route: str, data: Optional[Any]) -> Any:
+        headers = dict(self.headers)
+        payload = None
+        if data is not None:
+            payload = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        for _ in range(self.max_retries + 1):
+            while (delay := self.limiter.reserve(route)) > 0:
+                time.sleep(delay)
+            req = Request(self._url(endpoint), data=payload, headers=headers, method=method)
+            try:
+                with urlopen(req, timeout=self.timeout) as response:
+                    self.limiter.update(route, response.status, response.headers)
+                    return _decode(response.read())
+            except HTTPError as e:
+                body = _decode(e.read())
+                retry_after = self.limiter.update(route, e.code, e.headers, body)
+                if e.code != 429:
+                    raise DiscordAPIError(e.code, body) from None
+                log.warning("Rate limited on %s — retrying in %.2fs", route, retry_after)
+        raise DiscordAPIError(429, f"still rate limited after {self.max_retries} retries")
+
+
+class AsyncDiscordClient:
+    """asyncio Discord client over a caller-owned aiohttp.ClientSession.
+
+    One session per bot token keeps connections alive across requests; the
+    limiter can be shared when several clients use the same token.
+    """
+
+    def __init__(
+        self,
+        session,
+        token: Optional[str] = None,
+        api_base: str = API_BASE,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 5,
+    ):
+        self.session = session
+        self.api_base = api_base.rstrip("/")
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.headers = {"User-Agent": USER_AGENT}
+        if token:
+            self.headers["Authorization"] = f"Bot {token}"
+        self._route_locks: Dict[str, asyncio.Lock] = {}
+
+    def _url(self, endpoint: str) -> str:
+        return endpoint if endpoint.startswith("http") else f"{self.api_base}{endpoint}"
+
+    async def request(self, method: str, endpoint: str, data: Optional[Any] = None) -> Any:
+        """Send a request, waiting on rate limits; raises DiscordAPIError on failure."""
+        route = route_key(method, endpoint)
+        if self.limiter.known(route):
+            return await self._send(method, endpoint, route, data)
+        lock = self._route_locks.setdefault(route, asyncio.Lock())
+        async with lock:
+            return await self._send(method, endpoint, route, data)
+
+    async def _send(self, method: str, endpoint: str, route: str, data: Optional[Any]) -> Any:
+        for _ in range(self.max_retries + 1):
+            while (delay := self.limiter.reserve(route)) > 0:
+                await asyncio.sleep(delay)
+            async with self.session.request(method, self._url(endpoint), json=data, headers=self.headers) as resp:
+                body = _decode(await resp.read())
+                retry_after = self.limiter.update(route, resp.status, resp.headers, body)
+                if resp.status < 400:
+                    return body
+                if resp.status != 429:
+                    raise DiscordAPIError(resp.status, body)
+            log.warning("Rate limited on %s — retrying in %.2fs", route, retry_after)
+        raise DiscordAPIError(429, f"still rate limited after {self.max_retries} retries")
@@ -2,146 +2,64 @@
 """
 Discord Phase 3: Bot Role Assignment and Nicknames
 
-Assigns roles and sets nicknames for all OpenClaw agent bots.
+Assigns roles and sets nicknames for all OpenClaw agent bots by running the
+guild reconciler (guild_reconciler.py) on just the `members` part of
+discord_setup.desired_state(). Idempotent: bots are looked up in the paginated
+member index (member_index.py, reused for up to MEMBER_TTL seconds between
+runs), a role is PUT only when the bot lacks it and a nickname PATCHed only
+when it differs, so a re-run makes no API calls.
+
+Usage:
+    export DISCORD_BOT_TOKEN="your-bot-token"
+    uv run --with aiohttp python scripts/discord_phase3.py [--refresh]
 """
 
+import argparse
+import asyncio
 import os
 import sys
-import json
-import time
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from typing import Dict
 
-# Configuration
-GUILD_ID = "832250938571227217"
-API_BASE = "https://discord.com/api/v10"
+import aiohttp
 
-# Bot Application IDs from agent_info.txt
-BOTS = {
-    "Zeus": {"app_id": "1470606502179110912", "emoji": "⚡", "projects": ["Project: CAMPPS", "Project: Mimir", "Project: JCE"]},
-    "Athena": {"app_id": "1470607465136787621", "emoji": "🦉", "projects": []},
-    "Apollo": {"app_id": "1470608246669578423", "emoji": "☀️", "projects": []},
-    "Artemis": {"app_id": "1470608455818543135", "emoji": "🎯", "projects": []},
-    "Hermes": {"app_id": "1470608660714754102", "emoji": "🏃", "projects": []},
-    "Perseus": {"app_id": "1470608832672829635", "emoji": "🗡️", "projects": []},
-    "Prometheus": {"app_id": "1470609038008913930", "emoji": "🔥", "projects": []},
-    "Ares": {"app_id": "1470609201771315220", "emoji": "⚔️", "projects": []},
-}
+from discord_client import AsyncDiscordClient
+from discord_setup import API_BASE, GUILD_ID, desired_state, load_config
+from guild_reconciler import GuildReconciler, print_plan
+from member_index import MEMBER_TTL
 
 
-class DiscordPhase3:
-    """Phase 3: Assign roles and nicknames"""
+async def run(token: str, member_ttl: float = MEMBER_TTL, api_base: str = API_BASE) -> Dict[str, int]:
+    """Assign roles and nicknames to all bots; returns {"applied": n, "failed": n}."""
+    print("\n=== Phase 3: Bot Role Assignment ===\n")
+    async with aiohttp.ClientSession() as session:
+        client = AsyncDiscordClient(session, token, api_base)
+        reconciler = GuildReconciler(client, GUILD_ID, {"members": desired_state()["members"]}, load_config(),
+                                     member_ttl)
+        snapshot = await reconciler.snapshot()
+        print(f"Members indexed: {len(snapshot['members'])}\n")
 
-    def __init__(self, token: str, guild_id: str):
-        self.token = token
-        self.guild_id = guild_id
-        self.headers = {
-            "Authorization": f"Bot {token}",
-            "Content-Type": "application/json",
-            "User-Agent": "DiscordBot (https://github.com/infiquetra/home-lab, 1.0)",
-        }
+        changes = reconciler.plan(snapshot)
+        print_plan(changes)
+        results = await reconciler.apply(changes)
 
-    def _request(self, method: str, endpoint: str, data=None):
-        """Make API request"""
-        url = f"{API_BASE}{endpoint}"
-        try:
-            request_data = None
-            if data is not None:
-                request_data = json.dumps(data).encode('utf-8')
-
-            req = Request(url, data=request_data, headers=self.headers, method=method)
-
-            with urlopen(req, timeout=10) as response:
-                response_data = response.read()
-                if response_data:
-                    return json.loads(response_data.decode('utf-8'))
-                return None
-
-        except HTTPError as e:
-            if e.code == 429:
-                error_data = json.loads(e.read().decode('utf-8'))
-                retry_after = error_data.get("retry_after", 1)
-                print(f"Rate limited. Waiting {retry_after}s...")
-                time.sleep(retry_after)
-                return self._request(method, endpoint, data)
-
-            print(f"HTTP Error {e.code}: {e.read().decode('utf-8')}")
-            return None
-
-        except (URLError, Exception) as e:
-            print(f"Request failed: {e}")
-            return None
-
-    def get_guild_members(self):
-        """Get all guild members"""
-        members = self._request("GET", f"/guilds/{self.guild_id}/members?limit=1000")
-        return {m["user"]["id"]: m for m in members} if members else {}
-
-    def load_config(self):
-        """Load discord_config.json"""
-        with open("discord_config.json", "r") as f:
-            return json.load(f)
-
-    def assign_roles(self):
-        """Assign roles and nicknames to all bots"""
-        print("\n=== Phase 3: Bot Role Assignment ===\n")
-
-        # Load config
-        config = self.load_config()
-        olympus_role_id = config["roles"]["Olympus"]
-
-        # Get all members
-        members = self.get_guild_members()
-
-        # Process each bot
-        for bot_name, bot_info in BOTS.items():
-            # Find member by username (case-insensitive)
-            member_id = None
-            for member in members.values():
-                if member["user"].get("bot") and member["user"]["username"].lower() == bot_name.lower():
-                    member_id = member["user"]["id"]
-                    break
-
-            if not member_id:
-                print(f"⚠️  {bot_name}: Bot not found in server")
-                continue
-
-            print(f"=== {bot_name} (ID: {member_id}) ===")
-
-            # Assign Olympus role
-            result = self._request("PUT", f"/guilds/{self.guild_id}/members/{member_id}/roles/{olympus_role_id}")
-            if result is None:
-                print(f"  ✓ Assigned @Olympus role")
-
-            # Assign project roles for Zeus
-            if bot_info["projects"]:
-                for project in bot_info["projects"]:
-                    project_role_id = config["roles"].get(project)
-                    if project_role_id:
-                        result = self._request("PUT", f"/guilds/{self.guild_id}/members/{member_id}/roles/{project_role_id}")
-                        if result is None:
-                            print(f"  ✓ Assigned @{project} role")
-
-            # Set nickname
-            nickname = f"{bot_info['emoji']} {bot_name}"
-            result = self._request("PATCH", f"/guilds/{self.guild_id}/members/{member_id}", {"nick": nickname})
-            if result or result is None:
-                print(f"  ✓ Set nickname: {nickname}")
-
-            print()
-
-        print("=== Phase 3 Complete ===\n")
+    print(f"\n=== Phase 3 Complete: {results['applied']} applied, {results['failed']} failed ===\n")
+    return results
 
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Assign bot roles and nicknames")
+    parser.add_argument("--refresh", action="store_true", help="re-list guild members instead of using the saved index")
+    args = parser.parse_args()
+
     token = os.getenv("DISCORD_BOT_TOKEN")
     if not token:
         print("Error: DISCORD_BOT_TOKEN environment variable not set")
         sys.exit(1)
 
-    phase3 = DiscordPhase3(token, GUILD_ID)
-    phase3.assign_roles()
+    results = asyncio.run(run(token, 0 if args.refresh else MEMBER_TTL))
+    if results["failed"]:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
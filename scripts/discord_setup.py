@@ -2,28 +2,42 @@
 """
 Discord Server Setup Automation
 
-Automates creation of roles, categories, channels, and permissions
-for the OpenClaw agent team Discord server.
+Reconciles the OpenClaw agent team Discord server against the roles,
+categories, channels and permissions defined below, plus the bot roles and
+nicknames from BOTS (see guild_reconciler.py). Only what
+differs from the live guild is created or edited: missing resources, drifted
+topics, colors, permissions and overwrites, and renamed resources.
 
 Usage:
     export DISCORD_BOT_TOKEN="your-bot-token"
-    python scripts/discord_setup.py
+    uv run --with aiohttp python scripts/discord_setup.py --plan   # show the diff only
+    uv run --with aiohttp python scripts/discord_setup.py          # apply it
 
 Output:
-    discord_config.json - Contains all created role/channel IDs
+    discord_config.json - Contains all role/category/channel IDs
 """
 
+import argparse
+import asyncio
+import json
 import os
 import sys
-import json
-import time
-from typing import Dict, List, Optional, Any
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from discord_client import AsyncDiscordClient, DiscordAPIError
+from guild_reconciler import GuildReconciler, Ref, print_plan
 
 # Configuration
 GUILD_ID = "832250938571227217"
 API_BASE = "https://discord.com/api/v10"
+CONFIG_PATH = Path("discord_config.json")
+
+# Permission bits used in project channel overwrites
+VIEW_CHANNEL = 1024
+VIEW_AND_SEND = 3072  # VIEW_CHANNEL + SEND_MESSAGES
 
 # Role Definitions
 ROLES = [
@@ -112,260 +126,120 @@ STRUCTURE = {
     },
 }
 
+# Bot Application IDs from agent_info.txt; every bot gets Olympus plus its
+# project roles, and the nickname "<emoji> <name>"
+BOTS = {
+    "Zeus": {"app_id": "1470606502179110912", "emoji": "⚡", "projects": ["Project: CAMPPS", "Project: Mimir", "Project: JCE"]},
+    "Athena": {"app_id": "1470607465136787621", "emoji": "🦉", "projects": []},
+    "Apollo": {"app_id": "1470608246669578423", "emoji": "☀️", "projects": []},
+    "Artemis": {"app_id": "1470608455818543135", "emoji": "🎯", "projects": []},
+    "Hermes": {"app_id": "1470608660714754102", "emoji": "🏃", "projects": []},
+    "Perseus": {"app_id": "1470608832672829635", "emoji": "🗡️", "projects": []},
+    "Prometheus": {"app_id": "1470609038008913930", "emoji": "🔥", "projects": []},
+    "Ares": {"app_id": "1470609201771315220", "emoji": "⚔️", "projects": []},
+}
 
-class DiscordSetup:
-    """Handles Discord server setup via API"""
-
-    def __init__(self, token: str, guild_id: str):
-        self.token = token
-        self.guild_id = guild_id
-        self.headers = {
-            "Authorization": f"Bot {token}",
-            "Content-Type": "application/json",
-            "User-Agent": "DiscordBot (https://github.com/infiquetra/home-lab, 1.0)",
-        }
-        self.config: Dict[str, Any] = {
-            "guild_id": guild_id,
-            "roles": {},
-            "categories": {},
-            "channels": {},
-        }
-
-    def _request(
-        self, method: str, endpoint: str, data: Optional[Dict] = None
-    ) -> Optional[Dict]:
-        """Make API request with rate limit handling"""
-        url = f"{API_BASE}{endpoint}"
-        try:
-            # Prepare request data
-            request_data = None
-            if data is not None:
-                request_data = json.dumps(data).encode('utf-8')
-
-            # Create request
-            req = Request(url, data=request_data, headers=self.headers, method=method)
-
-            # Make request
-            with urlopen(req, timeout=10) as response:
-                response_data = response.read()
-                if response_data:
-                    return json.loads(response_data.decode('utf-8'))
-                return None
-
-        except HTTPError as e:
-            # Handle rate limits
-            if e.code == 429:
-                error_data = json.loads(e.read().decode('utf-8'))
-                retry_after = error_data.get("retry_after", 1)
-                print(f"Rate limited. Waiting {retry_after}s...")
-                time.sleep(retry_after)
-                return self._request(method, endpoint, data)
-
-            print(f"API request failed: HTTP {e.code}")
-            print(f"Response: {e.read().decode('utf-8')}")
-            return None
 
-        except (URLError, Exception) as e:
-            print(f"API request failed: {e}")
-            return None
+def desired_state() -> Dict[str, Any]:
+    """ROLES, STRUCTURE and BOTS as the reconciler's desired state."""
+    categories = {}
+    for category_name, category_data in STRUCTURE.items():
+        channels = []
+        for channel_def in category_data["channels"]:
+            overwrites = []
+            # Project channels: hidden from @everyone, open to the project role and Human
+            if "project_role" in channel_def:
+                overwrites = [
+                    {"id": Ref("role", "@everyone"), "type": 0, "allow": "0", "deny": str(VIEW_CHANNEL)},
+                    {"id": Ref("role", channel_def["project_role"]), "type": 0,
+                     "allow": str(VIEW_AND_SEND), "deny": "0"},
+                    {"id": Ref("role", "Human"), "type": 0, "allow": str(VIEW_AND_SEND), "deny": "0"},
+                ]
+            channels.append({"name": channel_def["name"], "topic": channel_def.get("topic", ""),
+                             "overwrites": overwrites})
+        categories[category_name] = channels
+
+    members = {
+        bot_name: {"roles": ["Olympus"] + bot_info["projects"], "nick": f"{bot_info['emoji']} {bot_name}"}
+        for bot_name, bot_info in BOTS.items()
+    }
+    return {"roles": ROLES, "categories": categories, "members": members}
+
+
+def load_config(path: Path = CONFIG_PATH) -> Dict[str, Any]:
+    """IDs recorded by the last run (empty on first run)."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def save_config(config: Dict[str, Any], path: Path = CONFIG_PATH) -> None:
+    """Save configuration to JSON file"""
+    path.write_text(json.dumps(config, indent=2) + "\n")
+    print(f"\n=== Configuration saved to {path} ===")
+
+
+async def reconcile(token: str, plan_only: bool, api_base: str = API_BASE,
+                    config_path: Path = CONFIG_PATH) -> Optional[Dict[str, int]]:
+    """Snapshot the guild, print the plan and (unless plan_only) apply it.
+
+    Returns the apply results (all zero for a dry run), or None if the
+    guild could not be read.
+    """
+    async with aiohttp.ClientSession() as session:
+        client = AsyncDiscordClient(session, token, api_base)
+        reconciler = GuildReconciler(client, GUILD_ID, desired_state(), load_config(config_path))
 
-    def get_current_state(self) -> Dict[str, Any]:
-        """Query current server state"""
         print("\n=== Querying Current Server State ===")
-
-        # Get guild info
-        guild = self._request("GET", f"/guilds/{self.guild_id}")
-        if guild:
-            print(f"Guild: {guild.get('name')} (ID: {guild.get('id')})")
-
-        # Get existing roles
-        roles = self._request("GET", f"/guilds/{self.guild_id}/roles")
-        existing_roles = {role["name"]: role for role in roles} if roles else {}
-        print(f"Existing roles: {len(existing_roles)}")
-
-        # Get existing channels
-        channels = self._request("GET", f"/guilds/{self.guild_id}/channels")
-        existing_channels = {ch["name"]: ch for ch in channels} if channels else {}
-        print(f"Existing channels: {len(existing_channels)}")
-
-        return {
-            "guild": guild,
-            "roles": existing_roles,
-            "channels": existing_channels,
-        }
-
-    def create_roles(self, existing_roles: Dict[str, Any]) -> None:
-        """Create required roles if they don't exist"""
-        print("\n=== Creating Roles ===")
-
-        for role_def in ROLES:
-            role_name = role_def["name"]
-
-            # Skip if role already exists
-            if role_name in existing_roles:
-                role = existing_roles[role_name]
-                print(f"✓ Role '{role_name}' already exists (ID: {role['id']})")
-                self.config["roles"][role_name] = role["id"]
-                continue
-
-            # Create new role
-            payload = {
-                "name": role_name,
-                "color": role_def["color"],
-                "permissions": role_def["permissions"],
-                "hoist": role_def["hoist"],
-                "mentionable": role_def["mentionable"],
-            }
-
-            result = self._request("POST", f"/guilds/{self.guild_id}/roles", payload)
-            if result:
-                print(f"✓ Created role '{role_name}' (ID: {result['id']})")
-                self.config["roles"][role_name] = result["id"]
-            else:
-                print(f"✗ Failed to create role '{role_name}'")
-
-    def create_categories_and_channels(self, existing_channels: Dict[str, Any]) -> None:
-        """Create categories and channels"""
-        print("\n=== Creating Categories and Channels ===")
-
-        everyone_role_id = self._get_everyone_role_id()
-
-        for category_name, category_data in STRUCTURE.items():
-            # Create or get category
-            category_id = self._create_category(category_name, existing_channels)
-            if not category_id:
-                print(f"✗ Failed to create category '{category_name}'")
-                continue
-
-            self.config["categories"][category_name] = category_id
-
-            # Create channels in category
-            for channel_def in category_data["channels"]:
-                channel_name = channel_def["name"]
-
-                # Skip if channel already exists
-                if channel_name in existing_channels:
-                    channel = existing_channels[channel_name]
-                    print(f"  ✓ Channel '{channel_name}' already exists (ID: {channel['id']})")
-                    self.config["channels"][channel_name] = channel["id"]
-                    continue
-
-                # Build permission overrides
-                permission_overwrites = []
-
-                # Project channels: restrict to project role
-                if "project_role" in channel_def:
-                    project_role = channel_def["project_role"]
-                    project_role_id = self.config["roles"].get(project_role)
-
-                    if project_role_id and everyone_role_id:
-                        # Deny @everyone
-                        permission_overwrites.append({
-                            "id": everyone_role_id,
-                            "type": 0,  # Role
-                            "deny": "1024",  # VIEW_CHANNEL
-                        })
-                        # Allow project role
-                        permission_overwrites.append({
-                            "id": project_role_id,
-                            "type": 0,
-                            "allow": "3072",  # VIEW_CHANNEL + SEND_MESSAGES
-                        })
-
-                        # Allow Human role
-                        human_role_id = self.config["roles"].get("Human")
-                        if human_role_id:
-                            permission_overwrites.append({
-                                "id": human_role_id,
-                                "type": 0,
-                                "allow": "3072",
-                            })
-
-                # Create channel
-                payload = {
-                    "name": channel_name,
-                    "type": 0,  # Text channel
-                    "parent_id": category_id,
-                    "topic": channel_def.get("topic", ""),
-                    "permission_overwrites": permission_overwrites,
-                }
-
-                result = self._request("POST", f"/guilds/{self.guild_id}/channels", payload)
-                if result:
-                    print(f"  ✓ Created channel '{channel_name}' (ID: {result['id']})")
-                    self.config["channels"][channel_name] = result["id"]
-                else:
-                    print(f"  ✗ Failed to create channel '{channel_name}'")
-
-    def _create_category(self, name: str, existing_channels: Dict[str, Any]) -> Optional[str]:
-        """Create a category channel"""
-        # Check if category already exists
-        if name in existing_channels:
-            category = existing_channels[name]
-            print(f"✓ Category '{name}' already exists (ID: {category['id']})")
-            return category["id"]
-
-        # Create new category
-        payload = {
-            "name": name,
-            "type": 4,  # Category
-        }
-
-        result = self._request("POST", f"/guilds/{self.guild_id}/channels", payload)
-        if result:
-            print(f"✓ Created category '{name}' (ID: {result['id']})")
-            return result["id"]
-        else:
+        try:
+            snapshot = await reconciler.snapshot()
+        except DiscordAPIError as e:
+            print(f"\nError: Failed to query guild (HTTP {e.status}). Check bot token and permissions.")
             return None
+        print(f"Existing roles: {len(snapshot['roles'])}, channels: {len(snapshot['channels'])}, "
+              f"members: {len(snapshot['members'])}")
 
-    def _get_everyone_role_id(self) -> Optional[str]:
-        """Get the @everyone role ID (same as guild ID)"""
-        return self.guild_id
+        changes = reconciler.plan(snapshot)
+        print("\n=== Plan ===")
+        print_plan(changes)
+        if plan_only:
+            return {"applied": 0, "failed": 0}
 
-    def save_config(self, filename: str = "discord_config.json") -> None:
-        """Save configuration to JSON file"""
-        with open(filename, "w") as f:
-            json.dump(self.config, f, indent=2)
-        print(f"\n=== Configuration saved to {filename} ===")
+        print("\n=== Applying ===")
+        results = await reconciler.apply(changes)
+        save_config(reconciler.config, config_path)
+        return results
 
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Reconcile the Discord server with its definition")
+    parser.add_argument("--plan", action="store_true", help="show what would change without applying it")
+    args = parser.parse_args()
+
     # Get bot token from environment
     token = os.getenv("DISCORD_BOT_TOKEN")
     if not token:
         print("Error: DISCORD_BOT_TOKEN environment variable not set")
         print("\nUsage:")
         print("  export DISCORD_BOT_TOKEN='your-bot-token'")
-        print("  python scripts/discord_setup.py")
+        print("  python scripts/discord_setup.py [--plan]")
         sys.exit(1)
 
     print("=== Discord Server Setup ===")
     print(f"Guild ID: {GUILD_ID}")
     print(f"API Base: {API_BASE}")
 
-    # Initialize setup
-    setup = DiscordSetup(token, GUILD_ID)
-
-    # Get current state
-    current_state = setup.get_current_state()
-    if not current_state["guild"]:
-        print("\nError: Failed to query guild. Check bot token and permissions.")
+    results = asyncio.run(reconcile(token, args.plan))
+    if results is None:
         sys.exit(1)
+    if args.plan:
+        return
 
-    # Create roles
-    setup.create_roles(current_state["roles"])
-
-    # Create categories and channels
-    setup.create_categories_and_channels(current_state["channels"])
-
-    # Save configuration
-    setup.save_config()
-
-    print("\n=== Setup Complete ===")
-    print("\nNext steps:")
-    print("1. Create 9 bot applications in Discord Developer Portal")
-    print("2. Run Phase 3 to assign bot roles and nicknames")
+    print(f"\n=== Setup Complete: {results['applied']} applied, {results['failed']} failed ===")
+    if results["failed"]:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
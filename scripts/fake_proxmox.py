@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Fake Proxmox API Server
+
+A small in-process stand-in for the Proxmox VE REST API, for exercising
+provision_vms.py and ansible/main.py without a cluster. It serves HTTPS
+(proxmoxer only speaks https) with a throwaway self-signed certificate and
+checks the PVEAPIToken header.
+
+Cluster state (nodes, and optionally VMs) is seeded from a fixture recorded
+with ansible/main.py --record. Long-running calls return a UPID and finish
+after a configurable duration, the way pvedaemon workers do:
+- clone
+- config (POST)
+- resize
+- start/stop/reboot
+- migrate
+- destroy
+
+PUT .../cloudinit regenerates the cloud-init drive synchronously. Every task
+is logged with its node, storage pool and timing, so a test can check how
+many ran at once. A task can be made to fail with `fail(type, vmid, times)`.
+
+Usage:
+    python3 scripts/fake_proxmox.py --port 8006 --fixture ansible/fixtures/proxmox-api.json
+    PROXMOX_API_HOST=127.0.0.1:8006 PROXMOX_API_TOKEN_SECRET=fake \\
+        python3 scripts/provision_vms.py --per-node 2
+"""
+
+import argparse
+import copy
+import json
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = REPO_ROOT / "ansible" / "fixtures" / "proxmox-api.json"
+TOKEN = "ansible@pam!ansible-token=fake"
+
+# Seconds per task type; a clone also takes clone_seconds_per_gb per GB of template disk
+DURATIONS = {"qmclone": 0.4, "qmconfig": 0.05, "qmresize": 0.1, "cloudinit": 0.1, "qmstart": 0.3,
+             "qmstop": 0.1, "qmreboot": 0.3, "qmigrate": 0.2, "qmdestroy": 0.1}
+CLONE_SECONDS_PER_GB = 0.0
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class FakeProxmox:
+    """Cluster state plus the task table; every method runs under one lock."""
+
+    def __init__(self, nodes: List[Dict[str, Any]], status: List[Dict[str, Any]], vms: Dict[int, Dict[str, Any]],
+                 durations: Optional[Dict[str, float]] = None, clone_seconds_per_gb: float = CLONE_SECONDS_PER_GB,
+                 token: str = TOKEN):
+        self.nodes = {node["node"]: node for node in nodes}
+        self.status = status
+        self.vms = vms
+        self.durations = {**DURATIONS, **(durations or {})}
+        self.clone_seconds_per_gb = clone_seconds_per_gb
+        self.token = token
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.failures: Dict[Tuple[str, int], int] = {}
+        self.requests = 0
+        self.lock = threading.RLock()
+        self._pid = 0x1000
+
+    @classmethod
+    def from_fixture(cls, path: Path = FIXTURE, with_vms: bool = False, **kwargs) -> "FakeProxmox":
+        """Nodes from a recorded fixture; its templates always, its other VMs only `with_vms`."""
+        responses = json.loads(Path(path).read_text())["responses"]
+        vms = {}
+        for node in responses["nodes"]:
+            for entry in responses.get(f"nodes/{node['node']}/qemu", []):
+                if entry.get("template") or with_vms:
+                    # Templates are only listed in a recording; give them the disk proxmox_template creates
+                    config = responses.get(f"nodes/{node['node']}/qemu/{entry['vmid']}/config",
+                                           {"name": entry["name"], "cores": entry.get("cpus", 1),
+                                            "memory": str((entry.get("maxmem") or 0) >> 20), "template": 1,
+                                            "scsi0": f"ceph-fast:base-{entry['vmid']}-disk-0,"
+                                                     f"size={(entry.get('maxdisk') or 0) >> 30}G"})
+                    vms[entry["vmid"]] = {**entry, "node": node["node"], "config": copy.deepcopy(config)}
+        return cls(responses["nodes"], responses["cluster/status"], vms, **kwargs)
+
+    # -- test hooks ---------------------------------------------------------
+
+    def fail(self, task_type: str, vmid: int, times: int = 1) -> None:
+        """The next `times` tasks of `task_type` on `vmid` end in error."""
+        with self.lock:
+            self.failures[task_type, vmid] = times
+
+    def task_log(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            self._settle()
+            return [copy.deepcopy(task) for task in self.tasks.values()]
+
+    # -- tasks --------------------------------------------------------------
+
+    def _task(self, node: str, task_type: str, vmid: int, duration: float, effect=None,
+              pool: Optional[str] = None) -> str:
+        self._pid += 1
+        start = time.time()
+        upid = f"UPID:{node}:{self._pid:08X}:{int(start * 100) & 0xFFFFFFFF:08X}:{int(start):08X}:" \
+               f"{task_type}:{vmid}:{self.token.split('=')[0]}:"
+        failing = self.failures.get((task_type, vmid), 0)
+        if failing:
+            self.failures[task_type, vmid] = failing - 1
+        self.tasks[upid] = {"upid": upid, "node": node, "type": task_type, "id": str(vmid), "pool": pool,
+                            "start": start, "end": start + duration, "effect": effect, "failed": bool(failing),
+                            "status": "running", "exitstatus": None}
+        return upid
+
+    def _settle(self) -> None:
+        now = time.time()
+        for task in sorted(self.tasks.values(), key=lambda t: t["end"]):
+            if task["status"] == "running" and task["end"] <= now:
+                task["status"] = "stopped"
+                if task["failed"]:
+                    task["exitstatus"] = f"{task['type']} failed: injected failure"
+                    if task["type"] == "qmclone":
+                        self.vms.pop(int(task["id"]), None)
+                else:
+                    task["exitstatus"] = "OK"
+                    if task["effect"]:
+                        task["effect"]()
+                if task["type"] == "qmclone" and int(task["id"]) in self.vms:
+                    self.vms[int(task["id"])]["config"].pop("lock", None)
+                task["effect"] = None
+
+    def _vm(self, node: str, vmid: int) -> Dict[str, Any]:
+        vm = self.vms.get(vmid)
+        if vm is None or vm["node"] != node:
+            raise ApiError(500, f"Configuration file 'nodes/{node}/qemu-server/{vmid}.conf' does not exist")
+        return vm
+
+    def _unlocked(self, vm: Dict[str, Any]) -> None:
+        if vm["config"].get("lock"):
+            raise ApiError(500, f"VM is locked ({vm['config']['lock']})")
+
+    @staticmethod
+    def _size_gb(config: Dict[str, Any]) -> int:
+        match = re.search(r"size=(\d+)G", config.get("scsi0", ""))
+        return int(match.group(1)) if match else 0
+
+    @staticmethod
+    def _storage(config: Dict[str, Any]) -> Optional[str]:
+        disk = config.get("scsi0", "")
+        return disk.split(":")[0] if disk else None
+
+    # -- routing ------------------------------------------------------------
+
+    def handle(self, method: str, path: str, params: Dict[str, str]) -> Any:
+        with self.lock:
+            self.requests += 1
+            self._settle()
+            parts = path.strip("/").split("/")
+            if parts == ["nodes"]:
+                return list(self.nodes.values())
+            if parts == ["cluster", "status"]:
+                return self.status
+            if parts == ["cluster", "resources"]:
+                return [{"id": f"qemu/{vmid}", "type": "qemu", "vmid": vmid, "node": vm["node"],
+                         "name": vm["config"].get("name"), "status": vm.get("status", "stopped"),
+                         "template": vm.get("template", 0), "maxmem": int(vm["config"].get("memory", 0)) << 20,
+                         "lock": vm["config"].get("lock")}
+                        for vmid, vm in sorted(self.vms.items())]
+            if len(parts) < 3 or parts[0] != "nodes" or parts[1] not in self.nodes:
+                raise ApiError(501, f"Method '{method} /{path}' not implemented")
+            node = parts[1]
+            if parts[2:] == ["qemu"]:
+                return [{"vmid": vmid, "name": vm["config"].get("name"), "status": vm.get("status", "stopped"),
+                         "cpus": int(vm["config"].get("cores", 1)),
+                         "maxmem": int(vm["config"].get("memory", 0)) << 20, "tags": vm["config"].get("tags", ""),
+                         **({"template": 1} if vm.get("template") else {})}
+                        for vmid, vm in sorted(self.vms.items()) if vm["node"] == node]
+            if parts[2] == "tasks" and len(parts) == 5 and parts[4] == "status":
+                task = self.tasks.get(parts[3])
+                if task is None or task["node"] != node:
+                    raise ApiError(500, f"no such task '{parts[3]}'")
+                return {key: task[key] for key in ("upid", "node", "type", "id", "status")} | (
+                    {"exitstatus": task["exitstatus"]} if task["status"] == "stopped" else {})
+            if parts[2] == "qemu" and len(parts) >= 4:
+                return self._qemu(method, node, int(parts[3]), "/".join(parts[4:]), params)
+            raise ApiError(501, f"Method '{method} /{path}' not implemented")
+
+    def _qemu(self, method: str, node: str, vmid: int, action: str, params: Dict[str, str]) -> Any:
+        if (method, action) == ("POST", "clone"):
+            template = self._vm(node, vmid)
+            newid = int(params["newid"])
+            if newid in self.vms:
+                raise ApiError(500, f"unable to create VM {newid}: config file already exists")
+            target = params.get("target", node)
+            if target not in self.nodes:
+                raise ApiError(500, f"no such cluster node '{target}'")
+            storage = params.get("storage") or self._storage(template["config"])
+            config = {key: value for key, value in template["config"].items() if key not in ("template", "digest")}
+            size = self._size_gb(template["config"])
+            config.update({"name": params.get("name", f"Copy-of-VM-{template['config'].get('name')}"),
+                           "scsi0": f"{storage}:vm-{newid}-disk-0,size={size}G", "lock": "clone"})
+            self.vms[newid] = {"vmid": newid, "node": target, "status": "stopped", "config": config}
+            return self._task(node, "qmclone", newid, self.durations["qmclone"] + size * self.clone_seconds_per_gb,
+                              pool=storage)
+        vm = self._vm(node, vmid)
+        if (method, action) == ("GET", "config"):
+            return copy.deepcopy(vm["config"])
+        if (method, action) in (("POST", "config"), ("PUT", "config")):
+            self._unlocked(vm)
+            vm["config"].update({key: value for key, value in params.items() if key not in ("delete", "digest")})
+            if method == "PUT":
+                return None
+            return self._task(node, "qmconfig", vmid, self.durations["qmconfig"])
+        if (method, action) == ("PUT", "resize"):
+            self._unlocked(vm)
+            size = params["size"]
+            disk = vm["config"].get(params["disk"], "")
+            if not disk:
+                raise ApiError(500, f"disk '{params['disk']}' does not exist")
+
+            def resize():
+                vm["config"][params["disk"]] = re.sub(r"size=[^,]*", f"size={size}", disk)
+
+            return self._task(node, "qmresize", vmid, self.durations["qmresize"], resize, pool=self._storage(vm["config"]))
+        if (method, action) == ("PUT", "cloudinit"):
+            self._unlocked(vm)
+            duration = self.durations["cloudinit"]
+            self.lock.release()
+            try:
+                time.sleep(duration)  # the real call regenerates the drive before returning
+            finally:
+                self.lock.acquire()
+            start = time.time() - duration
+            key = f"cloudinit:{vmid}:{start}"
+            self.tasks[key] = {"upid": key, "node": node, "type": "cloudinit", "id": str(vmid), "pool": None,
+                               "start": start, "end": start + duration, "effect": None, "failed": False,
+                               "status": "stopped", "exitstatus": "OK"}
+            vm["cloudinit"] = dict(vm["config"])
+            return None
+        if method == "POST" and action.startswith("status/"):
+            command = action.split("/", 1)[1]
+            self._unlocked(vm)
+            if command not in ("start", "stop", "reboot", "shutdown"):
+                raise ApiError(501, f"Method 'POST status/{command}' not implemented")
+            if command == "start" and vm.get("status") == "running":
+                raise ApiError(500, f"VM {vmid} already running")
+            state = "stopped" if command in ("stop", "shutdown") else "running"
+            return self._task(node, f"qm{command}", vmid, self.durations.get(f"qm{command}", 0.1),
+                              lambda: vm.update(status=state))
+        if (method, action) == ("POST", "migrate"):
+            self._unlocked(vm)
+            return self._task(node, "qmigrate", vmid, self.durations["qmigrate"], lambda: vm.update(node=params["target"]))
+        if (method, action) == ("DELETE", ""):
+            self._unlocked(vm)
+            if vm.get("status") == "running":
+                raise ApiError(500, f"VM {vmid} is running - destroy failed")
+            return self._task(node, "qmdestroy", vmid, self.durations["qmdestroy"], lambda: self.vms.pop(vmid, None))
+        raise ApiError(501, f"Method '{method} {action}' not implemented")
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: "FakeServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # The TLS handshake runs here, in the request's thread, not in the accept loop
+        self.request.do_handshake()
+        super().setup()
+
+    def _respond(self, method: str) -> None:
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+        cluster = self.server.cluster
+        try:
+            if self.headers.get("Authorization") != f"PVEAPIToken={cluster.token}":
+                raise ApiError(401, "authentication failure")
+            if not url.path.startswith("/api2/json/"):
+                raise ApiError(404, "not found")
+            body, status = {"data": cluster.handle(method, url.path[len("/api2/json/"):], params)}, 200
+        except ApiError as exc:
+            body, status = {"data": None, "message": str(exc)}, exc.status
+        except (KeyError, ValueError) as exc:
+            body, status = {"data": None, "errors": {str(exc): "parameter verification failed"}}, 400
+        payload = json.dumps(body).encode()
+        self.send_response(status, body.get("message"))
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def do_PUT(self):
+        self._respond("PUT")
+
+    def do_DELETE(self):
+        self._respond("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServer(ThreadingHTTPServer):
+    """HTTPS server on 127.0.0.1; `address` is the host:port to hand proxmoxer."""
+
+    daemon_threads = True
+    request_queue_size = 64  # the default backlog of 5 drops a burst of parallel connects
+
+    def __init__(self, cluster: FakeProxmox, port: int = 0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.cluster = cluster
+        self._certs = tempfile.TemporaryDirectory(prefix="fake-proxmox-")
+        cert, key = Path(self._certs.name) / "cert.pem", Path(self._certs.name) / "key.pem"
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+                        "-nodes", "-days", "1", "-subj",
+                        "/CN=127.0.0.1", "-keyout", str(key), "-out", str(cert)], check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        self.socket = context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+        self.address = f"127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        pass  # clients killed mid-request (the crash-resume test does that) are not server errors
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        self._certs.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8006, help="port to listen on (127.0.0.1)")
+    parser.add_argument("--fixture", type=Path, default=FIXTURE, help="recorded API responses to seed from")
+    parser.add_argument("--with-vms", action="store_true", help="seed the fixture's VMs too, not just templates")
+    args = parser.parse_args()
+
+    cluster = FakeProxmox.from_fixture(args.fixture, with_vms=args.with_vms)
+    with FakeServer(cluster, args.port) as server:
+        print(f"🔍 Fake Proxmox API on https://{server.address}/api2/json "
+              f"({len(cluster.nodes)} nodes, {len(cluster.vms)} VMs)")
+        print(f"   token: PVEAPIToken={cluster.token}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
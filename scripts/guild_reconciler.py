@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Declarative Discord Guild Reconciler
+
+Brings a guild to a desired state with the fewest API calls. The state covers
+roles, categories, text channels with their topics and permission overwrites,
+and the roles and nicknames of bot members. The reconciler takes one snapshot
+of live state: the guild's roles, channels and members (every page, through
+member_index.py), fetched concurrently.
+It indexes the snapshot by id and by name, so computing the diff is linear in
+guild size. Resources recorded in discord_config.json are matched by id first,
+so a role or channel renamed by hand is renamed back rather than duplicated.
+
+The diff is a list of Changes applied in three waves, because later changes
+refer to ids that earlier ones create:
+
+  1. roles and categories
+  2. channels
+  3. member roles and nicknames
+
+Within a wave, changes are sent concurrently, and the shared
+AsyncDiscordClient keeps them inside Discord's rate limits. Member roles are
+only ever added. Roles a member has that are not in the desired state are left
+alone.
+
+Usage:
+    reconciler = GuildReconciler(client, guild_id, desired, config)
+    changes = reconciler.plan(await reconciler.snapshot())
+    print_plan(changes)
+    await reconciler.apply(changes)
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from discord_client import AsyncDiscordClient, DiscordAPIError
+from member_index import MemberIndex
+
+TEXT_CHANNEL = 0
+CATEGORY = 4
+
+# Role fields compared against live state (everything a role definition sets)
+ROLE_FIELDS = ("name", "color", "permissions", "hoist", "mentionable")
+
+# Apply order: each wave may reference ids created by the previous one
+WAVES = (("role", "category"), ("channel",), ("member_role", "nickname"))
+
+
+@dataclass(frozen=True)
+class Ref:
+    """A role or category referred to by name; resolved to its id at apply time."""
+
+    kind: str
+    name: str
+
+    def __str__(self) -> str:
+        if self.name.startswith("@"):
+            return self.name
+        return f"@{self.name}" if self.kind == "role" else f"#{self.name}"
+
+
+@dataclass
+class Change:
+    """One API call: create or update a resource, or add a role to a member."""
+
+    kind: str
+    name: str
+    action: str  # "create" | "update" | "add"
+    fields: Dict[str, Any] = field(default_factory=dict)
+    before: Dict[str, Any] = field(default_factory=dict)
+    target: Optional[str] = None  # id of the resource being updated
+
+    def describe(self) -> str:
+        if self.action == "create":
+            return f"+ {self.kind} '{self.name}'"
+        if self.action == "add":
+            return f"+ {self.kind} {self.name}: {self.fields['role']}"
+        diffs = ", ".join(f"{key}: {_show(self.before.get(key))} → {_show(value)}"
+                          for key, value in self.fields.items())
+        return f"~ {self.kind} '{self.name}': {diffs}"
+
+
+def _show(value: Any) -> str:
+    if isinstance(value, list):
+        return "[" + ", ".join(_show(item) for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}={_show(item)}" for key, item in value.items() if key != "type") + "}"
+    return repr(value) if isinstance(value, str) else str(value)
+
+
+def print_plan(changes: List[Change]) -> None:
+    if not changes:
+        print("✓ Guild matches the desired state — nothing to do")
+        return
+    for change in changes:
+        print(f"  {change.describe()}")
+    creates = sum(1 for change in changes if change.action in ("create", "add"))
+    print(f"\nPlan: {creates} to add, {len(changes) - creates} to change")
+
+
+class GuildReconciler:
+    """Diffs and applies a desired guild state.
+
+    `desired` has "roles" (role definitions), "categories" (category name →
+    channel definitions with optional "overwrites") and "members" (bot
+    username → {"roles": [role names], "nick": str}). `config` is the
+    discord_config.json mapping of names to ids; it is updated as ids are
+    created. Members are fetched fresh unless `member_ttl` allows reusing the
+    saved member index.
+
+    Any part of `desired` may be left out. A members-only state (phase 3)
+    takes role ids from `config` and snapshots nothing but the members.
+    """
+
+    def __init__(self, client: AsyncDiscordClient, guild_id: str, desired: Dict[str, Any],
+                 config: Optional[Dict[str, Any]] = None, member_ttl: float = 0,
+                 member_cache: Optional[Path] = None):
+        self.client = client
+        self.guild_id = guild_id
+        self.desired = desired
+        self.member_ttl = member_ttl
+        self.member_cache = member_cache
+        self.members: Optional[MemberIndex] = None
+        self.config = config or {}
+        for section in ("roles", "categories", "channels"):
+            self.config.setdefault(section, {})
+        self.config["guild_id"] = guild_id
+        # kind → name → id, for resolving Refs; @everyone's id is the guild's
+        self.ids: Dict[str, Dict[str, str]] = {"role": {"@everyone": guild_id}, "category": {}}
+        if "roles" not in desired:
+            self.ids["role"].update(self.config["roles"])
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Fetch live roles, channels and members concurrently."""
+        if "roles" not in self.desired and "categories" not in self.desired:
+            roles, channels, members = [], [], await self.fetch_members()
+        else:
+            roles, channels, members = await asyncio.gather(
+                self.client.request("GET", f"/guilds/{self.guild_id}/roles"),
+                self.client.request("GET", f"/guilds/{self.guild_id}/channels"),
+                self.fetch_members(),
+            )
+        self.members = members
+        return {"roles": roles or [], "channels": channels or [], "members": members}
+
+    async def fetch_members(self) -> MemberIndex:
+        return await MemberIndex.load(self.client, self.guild_id, self.member_ttl, self.member_cache)
+
+    # ── Diff ──
+
+    @staticmethod
+    def _match(desired_name: str, configured_id: Optional[str], by_id: Dict[str, dict],
+               by_name: Dict[str, dict]) -> Optional[dict]:
+        """The live resource for a desired one: by recorded id, else by name."""
+        if configured_id and configured_id in by_id:
+            return by_id[configured_id]
+        return by_name.get(desired_name)
+
+    def _resolve(self, value: Any) -> Any:
+        """Replace Refs with ids (None while the referenced resource does not exist)."""
+        if isinstance(value, Ref):
+            return self.ids[value.kind].get(value.name)
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._resolve(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _overwrite_key(overwrites: List[dict]) -> List[Tuple]:
+        return sorted(
+            (str(o["id"]), int(o.get("type", 0)), str(o.get("allow", "0")), str(o.get("deny", "0")))
+            for o in overwrites
+        )
+
+    def plan(self, snapshot: Dict[str, Any]) -> List[Change]:
+        changes: List[Change] = []
+
+        roles_by_id = {role["id"]: role for role in snapshot["roles"]}
+        roles_by_name = {role["name"]: role for role in snapshot["roles"]}
+        for role_def in self.desired.get("roles", []):
+            name = role_def["name"]
+            live = self._match(name, self.config["roles"].get(name), roles_by_id, roles_by_name)
+            if live is None:
+                changes.append(Change("role", name, "create", {key: role_def[key] for key in ROLE_FIELDS}))
+                continue
+            self.ids["role"][name] = self.config["roles"][name] = live["id"]
+            drift = {key: role_def[key] for key in ROLE_FIELDS if str(live.get(key)) != str(role_def[key])}
+            if drift:
+                changes.append(Change("role", name, "update", drift, {key: live.get(key) for key in drift}, live["id"]))
+
+        categories = [ch for ch in snapshot["channels"] if ch.get("type") == CATEGORY]
+        text_channels = [ch for ch in snapshot["channels"] if ch.get("type") == TEXT_CHANNEL]
+        cat_by_id = {ch["id"]: ch for ch in categories}
+        cat_by_name = {ch["name"]: ch for ch in categories}
+        chan_by_id = {ch["id"]: ch for ch in text_channels}
+        chan_by_name = {ch["name"]: ch for ch in text_channels}
+
+        categories_wanted = self.desired.get("categories", {})
+        for category_name in categories_wanted:
+            live = self._match(category_name, self.config["categories"].get(category_name), cat_by_id, cat_by_name)
+            if live is None:
+                changes.append(Change("category", category_name, "create", {"name": category_name, "type": CATEGORY}))
+                continue
+            self.ids["category"][category_name] = self.config["categories"][category_name] = live["id"]
+            if live["name"] != category_name:
+                changes.append(Change("category", category_name, "update", {"name": category_name},
+                                      {"name": live["name"]}, live["id"]))
+
+        for category_name, channel_defs in categories_wanted.items():
+            for channel_def in channel_defs:
+                name = channel_def["name"]
+                wanted = {
+                    "name": name,
+                    "topic": channel_def.get("topic", ""),
+                    "parent_id": Ref("category", category_name),
+                    "permission_overwrites": channel_def.get("overwrites", []),
+                }
+                live = self._match(name, self.config["channels"].get(name), chan_by_id, chan_by_name)
+                if live is None:
+                    changes.append(Change("channel", name, "create", {"type": TEXT_CHANNEL, **wanted}))
+                    continue
+                self.config["channels"][name] = live["id"]
+                drift = {}
+                for key, value in wanted.items():
+                    resolved = self._resolve(value)
+                    if key == "permission_overwrites":
+                        same = None not in (o["id"] for o in resolved) and \
+                            self._overwrite_key(resolved) == self._overwrite_key(live.get(key) or [])
+                    else:
+                        same = resolved is not None and (live.get(key) or "") == resolved
+                    if not same:
+                        drift[key] = value
+                if drift:
+                    changes.append(Change("channel", name, "update", drift,
+                                          {key: live.get(key) for key in drift}, live["id"]))
+
+        for bot_name, wanted in self.desired.get("members", {}).items():
+            member = snapshot["members"].find(bot_name, bot=True)
+            if member is None:
+                print(f"⚠️  {bot_name}: Bot not found in server")
+                continue
+            member_id = member["user"]["id"]
+            has = set(member.get("roles", []))
+            for role_name in wanted["roles"]:
+                if self.ids["role"].get(role_name) not in has:
+                    changes.append(Change("member_role", bot_name, "add", {"role": Ref("role", role_name)},
+                                          target=member_id))
+            if wanted.get("nick") is not None and member.get("nick") != wanted["nick"]:
+                changes.append(Change("nickname", bot_name, "update", {"nick": wanted["nick"]},
+                                      {"nick": member.get("nick")}, member_id))
+        return changes
+
+    # ── Apply ──
+
+    def _request_for(self, change: Change) -> Tuple[str, str, Optional[dict]]:
+        payload = self._resolve(change.fields)
+        guild = f"/guilds/{self.guild_id}"
+        if change.kind == "role":
+            return ("POST", f"{guild}/roles", payload) if change.action == "create" else \
+                ("PATCH", f"{guild}/roles/{change.target}", payload)
+        if change.kind in ("category", "channel"):
+            return ("POST", f"{guild}/channels", payload) if change.action == "create" else \
+                ("PATCH", f"/channels/{change.target}", payload)
+        if change.kind == "member_role":
+            return "PUT", f"{guild}/members/{change.target}/roles/{payload['role']}", None
+        return "PATCH", f"{guild}/members/{change.target}", payload
+
+    async def _apply_one(self, change: Change) -> bool:
+        method, endpoint, payload = self._request_for(change)
+        try:
+            result = await self.client.request(method, endpoint, payload)
+        except DiscordAPIError as e:
+            print(f"✗ {change.describe()} — HTTP {e.status}: {e.body}")
+            return False
+        except Exception as e:
+            print(f"✗ {change.describe()} — {e}")
+            return False
+
+        if change.kind in ("role", "category", "channel"):
+            resource_id = result["id"] if change.action == "create" else change.target
+            section = {"role": "roles", "category": "categories", "channel": "channels"}[change.kind]
+            self.config[section][change.name] = resource_id
+            if change.kind in self.ids:
+                self.ids[change.kind][change.name] = resource_id
+        elif change.kind == "member_role":
+            self.members.record_role(change.target, self._resolve(change.fields["role"]))
+        elif change.kind == "nickname":
+            self.members.record_nick(change.target, change.fields["nick"])
+        print(f"✓ {change.describe()}")
+        return True
+
+    async def apply(self, changes: List[Change]) -> Dict[str, int]:
+        """Apply changes wave by wave; returns {"applied": n, "failed": n}."""
+        results = {"applied": 0, "failed": 0}
+        for kinds in WAVES:
+            wave = [change for change in changes if change.kind in kinds]
+            for ok in await asyncio.gather(*(self._apply_one(change) for change in wave)):
+                results["applied" if ok else "failed"] += 1
+        if self.members is not None:
+            self.members.save()
+        return results
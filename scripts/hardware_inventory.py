@@ -0,0 +1,807 @@
+#!/usr/bin/env python3
+"""
+Proxmox Hardware Inventory Collector
+
+Collects the hardware inventory of every Proxmox host over one SSH session per
+host. The hosts are inventoried concurrently. On each host every probe runs at
+once as a background job: dmidecode, lscpu, pvesh, lspci, the zpool/zfs
+listings, NIC link speeds, and one smartctl -i per disk and per drive behind a
+MegaRAID controller. The collector waits for all of them, then reads their
+outputs back, framed by a per-run marker.
+
+Probe outputs are parsed into typed, compact records: system identity, CPU,
+DIMMs, disks (serial, capacity, firmware), NICs (link speed, PCI model,
+bridge), PCI endpoints, ZFS pools with their vdevs, and datasets. The record
+is written to docs/inventory/<host>.json, small enough to diff. The raw probe
+text goes to a gzip sidecar, <host>.raw.json.gz, so `--reparse` can rebuild
+the records after a parser change without touching the hosts.
+
+The legacy files written by the old hardware_inventory.yml (raw command output
+inlined in the JSON) are read too. `--reparse` converts them in place.
+
+Usage:
+    uv run --with pyyaml python3 scripts/hardware_inventory.py
+    uv run --with pyyaml python3 scripts/hardware_inventory.py r720xd.infiquetra.com
+    uv run --with pyyaml python3 scripts/hardware_inventory.py --reparse
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import secrets
+import shlex
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = REPO_ROOT / "docs" / "inventory"
+HOSTS_FILE = REPO_ROOT / "ansible" / "inventory" / "hosts.yml"
+GROUP = "proxmox_hosts"
+SSH_COMMAND = "ssh -o BatchMode=yes -o ConnectTimeout=10"
+CONCURRENCY = 6
+TIMEOUT = 120.0
+FORMAT = 2
+
+# Runs on the host under `sh -s`. Every probe is a background job writing to
+# its own file, so the slowest probe (usually dmidecode or a spun-down disk's
+# smartctl) bounds the whole host. {marker} frames each output on the way back.
+PROBE_SCRIPT = r"""
+node=$(hostname -s)
+out=$(mktemp -d)
+trap 'rm -rf "$out"' EXIT
+probe() {
+    name=$1; shift
+    ( "$@" >"$out/$name" 2>&1; echo $? >"$out/$name.rc" ) &
+}
+probe dmidecode_system dmidecode -t system
+probe dmidecode_bios dmidecode -t bios
+probe dmidecode_memory dmidecode -t memory
+probe lscpu lscpu
+probe lspci lspci -vmm
+probe pvesh_status pvesh get "/nodes/$node/status" --output-format json
+probe pvesh_disks pvesh get "/nodes/$node/disks/list" --output-format json
+probe pvesh_pci pvesh get "/nodes/$node/hardware/pci" --output-format json
+probe pvesh_network pvesh get "/nodes/$node/network" --output-format json
+probe zpool_status zpool status -v
+probe zpool_list zpool list -v
+probe zfs_list zfs list -o name,used,avail,refer,mountpoint
+# Physical NICs are the ones backed by a device (Proxmox 9 names them nicN)
+probe iface_speeds sh -c 'for i in /sys/class/net/*; do [ -e "$i/device" ] || continue
+    echo "${i##*/} speed=$(cat "$i/speed" 2>/dev/null || echo unknown)" \
+        "duplex=$(cat "$i/duplex" 2>/dev/null || echo unknown)"; done'
+# zvols (zdN) are block devices too, but have no SMART data
+for dev in $(lsblk -d -n -o NAME,TYPE | awk '$2 == "disk" && $1 !~ /^zd/ {print $1}'); do
+    probe "smartctl:$dev" smartctl -i "/dev/$dev"
+done
+# Drives behind a PERC only answer through megaraid passthrough
+for spec in $(smartctl --scan 2>/dev/null | awk '$3 ~ /^megaraid,/ {print $1 "@" $3}'); do
+    probe "smartctl:${spec#*@}" smartctl -i -d "${spec#*@}" "${spec%@*}"
+done
+wait
+for rc in "$out"/*.rc; do
+    name=$(basename "$rc" .rc)
+    printf '\n{marker} %s %s\n' "$name" "$(cat "$rc")"
+    cat "$out/$name"
+done
+"""
+
+SIZE_UNITS = {"": 1, "B": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40, "P": 1 << 50}
+# lspci classes that are chipset plumbing rather than devices worth tracking
+PCI_SKIP_CLASSES = ("bridge", "System peripheral", "Performance counters", "Signal processing")
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class System:
+    manufacturer: Optional[str] = None
+    product: Optional[str] = None
+    serial: Optional[str] = None
+    uuid: Optional[str] = None
+    bios_version: Optional[str] = None
+    bios_date: Optional[str] = None
+    pve_version: Optional[str] = None
+    kernel: Optional[str] = None
+
+
+@dataclass
+class Cpu:
+    model: Optional[str] = None
+    sockets: Optional[int] = None
+    cores_per_socket: Optional[int] = None
+    threads_per_core: Optional[int] = None
+    threads: Optional[int] = None
+    max_mhz: Optional[int] = None
+    numa_nodes: Optional[int] = None
+    virtualization: Optional[str] = None
+
+
+@dataclass
+class Dimm:
+    locator: str
+    size_bytes: int
+    type: Optional[str] = None
+    speed_mts: Optional[int] = None
+    configured_mts: Optional[int] = None
+    rank: Optional[int] = None
+    manufacturer: Optional[str] = None
+    part_number: Optional[str] = None
+    serial: Optional[str] = None
+
+
+@dataclass
+class Memory:
+    total_bytes: int = 0
+    slots: int = 0
+    max_bytes: Optional[int] = None
+    ecc: Optional[str] = None
+    dimms: List[Dimm] = field(default_factory=list)
+
+
+@dataclass
+class Disk:
+    device: str
+    kind: str
+    model: Optional[str] = None
+    serial: Optional[str] = None
+    size_bytes: Optional[int] = None
+    firmware: Optional[str] = None
+    rpm: Optional[int] = None
+    health: Optional[str] = None
+    wearout: Optional[int] = None
+    wwn: Optional[str] = None
+    used: Optional[str] = None
+
+
+@dataclass
+class Nic:
+    name: str
+    mac: Optional[str] = None
+    pci_slot: Optional[str] = None
+    model: Optional[str] = None
+    speed_mbps: Optional[int] = None
+    duplex: Optional[str] = None
+    active: bool = False
+    bridge: Optional[str] = None
+    altnames: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Bridge:
+    name: str
+    ports: List[str] = field(default_factory=list)
+    cidr: Optional[str] = None
+    gateway: Optional[str] = None
+
+
+@dataclass
+class PciDevice:
+    slot: str
+    kind: str
+    vendor: str
+    device: str
+    numa_node: Optional[int] = None
+    iommu_group: Optional[int] = None
+
+
+@dataclass
+class Vdev:
+    name: str
+    type: str
+    state: str
+    role: str = "data"
+    size_bytes: Optional[int] = None
+    errors: int = 0
+    devices: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Pool:
+    name: str
+    state: str
+    size_bytes: Optional[int] = None
+    alloc_bytes: Optional[int] = None
+    free_bytes: Optional[int] = None
+    frag_pct: Optional[int] = None
+    cap_pct: Optional[int] = None
+    dedup: Optional[float] = None
+    scan: Optional[str] = None
+    errors: Optional[str] = None
+    vdevs: List[Vdev] = field(default_factory=list)
+
+
+@dataclass
+class Dataset:
+    name: str
+    used_bytes: Optional[int]
+    avail_bytes: Optional[int]
+    refer_bytes: Optional[int]
+    mountpoint: Optional[str]
+
+
+# ---------------------------------------------------------------------------
+# Parsers — each takes one probe's raw output
+# ---------------------------------------------------------------------------
+
+
+def parse_size(text: Optional[str]) -> Optional[int]:
+    """'928G', '7.27T', '76K', '8 GB', '16384 MB' → bytes; '-', 'none' → None."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGTP]?)i?B?\s*", text or "", re.IGNORECASE)
+    if not match:
+        return None
+    return round(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def _int(text: Optional[str]) -> Optional[int]:
+    match = re.search(r"-?\d+", (text or "").replace(",", ""))
+    return int(match.group()) if match else None
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return None if value.lower() in ("", "not specified", "not provided", "unknown", "n/a", "no dimm") else value
+
+
+def dmi_records(text: str, title: str) -> List[Dict[str, str]]:
+    """Key/value fields of every dmidecode record whose title line is `title`."""
+    records = []
+    for block in re.split(r"\n(?=Handle 0x)", text):
+        lines = block.splitlines()
+        if len(lines) < 2 or lines[1].strip() != title:
+            continue
+        fields = {}
+        for line in lines[2:]:
+            # One-tab lines are fields; deeper lines continue a list field
+            if line.startswith("\t") and not line.startswith("\t\t") and ":" in line:
+                key, _, value = line.strip().partition(":")
+                fields[key] = value.strip()
+        records.append(fields)
+    return records
+
+
+def colon_fields(text: str) -> Dict[str, str]:
+    """'Key:   value' lines (lscpu, smartctl -i), first occurrence wins."""
+    fields: Dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not key.startswith((" ", "\t")):
+            fields.setdefault(key.strip(), value.strip())
+    return fields
+
+
+def parse_system(dmi_system: str, dmi_bios: str, pvesh_status: Any) -> System:
+    system = (dmi_records(dmi_system, "System Information") or [{}])[0]
+    bios = (dmi_records(dmi_bios, "BIOS Information") or [{}])[0]
+    status = pvesh_status if isinstance(pvesh_status, dict) else {}
+    return System(
+        manufacturer=_clean(system.get("Manufacturer")),
+        product=_clean(system.get("Product Name")),
+        serial=_clean(system.get("Serial Number")),
+        uuid=_clean(system.get("UUID")),
+        bios_version=_clean(bios.get("Version")),
+        bios_date=_clean(bios.get("Release Date")),
+        pve_version=_clean(status.get("pveversion")),
+        kernel=_clean(status.get("current-kernel", {}).get("release")),
+    )
+
+
+def parse_lscpu(text: str) -> Cpu:
+    fields = colon_fields(text)
+    max_mhz = fields.get("CPU max MHz")
+    return Cpu(
+        model=_clean(fields.get("Model name")),
+        sockets=_int(fields.get("Socket(s)")),
+        cores_per_socket=_int(fields.get("Core(s) per socket")),
+        threads_per_core=_int(fields.get("Thread(s) per core")),
+        threads=_int(fields.get("CPU(s)")),
+        max_mhz=round(float(max_mhz)) if max_mhz else None,
+        numa_nodes=_int(fields.get("NUMA node(s)")),
+        virtualization=_clean(fields.get("Virtualization")),
+    )
+
+
+def parse_memory(text: str) -> Memory:
+    arrays = [a for a in dmi_records(text, "Physical Memory Array") if a.get("Use") == "System Memory"]
+    devices = dmi_records(text, "Memory Device")
+    dimms = [
+        Dimm(
+            locator=device.get("Locator", "").strip(),
+            size_bytes=parse_size(device["Size"]) or 0,
+            type=_clean(device.get("Type")),
+            speed_mts=_int(device.get("Speed")),
+            configured_mts=_int(device.get("Configured Memory Speed") or device.get("Configured Clock Speed")),
+            rank=_int(device.get("Rank")),
+            manufacturer=_clean(device.get("Manufacturer")),
+            part_number=_clean(device.get("Part Number")),
+            serial=_clean(device.get("Serial Number")),
+        )
+        for device in devices
+        if parse_size(device.get("Size"))
+    ]
+    return Memory(
+        total_bytes=sum(dimm.size_bytes for dimm in dimms),
+        slots=len(devices),
+        max_bytes=sum(parse_size(a.get("Maximum Capacity")) or 0 for a in arrays) or None,
+        ecc=_clean(arrays[0].get("Error Correction Type")) if arrays else None,
+        dimms=dimms,
+    )
+
+
+def parse_smartctl(text: str) -> Dict[str, Any]:
+    """Identity fields of one `smartctl -i` (ATA, SCSI or NVMe); {} when the device didn't answer."""
+    fields = colon_fields(text)
+    serial = fields.get("Serial Number") or fields.get("Serial number")
+    if not serial:
+        return {}
+    model = fields.get("Device Model") or fields.get("Model Number")
+    if not model and fields.get("Product"):
+        model = " ".join(filter(None, (_clean(fields.get("Vendor")), fields["Product"])))
+    capacity = fields.get("User Capacity") or fields.get("Total NVM Capacity") or ""
+    rotation = fields.get("Rotation Rate", "")
+    return {
+        "model": model,
+        "serial": serial,
+        "size_bytes": _int(capacity.split("bytes")[0].split("[")[0]),
+        "firmware": fields.get("Firmware Version") or fields.get("Revision"),
+        "rpm": 0 if "Solid State" in rotation else _int(rotation),
+        "wwn": _clean(fields.get("LU WWN Device Id") or fields.get("Logical Unit id")),
+    }
+
+
+def parse_disks(pvesh_disks: Any, smartctl: Dict[str, str]) -> List[Disk]:
+    """Disks the host sees (pvesh, enriched by smartctl) plus drives only visible via megaraid."""
+    disks = []
+    for entry in pvesh_disks if isinstance(pvesh_disks, list) else []:
+        device = entry.get("devpath", "").rsplit("/", 1)[-1]
+        smart = parse_smartctl(smartctl.get(device, ""))
+        model = _clean(entry.get("model"))
+        kind = entry.get("type") or "unknown"
+        if model and "PERC" in model:
+            kind = "raid"
+        wearout = entry.get("wearout")
+        disks.append(Disk(
+            device=device,
+            kind=kind,
+            model=model,
+            serial=_clean(entry.get("serial")),
+            size_bytes=entry.get("size"),
+            firmware=smart.get("firmware"),
+            rpm=entry["rpm"] if isinstance(entry.get("rpm"), int) and entry["rpm"] >= 0 else smart.get("rpm"),
+            health=_clean(entry.get("health")),
+            wearout=wearout if isinstance(wearout, int) else None,
+            wwn=_clean(entry.get("wwn")),
+            used=_clean(entry.get("used")),
+        ))
+    seen = {disk.serial for disk in disks}
+    for device, text in sorted(smartctl.items(), key=lambda item: _int(item[0]) or 0):
+        if not device.startswith("megaraid,"):
+            continue
+        smart = parse_smartctl(text)
+        if smart and smart["serial"] not in seen:
+            kind = "ssd" if smart["rpm"] == 0 else "hdd" if smart["rpm"] else "unknown"
+            disks.append(Disk(device=device, kind=kind, **smart))
+    return disks
+
+
+def parse_lspci(text: str) -> List[Dict[str, str]]:
+    """`lspci -vmm` records: Slot, Class, Vendor, Device, NUMANode, IOMMUGroup, ..."""
+    records = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        record = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                record.setdefault(key.strip(), value.strip())
+        if record.get("Slot"):
+            records.append(record)
+    return records
+
+
+def parse_pci(lspci: List[Dict[str, str]]) -> List[PciDevice]:
+    return [
+        PciDevice(
+            slot=record["Slot"],
+            kind=record.get("Class", ""),
+            vendor=record.get("Vendor", ""),
+            device=record.get("Device", ""),
+            numa_node=_int(record.get("NUMANode")),
+            iommu_group=_int(record.get("IOMMUGroup")),
+        )
+        for record in lspci
+        if not any(skip.lower() in record.get("Class", "").lower() for skip in PCI_SKIP_CLASSES)
+    ]
+
+
+def parse_iface_speeds(text: str) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+    """'nic0 speed=1000 duplex=full' lines → name → (Mb/s, duplex); -1/unknown → None."""
+    speeds = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        name, *pairs = line.split()
+        values = dict(pair.partition("=")[::2] for pair in pairs)
+        speed = _int(values.get("speed"))
+        duplex = values.get("duplex")
+        speeds[name] = (speed if speed and speed > 0 else None, duplex if duplex in ("full", "half") else None)
+    return speeds
+
+
+def _pci_slot(altnames: List[str]) -> Optional[str]:
+    """enp1s0f1 → '01:00.1' (predictable names encode bus, slot and function)."""
+    for name in altnames:
+        match = re.fullmatch(r"en(?:p(\d+))?s(\d+)(?:f(\d+))?", name)
+        if match and match.group(1):
+            return f"{int(match.group(1)):02x}:{int(match.group(2)):02x}.{int(match.group(3) or 0)}"
+    return None
+
+
+def _mac(altnames: List[str]) -> Optional[str]:
+    """enx90b11c5a56f9 → '90:b1:1c:5a:56:f9'."""
+    for name in altnames:
+        if re.fullmatch(r"enx[0-9a-f]{12}", name):
+            return ":".join(re.findall("..", name[3:]))
+    return None
+
+
+def parse_network(pvesh_network: Any, iface_speeds: str, lspci: List[Dict[str, str]]
+                  ) -> Tuple[List[Nic], List[Bridge]]:
+    entries = pvesh_network if isinstance(pvesh_network, list) else []
+    speeds = parse_iface_speeds(iface_speeds)
+    models = {record["Slot"].split(":", 1)[-1] if record["Slot"].count(":") == 2 else record["Slot"]:
+              f"{record.get('Vendor', '')} {record.get('Device', '')}".strip() for record in lspci}
+    bridges = [
+        Bridge(name=entry["iface"], ports=(entry.get("bridge_ports") or "").split(),
+               cidr=entry.get("cidr"), gateway=entry.get("gateway"))
+        for entry in entries if entry.get("type") == "bridge"
+    ]
+    bridge_of = {port: bridge.name for bridge in bridges for port in bridge.ports}
+    nics = []
+    for entry in entries:
+        if entry.get("type") != "eth":
+            continue
+        name = entry["iface"]
+        altnames = entry.get("altnames") or []
+        slot = _pci_slot([name, *altnames])
+        speed, duplex = speeds.get(name, (None, None))
+        nics.append(Nic(
+            name=name,
+            mac=_mac(altnames),
+            pci_slot=slot,
+            model=models.get(slot) if slot else None,
+            speed_mbps=speed,
+            duplex=duplex,
+            active=bool(entry.get("active")),
+            bridge=bridge_of.get(name),
+            altnames=altnames,
+        ))
+    return sorted(nics, key=lambda nic: nic.name), sorted(bridges, key=lambda bridge: bridge.name)
+
+
+def _tree(lines: List[str]) -> List[Tuple[int, List[str]]]:
+    """(depth, columns) for the indented device trees of zpool status/list."""
+    rows = []
+    for line in lines:
+        stripped = line.lstrip("\t")
+        columns = stripped.split()
+        if columns:
+            rows.append(((len(stripped) - len(stripped.lstrip(" "))) // 2, columns))
+    return rows
+
+
+def _vdev_type(name: str) -> str:
+    match = re.fullmatch(r"(mirror|raidz\d?|draid\d?[^-]*)-\d+", name)
+    return match.group(1) if match else "disk"
+
+
+def parse_zpool_status(text: str) -> List[Pool]:
+    pools = []
+    for block in re.split(r"\n(?=\s*pool: )", text.strip()):
+        header = dict(re.findall(r"^\s*(pool|state|scan|errors): (.*)$", block, re.MULTILINE))
+        if "pool" not in header:
+            continue
+        pool = Pool(name=header["pool"], state=header.get("state", ""), scan=header.get("scan"),
+                    errors=header.get("errors"))
+        config = block.split("config:", 1)[-1].split("errors:", 1)[0].splitlines()
+        role = "data"
+        vdev: Optional[Vdev] = None
+        for depth, columns in _tree(config):
+            name = columns[0]
+            if name == "NAME":
+                continue
+            if depth == 0:
+                # The pool itself, then headings for special-purpose vdev groups
+                role = "data" if name == pool.name else name
+                continue
+            errors = sum(_int(c) or 0 for c in columns[2:5])
+            if depth == 1 or vdev is None:
+                vdev = Vdev(name=name, type=_vdev_type(name), state=columns[1] if len(columns) > 1 else "",
+                            role=role, errors=errors)
+                if vdev.type == "disk":
+                    vdev.devices.append(name)
+                pool.vdevs.append(vdev)
+            else:
+                vdev.devices.append(name)
+                vdev.errors += errors
+        pools.append(pool)
+    return pools
+
+
+def apply_zpool_list(pools: List[Pool], text: str) -> None:
+    """Fill pool and vdev sizes from `zpool list -v`."""
+    by_name = {pool.name: pool for pool in pools}
+    pool: Optional[Pool] = None
+    for depth, columns in _tree(text.splitlines()[1:]):
+        if depth == 0:
+            pool = by_name.get(columns[0])
+            if pool and len(columns) >= 10:
+                pool.size_bytes, pool.alloc_bytes, pool.free_bytes = map(parse_size, columns[1:4])
+                pool.frag_pct, pool.cap_pct = _int(columns[6]), _int(columns[7])
+                pool.dedup = float(columns[8].rstrip("x")) if columns[8] != "-" else None
+        elif depth == 1 and pool:
+            for vdev in pool.vdevs:
+                if vdev.name == columns[0]:
+                    vdev.size_bytes = parse_size(columns[1])
+
+
+def parse_datasets(text: str) -> List[Dataset]:
+    datasets = []
+    for line in text.splitlines()[1:]:
+        columns = line.split(None, 4)
+        if len(columns) == 5:
+            datasets.append(Dataset(columns[0], *map(parse_size, columns[1:4]),
+                                    None if columns[4] in ("-", "none") else columns[4]))
+    return datasets
+
+
+def _json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except (TypeError, json.JSONDecodeError):
+        return None
+
+
+def parse_inventory(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Typed inventory record from a raw probe bundle (see collect_host / raw_from_legacy)."""
+    probes = raw["probes"]
+    text = lambda name: probes.get(name) or ""  # noqa: E731
+    smartctl = {name.split(":", 1)[1]: output for name, output in probes.items() if name.startswith("smartctl:")}
+    lspci = parse_lspci(text("lspci"))
+    nics, bridges = parse_network(_json(text("pvesh_network")), text("iface_speeds"), lspci)
+    pools = parse_zpool_status(text("zpool_status"))
+    apply_zpool_list(pools, text("zpool_list"))
+    record = {
+        "format": FORMAT,
+        "host": raw["host"],
+        "collected_at": raw["collected_at"],
+        "system": parse_system(text("dmidecode_system"), text("dmidecode_bios"), _json(text("pvesh_status"))),
+        "cpu": parse_lscpu(text("lscpu")),
+        "memory": parse_memory(text("dmidecode_memory")),
+        "disks": parse_disks(_json(text("pvesh_disks")), smartctl),
+        "nics": nics,
+        "bridges": bridges,
+        "pci": parse_pci(lspci),
+        "pools": pools,
+        "datasets": parse_datasets(text("zfs_list")),
+    }
+    failed = sorted(name for name, rc in raw.get("returncodes", {}).items()
+                    if rc and not name.startswith(("smartctl:", "zpool_", "zfs_")))
+    if failed:
+        record["failed_probes"] = failed
+    return {key: _plain(value) for key, value in record.items()}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return asdict(value) if hasattr(value, "__dataclass_fields__") else value
+
+
+def raw_from_legacy(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Probe bundle from a file written by the old hardware_inventory.yml."""
+    dumps = lambda value: json.dumps(value) if value is not None else ""  # noqa: E731
+    probes = {
+        "dmidecode_system": doc["system"]["dmidecode"],
+        "dmidecode_bios": doc["system"]["bios"],
+        "dmidecode_memory": doc["memory"]["dmidecode"],
+        "lscpu": doc["cpu"]["lscpu"],
+        "lspci": doc["pcie"]["lspci"],
+        "pvesh_status": dumps(doc["cpu"].get("pvesh_status")),
+        "pvesh_disks": dumps(doc["storage"].get("pvesh_disks")),
+        "pvesh_pci": dumps(doc["pcie"].get("pvesh_pci")),
+        "pvesh_network": dumps(doc["network"].get("pvesh_network")),
+        "iface_speeds": doc["network"]["iface_speeds"],
+        "zpool_status": doc["zfs"]["status"],
+        "zpool_list": doc["zfs"]["list"],
+        "zfs_list": doc["zfs"]["datasets"],
+    }
+    probes.update({f"smartctl:{dev}": output for dev, output in doc["storage"].get("smartctl", {}).items()})
+    return {"host": doc["host"], "collected_at": doc["collected_at"], "probes": probes, "returncodes": {}}
+
+
+def is_legacy(doc: Dict[str, Any]) -> bool:
+    return "format" not in doc and isinstance(doc.get("system", {}).get("dmidecode"), str)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+
+def render(record: Dict[str, Any]) -> str:
+    """JSON with one line per list item, so a changed DIMM or disk is a one-line diff."""
+    def value(item: Any, indent: str) -> str:
+        if isinstance(item, dict) and any(isinstance(v, list) and v and isinstance(v[0], dict)
+                                          for v in item.values()):
+            inner = indent + "  "
+            body = ",\n".join(f"{inner}{json.dumps(k)}: {value(v, inner)}" for k, v in item.items())
+            return "{\n" + body + "\n" + indent + "}"
+        if isinstance(item, list) and item and isinstance(item[0], dict):
+            inner = indent + "  "
+            return "[\n" + ",\n".join(inner + json.dumps(v, ensure_ascii=False) for v in item) + "\n" + indent + "]"
+        return json.dumps(item, ensure_ascii=False)
+
+    body = ",\n".join(f"  {json.dumps(key)}: {value(item, '  ')}" for key, item in record.items())
+    return "{\n" + body + "\n}\n"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def sidecar_path(output_dir: Path, host: str) -> Path:
+    return output_dir / f"{host}.raw.json.gz"
+
+
+def write_inventory(raw: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
+    """Write <host>.json and its raw sidecar; returns the parsed record.
+
+    The sidecar goes first, so output the parser chokes on is still kept for --reparse.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the gzip bytes stable for identical probe output
+    payload = gzip.compress(json.dumps(raw, sort_keys=True).encode(), compresslevel=9, mtime=0)
+    _write_atomic(sidecar_path(output_dir, raw["host"]), payload)
+    record = parse_inventory(raw)
+    _write_atomic(output_dir / f"{raw['host']}.json", render(record).encode())
+    return record
+
+
+def load_raw(output_dir: Path, host: str) -> Dict[str, Any]:
+    """The raw probe bundle for `host`: its sidecar, or the legacy inline JSON."""
+    sidecar = sidecar_path(output_dir, host)
+    if sidecar.exists():
+        return json.loads(gzip.decompress(sidecar.read_bytes()))
+    doc = json.loads((output_dir / f"{host}.json").read_text())
+    if is_legacy(doc):
+        return raw_from_legacy(doc)
+    raise FileNotFoundError(f"{sidecar} (needed to reparse {host})")
+
+
+# ---------------------------------------------------------------------------
+# Collection
+# ---------------------------------------------------------------------------
+
+
+def split_probes(output: str, marker: str) -> Tuple[Dict[str, str], Dict[str, int]]:
+    probes, returncodes = {}, {}
+    for chunk in output.split(f"\n{marker} ")[1:]:
+        header, _, body = chunk.partition("\n")
+        name, _, rc = header.partition(" ")
+        probes[name] = body.rstrip("\n")
+        returncodes[name] = _int(rc) if rc else -1
+    return probes, returncodes
+
+
+async def collect_host(host: str, address: Optional[str] = None, user: str = "root",
+                       ssh_command: str = SSH_COMMAND, timeout: float = TIMEOUT) -> Dict[str, Any]:
+    """Run every probe on `host` over one SSH session; returns the raw probe bundle."""
+    marker = f"@@probe-{secrets.token_hex(8)}@@"
+    script = PROBE_SCRIPT.replace("{marker}", marker)
+    collected_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    proc = await asyncio.create_subprocess_exec(
+        *shlex.split(ssh_command), f"{user}@{address or host}", "sh -s",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(script.encode()), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise RuntimeError(f"timed out after {timeout:.0f}s")
+    probes, returncodes = split_probes(stdout.decode(errors="replace"), marker)
+    if not probes:
+        raise RuntimeError(stderr.decode(errors="replace").strip() or f"ssh exited {proc.returncode}")
+    return {"host": host, "collected_at": collected_at, "probes": probes, "returncodes": returncodes}
+
+
+async def collect_all(hosts: Dict[str, Optional[str]], output_dir: Path = OUTPUT_DIR,
+                      concurrency: int = CONCURRENCY, **options) -> Dict[str, Any]:
+    """Inventory `hosts` (name → address) concurrently; returns host → record or exception."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(host: str, address: Optional[str]):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                raw = await collect_host(host, address, **options)
+                record = write_inventory(raw, output_dir)
+            except (OSError, RuntimeError) as exc:
+                print(f"❌ {host}: {exc}")
+                return exc
+            except (ValueError, KeyError, IndexError, TypeError) as exc:
+                print(f"❌ {host}: parse failed ({exc!r}); raw output kept in "
+                      f"{sidecar_path(output_dir, host)}, fix the parser and --reparse")
+                return exc
+            print(f"✅ {host}: {len(raw['probes'])} probes in {time.perf_counter() - start:.1f}s — {summary(record)}")
+            return record
+
+    results = await asyncio.gather(*(one(host, address) for host, address in hosts.items()))
+    return dict(zip(hosts, results))
+
+
+def summary(record: Dict[str, Any]) -> str:
+    cpu, memory = record["cpu"], record["memory"]
+    pools = ", ".join(f"{p['name']} ({'+'.join(v['type'] for v in p['vdevs'] if v['role'] == 'data')})"
+                      for p in record["pools"]) or "no pools"
+    return (f"{record['system']['product']}, {cpu['sockets']}× {cpu['model']} ({cpu['threads']}t), "
+            f"{memory['total_bytes'] / (1 << 30):.0f} GiB in {len(memory['dimms'])}/{memory['slots']} DIMMs, "
+            f"{len(record['disks'])} disks, {len(record['nics'])} NICs, {pools}")
+
+
+def inventory_hosts(hosts_file: Path = HOSTS_FILE, group: str = GROUP) -> Dict[str, Optional[str]]:
+    """Hosts of an Ansible inventory group → their ansible_host."""
+    import yaml
+
+    inventory = yaml.safe_load(hosts_file.read_text())["all"]
+    addresses = {name: (vars_ or {}).get("ansible_host") for name, vars_ in inventory.get("hosts", {}).items()}
+    members = inventory.get("children", {}).get(group, {}).get("hosts") or {}
+    return {name: addresses.get(name) for name in members}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("hosts", nargs="*", help="hosts to inventory (default: the whole group)")
+    parser.add_argument("--inventory", type=Path, default=HOSTS_FILE, help="Ansible inventory file")
+    parser.add_argument("--group", default=GROUP, help="inventory group to collect")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR, help="where <host>.json is written")
+    parser.add_argument("--user", default="root", help="SSH user")
+    parser.add_argument("--ssh", default=SSH_COMMAND, help="SSH command")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="hosts collected at once")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="per-host timeout (s)")
+    parser.add_argument("--reparse", action="store_true",
+                        help="rebuild the records from the saved raw output instead of collecting")
+    args = parser.parse_args()
+
+    if args.reparse:
+        hosts = args.hosts or sorted(p.stem for p in args.output.glob("[!.]*.json"))
+        for host in hosts:
+            record = write_inventory(load_raw(args.output, host), args.output)
+            print(f"✅ {host}: {summary(record)}")
+        return
+
+    group = inventory_hosts(args.inventory, args.group)
+    hosts = {host: group.get(host) for host in args.hosts} if args.hosts else group
+    print(f"🔍 Inventorying {len(hosts)} hosts (up to {args.concurrency} at once)")
+    start = time.perf_counter()
+    results = asyncio.run(collect_all(hosts, args.output, args.concurrency, user=args.user,
+                                      ssh_command=args.ssh, timeout=args.timeout))
+    failed = [host for host, result in results.items() if isinstance(result, Exception)]
+    print(f"\n{'⚠️ ' if failed else '✅'} {len(results) - len(failed)}/{len(results)} hosts "
+          f"in {time.perf_counter() - start:.1f}s → {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Supersampled Icon Geometry
+
+Vector drawing layer for the Pillow-drawn Discord icons. Symbols are described
+in symbol units: (0, 0) is the symbol's center and 1.0 its size. Vertices are
+built as NumPy arrays (rays, mirrored wings and thick line segments are
+generated in batch) and mapped to pixels with one affine transform per shape
+group.
+
+Icons are painted once at SUPERSAMPLE× their size. That canvas is
+box-reduced to the base size in premultiplied alpha, which antialiases every
+edge. Each smaller Discord size (128/64/32/16) is then derived from the base,
+so no size is rendered on its own: by another exact box reduce when it
+divides the base size (the true pixel coverage, where LANCZOS would ring at
+16px), otherwise by LANCZOS.
+
+Usage:
+    from icon_geometry import Pen, rays, supersample
+
+    def paint(draw, size):
+        pen = Pen(draw, (size / 2, size / 2), size * 0.5)
+        pen.circle((0, 0), 1 / 3, "white")
+        pen.polygons(rays(8, 0.37, 0.5, 1 / 8), "white")
+
+    images = supersample(paint, 512)   # {512: png, 128: png, ..., 16: png}
+"""
+
+from io import BytesIO
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+SUPERSAMPLE = 4
+DISCORD_SIZES = (512, 128, 64, 32, 16)
+
+
+def polar(radius, degrees) -> np.ndarray:
+    """Points at `radius` and `degrees` (clockwise on screen, 0° pointing right)."""
+    theta = np.radians(degrees)
+    return np.stack([radius * np.cos(theta), radius * np.sin(theta)], axis=-1)
+
+
+def mirrored(points) -> np.ndarray:
+    """A shape and its reflection across the vertical axis, as a batch of two."""
+    points = np.asarray(points, dtype=float)
+    return np.stack([points, points * (-1, 1)])
+
+
+def thick_segments(starts, ends, width) -> np.ndarray:
+    """Quads (n, 4, 2) for line segments of `width` with flat ends, like ImageDraw.line."""
+    starts = np.atleast_2d(np.asarray(starts, dtype=float))
+    ends = np.atleast_2d(np.asarray(ends, dtype=float))
+    direction = ends - starts
+    normal = np.stack([-direction[:, 1], direction[:, 0]], axis=-1)
+    normal /= np.linalg.norm(normal, axis=-1, keepdims=True)
+    offset = normal * np.reshape(np.asarray(width, dtype=float), (-1, 1)) / 2
+    return np.stack([starts + offset, ends + offset, ends - offset, starts - offset], axis=1)
+
+
+def rays(count: int, inner: float, outer: float, width: float, phase: float = 0.0) -> np.ndarray:
+    """`count` evenly spaced rays from radius `inner` to `outer`, as quads."""
+    angles = phase + np.arange(count) * 360.0 / count
+    return thick_segments(polar(inner, angles), polar(outer, angles), width)
+
+
+class Pen:
+    """Draws symbol-unit geometry onto an ImageDraw at a given center and size."""
+
+    def __init__(self, draw: ImageDraw.ImageDraw, center: Sequence[float], size: float):
+        self.draw = draw
+        self.center = np.asarray(center, dtype=float)
+        self.size = float(size)
+
+    def _xy(self, points) -> np.ndarray:
+        return self.center + np.asarray(points, dtype=float) * self.size
+
+    def _width(self, width: float) -> int:
+        return max(1, round(width * self.size))
+
+    def polygons(self, shapes, fill) -> None:
+        """A batch (n, k, 2) of k-vertex polygons."""
+        for shape in self._xy(shapes):
+            self.draw.polygon(shape.ravel().tolist(), fill=fill)
+
+    def polygon(self, points, fill) -> None:
+        self.polygons([points], fill)
+
+    def segments(self, starts, ends, width, fill) -> None:
+        self.polygons(thick_segments(starts, ends, width), fill)
+
+    def ellipses(self, boxes, fill, outline: Optional[str] = None, width: float = 0) -> None:
+        """Ellipses inscribed in (x0, y0, x1, y1) boxes."""
+        line = self._width(width) if outline else 0
+        for box in self._xy(np.reshape(boxes, (-1, 2, 2))):
+            self.draw.ellipse(box.ravel().tolist(), fill=fill, outline=outline, width=line)
+
+    def ellipse(self, box, fill, outline: Optional[str] = None, width: float = 0) -> None:
+        self.ellipses([box], fill, outline, width)
+
+    def circles(self, centers, radius: float, fill, outline: Optional[str] = None, width: float = 0) -> None:
+        centers = np.reshape(np.asarray(centers, dtype=float), (-1, 2))
+        self.ellipses(np.concatenate([centers - radius, centers + radius], axis=1), fill, outline, width)
+
+    def circle(self, center, radius: float, fill, outline: Optional[str] = None, width: float = 0) -> None:
+        self.circles([center], radius, fill, outline, width)
+
+    def rectangles(self, boxes, fill) -> None:
+        for box in self._xy(np.reshape(boxes, (-1, 2, 2))):
+            self.draw.rectangle(box.ravel().tolist(), fill=fill)
+
+    def rectangle(self, box, fill) -> None:
+        self.rectangles([box], fill)
+
+
+def supersample(
+    paint: Callable[[ImageDraw.ImageDraw, int], None],
+    size: int = 512,
+    sizes: Sequence[int] = DISCORD_SIZES,
+    factor: int = SUPERSAMPLE,
+) -> Dict[int, bytes]:
+    """Paint once at `factor`× `size` and return size → PNG bytes for every size in `sizes`.
+
+    `paint(draw, canvas_size)` draws a whole icon on a transparent square
+    canvas of `canvas_size` pixels, scaling everything from it.
+    """
+    canvas = Image.new("RGBA", (size * factor, size * factor), (255, 255, 255, 0))
+    paint(ImageDraw.Draw(canvas), size * factor)
+    # Premultiplied, so transparent pixels don't bleed their color into edges
+    base = canvas.convert("RGBa").reduce(factor) if factor > 1 else canvas.convert("RGBa")
+
+    images: Dict[int, bytes] = {}
+    for target in sizes:
+        if target == size:
+            img = base
+        elif size % target == 0:
+            img = base.reduce(size // target)
+        else:
+            img = base.resize((target, target), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        buffer = BytesIO()
+        img.convert("RGBA").save(buffer, format="PNG")
+        images[target] = buffer.getvalue()
+    return images
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Shared Icon Render Pipeline
+
+Renders Pillow-drawn icons for the Discord scripts with a content-addressed
+cache. Each icon's cache key is a SHA-256 over its config (symbol, color,
+name), the render parameters (size, font) and the source of the module that
+draws it (and of the local modules it draws with), so editing a draw_*
+function invalidates exactly the icons that module renders. Cache hits are
+read straight from disk; misses are rendered in a process pool. Every icon is
+PNG-encoded once, and those bytes are both written to the output directory
+and returned for upload. A renderer that emits several sizes from one render
+(icon_geometry.supersample) has each size cached and written next to the
+others.
+
+Usage:
+    from icon_pipeline import render_icons
+
+    images = render_icons(render_icon, {"zeus": {...}}, Path("assets/icons"), sizes=(512, 64), size=512)
+    upload(images["zeus"])
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Union
+
+CACHE_DIR = Path("assets/.cache/icons")
+
+_SOURCE_DIGESTS: Dict[str, str] = {}
+
+
+DRAWING_PREFIXES = ("draw_", "paint_", "render_")
+
+
+def _names_used(code) -> set:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names_used(const)
+    return names
+
+
+def _source_digest(render: Callable) -> str:
+    """SHA-256 of the file that defines `render` (and its draw_* helpers), plus
+    the files of local modules those drawing functions use (e.g. icon_geometry.py)."""
+    path = inspect.getsourcefile(render)
+    if path not in _SOURCE_DIGESTS:
+        namespace = vars(inspect.getmodule(render))
+        used = set()
+        for name, value in namespace.items():
+            if inspect.isfunction(value) and name.startswith(DRAWING_PREFIXES):
+                used |= _names_used(value.__code__)
+        files = {Path(path)}
+        for name in used:
+            source = getattr(inspect.getmodule(namespace.get(name)), "__file__", None)
+            if source and Path(source).parent == Path(path).parent:
+                files.add(Path(source))
+        digest = hashlib.sha256()
+        for file in sorted(files):
+            digest.update(file.read_bytes())
+        _SOURCE_DIGESTS[path] = digest.hexdigest()
+    return _SOURCE_DIGESTS[path]
+
+
+def asset_key(render: Callable, config: dict, **params) -> str:
+    """Content hash identifying one rendered icon."""
+    payload = {
+        "renderer": f"{Path(inspect.getsourcefile(render)).stem}.{render.__qualname__}",
+        "source": _source_digest(render),
+        "config": config,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def render_icons(
+    render: Callable[[dict], Union[bytes, Dict[int, bytes]]],
+    configs: Dict[str, dict],
+    output_dir: Path,
+    cache_dir: Path = CACHE_DIR,
+    workers: Optional[int] = None,
+    sizes: Sequence[int] = (),
+    **params,
+) -> Dict[str, bytes]:
+    """Render every config to output_dir/<name>.png, reusing cached PNGs.
+
+    `render(config)` must be a module-level function returning PNG bytes so
+    it can run in a worker process. With `sizes`, it returns size → PNG bytes
+    for each of them instead (one render, several downsamples): the largest
+    goes to output_dir/<name>.png and the rest to output_dir/<size>/<name>.png.
+    `params` (size, font, ...) and `sizes` are folded into the cache key.
+    Returns name → PNG bytes of the (largest) icon, in the order of `configs`.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # None stands for the single image of a render that returns plain bytes
+    variants = sorted(sizes, reverse=True) or [None]
+    if sizes:
+        params["sizes"] = variants
+
+    def cache_path(key: str, size: Optional[int]) -> Path:
+        return cache_dir / (f"{key}.png" if size is None else f"{key}-{size}.png")
+
+    def output_path(name: str, size: Optional[int]) -> Path:
+        if size == variants[0]:
+            return output_dir / f"{name}.png"
+        return output_dir / str(size) / f"{name}.png"
+
+    keys = {name: asset_key(render, config, **params) for name, config in configs.items()}
+    images: Dict[str, Dict[Optional[int], bytes]] = {}
+    misses = []
+    for name, key in keys.items():
+        if all(cache_path(key, size).exists() for size in variants):
+            images[name] = {size: cache_path(key, size).read_bytes() for size in variants}
+        else:
+            misses.append(name)
+
+    if misses:
+        if len(misses) == 1 or workers == 1:
+            rendered = [render(configs[name]) for name in misses]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(misses))) as pool:
+                rendered = list(pool.map(render, [configs[name] for name in misses]))
+        for name, data in zip(misses, rendered):
+            images[name] = data if sizes else {None: data}
+            for size in variants:
+                _write_atomic(cache_path(keys[name], size), images[name][size])
+
+    for name in configs:
+        for size in variants:
+            path = output_path(name, size)
+            data = images[name][size]
+            path.parent.mkdir(exist_ok=True)
+            if not path.exists() or path.read_bytes() != data:
+                _write_atomic(path, data)
+        status = "✅ Generated" if name in misses else "♻️  Cached"
+        extra = f" (+ {', '.join(f'{size}px' for size in variants[1:])})" if len(variants) > 1 else ""
+        print(f"{status}: {output_path(name, variants[0]).name}{extra}")
+
+    return {name: images[name][variants[0]] for name in configs}
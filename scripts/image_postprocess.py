@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Generated Image Post-Processing
+
+Turns one downloaded image file into every size derived from it (avatar, app
+icon, banner, thumbnails) with a single decode:
+
+  1. For JPEGs, Image.draft asks the decoder for the smallest DCT scale
+     (1/2, 1/4, 1/8) that still leaves REDUCING_GAP times the largest target,
+     so a large photo is never decoded at full size. Other formats ignore it.
+  2. For each target size, Image.reduce does a cheap integer box downscale to
+     no less than REDUCING_GAP times the target. Reduced copies are shared
+     between targets that need the same factor.
+  3. A final LANCZOS resize produces the exact size. This is the same quality
+     as a LANCZOS resize from full size, since the box stage stops well above
+     the target, as Pillow's own reducing_gap does.
+
+Each distinct size is PNG-encoded once and written atomically to every path
+that wants it. The source is read from disk (replicate_jobs.py streams
+downloads there), so the response body is never held in memory next to the
+decoded image.
+
+Usage:
+    from image_postprocess import derive_images
+
+    derive_images(Path("download.png"), {"assets/banners/zeus.png": (960, 540),
+                                         "assets/thumbnails/zeus.png": (128, 72)})
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+from PIL import Image
+
+REDUCING_GAP = 2.0
+
+
+def _area(size: Tuple[int, int]) -> int:
+    return size[0] * size[1]
+
+
+def _reduce_factor(source: Tuple[int, int], target: Tuple[int, int], gap: float) -> int:
+    """Largest integer box-reduce that keeps at least `gap` times the target on both axes."""
+    return max(1, min(int(source[0] // (target[0] * gap)), int(source[1] // (target[1] * gap))))
+
+
+def derive_images(
+    source: Path,
+    outputs: Dict[str, Tuple[int, int]],
+    reducing_gap: float = REDUCING_GAP,
+) -> Dict[Tuple[int, int], int]:
+    """Write `source` resized to each output path → (width, height).
+
+    Returns size → encoded PNG length, one entry per distinct size.
+    """
+    sizes = sorted(set(map(tuple, outputs.values())), key=_area, reverse=True)
+    encoded: Dict[Tuple[int, int], bytes] = {}
+    with Image.open(source) as img:
+        largest = sizes[0]
+        img.draft(None, (int(largest[0] * reducing_gap), int(largest[1] * reducing_gap)))
+        img.load()
+
+        reduced = {1: img}
+        for size in sizes:
+            factor = _reduce_factor(img.size, size, reducing_gap)
+            if factor not in reduced:
+                reduced[factor] = img.reduce(factor)
+            derived = reduced[factor].resize(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            derived.save(buffer, format="PNG")
+            encoded[size] = buffer.getvalue()
+        del reduced
+
+    for path, size in outputs.items():
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(encoded[tuple(size)])
+        os.replace(tmp, path)
+    return {size: len(data) for size, data in encoded.items()}
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Hardware Inventory Index
+
+Loads every hardware inventory collection into one SQLite database, so
+capacity and drift questions are queries instead of greps over
+docs/inventory/*.json. The collections come from the working tree and from
+every committed version of those files in git history. Each version is read
+once: git blobs are listed with one `git log --raw` and read with one
+`git cat-file --batch`, and a blob already in the index is never parsed
+again. Legacy playbook files are parsed with hardware_inventory.py.
+
+A collection is (host, collected_at). Its components are rows keyed by
+(host, component, key, collected_at), e.g. dimm/DIMM_A1, disk/sdb, nic/nic0,
+pool/sas-data, vdev/sas-data/raidz2-0, pci/03:00.0, plus system, cpu and
+memory. The rows are stored in key order, so one slot's history is a
+contiguous range and drift queries are a window over it. Each row keeps
+serial, model and size as columns and the full record as JSON. The index
+lives at ~/.cache/olympus/inventory.sqlite and can always be rebuilt.
+
+Usage:
+    python3 scripts/inventory_index.py hosts
+    python3 scripts/inventory_index.py free-slots
+    python3 scripts/inventory_index.py serial-changes --since 2026-03-01
+    python3 scripts/inventory_index.py diff r820.infiquetra.com            # last two collections
+    python3 scripts/inventory_index.py diff r820.infiquetra.com --from 2026-03-08
+    python3 scripts/inventory_index.py sql "SELECT host, key, serial FROM components WHERE component = 'disk'"
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import hardware_inventory
+
+CACHE_DIR = Path.home() / ".cache" / "olympus"
+DB_PATH = CACHE_DIR / "inventory.sqlite"
+REPO_ROOT = hardware_inventory.REPO_ROOT
+INVENTORY_DIR = "docs/inventory"
+# Stored as PRAGMA user_version with hardware_inventory.FORMAT; a mismatch rebuilds the index
+SCHEMA_VERSION = 1
+USER_VERSION = SCHEMA_VERSION * 100 + hardware_inventory.FORMAT
+
+# Usage counters, not hardware: ignored when diffing collections
+VOLATILE = {"alloc_bytes", "free_bytes", "cap_pct", "frag_pct", "scan", "wearout", "errors",
+            "pve_version", "kernel", "active"}
+
+# How print_diff words a component that appeared or disappeared
+DESCRIBED = {"+": "added", "-": "removed"}
+
+SCHEMA = """
+CREATE TABLE sources (
+    blob TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    collection_id INTEGER
+);
+CREATE TABLE collections (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    collected_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    product TEXT,
+    serial TEXT,
+    sockets INTEGER,
+    threads INTEGER,
+    memory_bytes INTEGER,
+    max_memory_bytes INTEGER,
+    dimm_slots INTEGER,
+    dimms INTEGER,
+    UNIQUE (host, collected_at)
+);
+-- Clustered by slot then time, so a slot's history is one contiguous range
+CREATE TABLE components (
+    host TEXT NOT NULL,
+    component TEXT NOT NULL,
+    key TEXT NOT NULL,
+    collected_at TEXT NOT NULL,
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    serial TEXT,
+    model TEXT,
+    size_bytes INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (host, component, key, collected_at)
+) WITHOUT ROWID;
+CREATE INDEX components_collection ON components (collection_id, component);
+CREATE INDEX components_serial ON components (serial);
+CREATE VIEW latest AS
+    SELECT * FROM collections c
+    WHERE collected_at = (SELECT MAX(collected_at) FROM collections WHERE host = c.host);
+"""
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    """Open (creating or rebuilding on a schema change) the index database."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    if db.execute("PRAGMA user_version").fetchone()[0] != USER_VERSION:
+        db.close()
+        path.unlink(missing_ok=True)
+        db = sqlite3.connect(path)
+        db.row_factory = sqlite3.Row
+        db.executescript(SCHEMA)
+        db.execute(f"PRAGMA user_version = {USER_VERSION}")
+    return db
+
+
+# ---------------------------------------------------------------------------
+# Ingest
+# ---------------------------------------------------------------------------
+
+
+def blob_id(data: bytes) -> str:
+    """The id git gives `data` as a blob, so working-tree files dedupe against history."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def record_from(data: bytes) -> Optional[Dict[str, Any]]:
+    """A parsed inventory record from a file's bytes (legacy or current format), or None."""
+    try:
+        doc = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if hardware_inventory.is_legacy(doc):
+        return hardware_inventory.parse_inventory(hardware_inventory.raw_from_legacy(doc))
+    return doc if doc.get("format") == hardware_inventory.FORMAT else None
+
+
+def components(record: Dict[str, Any]) -> Iterator[Tuple[str, str, Optional[str], Optional[str], Optional[int], dict]]:
+    """(component, key, serial, model, size_bytes, data) rows for one record."""
+    system = record["system"]
+    yield "system", "system", system.get("serial"), system.get("product"), None, system
+    yield "cpu", "cpu", None, record["cpu"].get("model"), None, record["cpu"]
+    memory = {k: v for k, v in record["memory"].items() if k != "dimms"}
+    yield "memory", "memory", None, None, memory["total_bytes"], memory
+    for dimm in record["memory"]["dimms"]:
+        yield "dimm", dimm["locator"], dimm.get("serial"), dimm.get("part_number"), dimm["size_bytes"], dimm
+    for disk in record["disks"]:
+        yield "disk", disk["device"], disk.get("serial"), disk.get("model"), disk.get("size_bytes"), disk
+    for nic in record["nics"]:
+        yield "nic", nic["name"], nic.get("mac"), nic.get("model"), None, nic
+    for pci in record["pci"]:
+        yield "pci", pci["slot"], None, f"{pci['vendor']} {pci['device']}", None, pci
+    for pool in record["pools"]:
+        yield "pool", pool["name"], None, None, pool.get("size_bytes"), {k: v for k, v in pool.items() if k != "vdevs"}
+        for vdev in pool["vdevs"]:
+            yield "vdev", f"{pool['name']}/{vdev['name']}", None, vdev["type"], vdev.get("size_bytes"), vdev
+
+
+def add_record(db: sqlite3.Connection, record: Dict[str, Any], source: str) -> Optional[int]:
+    """Insert a collection and its components; None if (host, collected_at) is already indexed."""
+    memory, cpu = record["memory"], record["cpu"]
+    cursor = db.execute(
+        "INSERT OR IGNORE INTO collections (host, collected_at, source, product, serial, sockets, threads,"
+        " memory_bytes, max_memory_bytes, dimm_slots, dimms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (record["host"], record["collected_at"], source, record["system"].get("product"),
+         record["system"].get("serial"), cpu.get("sockets"), cpu.get("threads"), memory["total_bytes"],
+         memory.get("max_bytes"), memory["slots"], len(memory["dimms"])))
+    if not cursor.rowcount:
+        return None
+    collection_id = cursor.lastrowid
+    db.executemany(
+        "INSERT OR REPLACE INTO components VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(record["host"], component, key, record["collected_at"], collection_id, serial, model, size,
+          json.dumps(data, sort_keys=True))
+         for component, key, serial, model, size, data in components(record)])
+    return collection_id
+
+
+def git_blobs(repo: Path, directory: str = INVENTORY_DIR) -> Dict[str, str]:
+    """blob id → path of every version of <directory>/*.json in the repo's history."""
+    try:
+        log = subprocess.run(
+            ["git", "-C", str(repo), "log", "--all", "--format=", "--raw", "--no-abbrev", "--no-renames",
+             "--", f"{directory}/*.json"],
+            capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    blobs = {}
+    for line in log.splitlines():
+        meta, _, path = line.partition("\t")
+        fields = meta.split()
+        if len(fields) == 5 and fields[3].strip("0"):
+            blobs.setdefault(fields[3], path)
+    return blobs
+
+
+def read_blobs(repo: Path, blob_ids: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """Contents of `blob_ids`, all through one `git cat-file --batch`."""
+    if not blob_ids:
+        return
+    proc = subprocess.run(["git", "-C", str(repo), "cat-file", "--batch"],
+                          input="\n".join(blob_ids).encode() + b"\n", capture_output=True, check=True)
+    out, offset = proc.stdout, 0
+    for blob in blob_ids:
+        header_end = out.index(b"\n", offset)
+        header = out[offset:header_end].split()
+        if header[-1] == b"missing":
+            offset = header_end + 1
+            continue
+        size = int(header[2])
+        yield blob, out[header_end + 1:header_end + 1 + size]
+        offset = header_end + 1 + size + 1
+
+
+def update(db: sqlite3.Connection, repo: Path = REPO_ROOT, directory: str = INVENTORY_DIR,
+           history: bool = True) -> Dict[str, int]:
+    """Index every not-yet-seen inventory file version; returns counts of what was done."""
+    known = {row[0] for row in db.execute("SELECT blob FROM sources")}
+    pending: Dict[str, Tuple[str, Optional[bytes]]] = {}
+    if history:
+        pending.update({blob: (path, None) for blob, path in git_blobs(repo, directory).items() if blob not in known})
+    for path in sorted((repo / directory).glob("[!.]*.json")):
+        data = path.read_bytes()
+        blob = blob_id(data)
+        if blob not in known:
+            pending[blob] = (str(path.relative_to(repo)), data)
+
+    missing = [blob for blob, (_, data) in pending.items() if data is None]
+    contents = {blob: data for blob, (_, data) in pending.items() if data is not None}
+    contents.update(read_blobs(repo, missing))
+
+    stats = {"files": 0, "collections": 0, "skipped": 0}
+    with db:
+        for blob, data in contents.items():
+            path = pending[blob][0]
+            record = record_from(data)
+            collection_id = add_record(db, record, path) if record else None
+            db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (blob, path, collection_id))
+            stats["files"] += 1
+            stats["collections" if collection_id else "skipped"] += 1
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def hosts(db: sqlite3.Connection) -> List[sqlite3.Row]:
+    return db.execute("SELECT l.*, (SELECT COUNT(*) FROM collections WHERE host = l.host) AS collections"
+                      " FROM latest l ORDER BY host").fetchall()
+
+
+def free_slots(db: sqlite3.Connection) -> List[sqlite3.Row]:
+    """Hosts whose latest collection has empty DIMM slots."""
+    return db.execute(
+        "SELECT host, collected_at, dimm_slots, dimms, dimm_slots - dimms AS free, memory_bytes, max_memory_bytes,"
+        " (SELECT json_extract(data, '$.type') || ' ' || (size_bytes >> 30) || ' GiB'"
+        "  FROM components WHERE collection_id = latest.id AND component = 'dimm'"
+        "  GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1) AS typical"
+        " FROM latest WHERE dimm_slots > dimms ORDER BY free DESC, host").fetchall()
+
+
+def serial_changes(db: sqlite3.Connection, since: str = "", component_kinds: Tuple[str, ...] = ("disk", "dimm")
+                   ) -> List[sqlite3.Row]:
+    """Slots whose serial differs from the previous collection of the same host."""
+    marks = ", ".join("?" * len(component_kinds))
+    return db.execute(
+        "SELECT * FROM ("
+        "  SELECT host, collected_at, component, key, serial, model,"
+        "         LAG(serial) OVER w AS previous_serial, LAG(collected_at) OVER w AS previous_at"
+        f" FROM components WHERE component IN ({marks})"
+        "  WINDOW w AS (PARTITION BY host, component, key ORDER BY collected_at))"
+        " WHERE previous_at IS NOT NULL AND serial IS NOT previous_serial AND collected_at >= ?"
+        " ORDER BY collected_at, host, component, key",
+        (*component_kinds, since)).fetchall()
+
+
+def collections(db: sqlite3.Connection, host: str) -> List[sqlite3.Row]:
+    return db.execute("SELECT * FROM collections WHERE host = ? ORDER BY collected_at", (host,)).fetchall()
+
+
+def find_collection(db: sqlite3.Connection, host: str, at: Optional[str], offset: int) -> Optional[sqlite3.Row]:
+    """The collection of `host` at or before `at` (a collected_at prefix), else `offset` from the latest."""
+    runs = collections(db, host)
+    if at:
+        runs = [run for run in runs if run["collected_at"] <= at or run["collected_at"].startswith(at)]
+        return runs[-1] if runs else None
+    return runs[offset] if len(runs) >= -offset else None
+
+
+def diff(db: sqlite3.Connection, old_id: int, new_id: int) -> List[Tuple[str, str, str, Dict[str, Tuple]]]:
+    """(component, key, '+'/'-'/'~', {field: (old, new)}) between two collections, usage counters ignored."""
+    def load(collection_id: int) -> Dict[Tuple[str, str], dict]:
+        return {(row["component"], row["key"]): json.loads(row["data"]) for row in db.execute(
+            "SELECT component, key, data FROM components WHERE collection_id = ?", (collection_id,))}
+
+    old, new = load(old_id), load(new_id)
+    changes = []
+    for slot in sorted(old.keys() | new.keys()):
+        if slot not in new:
+            changes.append((*slot, "-", {}))
+        elif slot not in old:
+            changes.append((*slot, "+", {}))
+        else:
+            fields = {name: (old[slot].get(name), new[slot].get(name))
+                      for name in old[slot].keys() | new[slot].keys()
+                      if name not in VOLATILE and old[slot].get(name) != new[slot].get(name)}
+            if fields:
+                changes.append((*slot, "~", dict(sorted(fields.items()))))
+    return changes
+
+
+def _gib(size: Optional[int]) -> str:
+    return f"{size / (1 << 30):.0f} GiB" if size else "?"
+
+
+def print_diff(db: sqlite3.Connection, host: str, old: sqlite3.Row, new: sqlite3.Row) -> int:
+    changes = diff(db, old["id"], new["id"])
+    print(f"{host}: {old['collected_at']} → {new['collected_at']}")
+    for component, key, change, fields in changes:
+        if change in DESCRIBED:
+            row = db.execute("SELECT serial, model, size_bytes FROM components WHERE collection_id = ?"
+                             " AND component = ? AND key = ?",
+                             (new["id"] if change == "+" else old["id"], component, key)).fetchone()
+            detail = ", ".join(filter(None, (row["model"], row["serial"] and f"serial {row['serial']}",
+                                             row["size_bytes"] and _gib(row["size_bytes"]))))
+            print(f"  {change} {component} {key} {DESCRIBED[change]}" + (f" ({detail})" if detail else ""))
+        else:
+            print(f"  ~ {component} {key}: " + ", ".join(f"{name} {a!r} → {b!r}" for name, (a, b) in fields.items()))
+    if not changes:
+        print("  (no hardware changes)")
+    return len(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="index database")
+    parser.add_argument("--repo", type=Path, default=REPO_ROOT, help="repository to read docs/inventory from")
+    parser.add_argument("--no-history", action="store_true", help="index the working tree only, not git history")
+    parser.add_argument("--no-update", action="store_true", help="query the index as it is")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("update", help="index new collections and exit")
+    commands.add_parser("hosts", help="latest collection of every host")
+    commands.add_parser("free-slots", help="hosts with empty DIMM slots")
+    serials = commands.add_parser("serial-changes", help="disks and DIMMs whose serial changed")
+    serials.add_argument("--since", default="", help="only changes collected on or after this date")
+    serials.add_argument("--component", action="append", help="component kinds (default: disk, dimm)")
+    diff_cmd = commands.add_parser("diff", help="hardware diff between two collections of a host")
+    diff_cmd.add_argument("host")
+    diff_cmd.add_argument("--from", dest="old", help="collected_at (or prefix) to diff from (default: previous)")
+    diff_cmd.add_argument("--to", dest="new", help="collected_at (or prefix) to diff to (default: latest)")
+    history_cmd = commands.add_parser("history", help="collections of a host")
+    history_cmd.add_argument("host")
+    sql_cmd = commands.add_parser("sql", help="run a query against the index")
+    sql_cmd.add_argument("query")
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if not args.no_update:
+        start = time.perf_counter()
+        stats = update(db, args.repo, history=not args.no_history)
+        if stats["files"] or args.command == "update":
+            print(f"📥 Indexed {stats['collections']} new collections from {stats['files']} files "
+                  f"({stats['skipped']} already indexed or unreadable) in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.command in (None, "hosts"):
+        print(f"{'host':<24} {'collected':<21} {'model':<16} {'CPU':>8} {'memory':>9} {'DIMMs':>7} {'runs':>5}")
+        for row in hosts(db):
+            print(f"{row['host']:<24} {row['collected_at']:<21} {row['product'] or '?':<16} "
+                  f"{row['sockets']}s/{row['threads']}t {_gib(row['memory_bytes']):>9} "
+                  f"{row['dimms']:>3}/{row['dimm_slots']:<3} {row['collections']:>5}")
+    elif args.command == "free-slots":
+        rows = free_slots(db)
+        for row in rows:
+            print(f"{row['host']:<24} {row['free']:>3} of {row['dimm_slots']} slots free "
+                  f"({_gib(row['memory_bytes'])} installed, max {_gib(row['max_memory_bytes'])}, "
+                  f"mostly {row['typical']})")
+        if not rows:
+            print("✅ Every DIMM slot is populated")
+    elif args.command == "serial-changes":
+        rows = serial_changes(db, args.since, tuple(args.component or ("disk", "dimm")))
+        for row in rows:
+            print(f"{row['collected_at']}  {row['host']:<24} {row['component']} {row['key']}: "
+                  f"{row['previous_serial'] or '(none)'} → {row['serial'] or '(none)'}  {row['model'] or ''}")
+        if not rows:
+            print("✅ No serial changes")
+    elif args.command == "diff":
+        old = find_collection(db, args.host, args.old, -2)
+        new = find_collection(db, args.host, args.new, -1)
+        if not old or not new:
+            print(f"❌ Need two collections of {args.host} ({len(collections(db, args.host))} indexed)")
+            sys.exit(1)
+        print_diff(db, args.host, old, new)
+    elif args.command == "history":
+        for row in collections(db, args.host):
+            print(f"{row['collected_at']}  {_gib(row['memory_bytes']):>9} in {row['dimms']}/{row['dimm_slots']} DIMMs"
+                  f"  {row['source']}")
+    elif args.command == "sql":
+        cursor = db.execute(args.query)
+        print("\t".join(column[0] for column in cursor.description or ()))
+        for row in cursor:
+            print("\t".join("" if value is None else str(value) for value in row))
+    if args.command != "update":
+        print(f"\n⏱️  {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
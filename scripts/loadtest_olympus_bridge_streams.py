@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Olympus Bridge Streams Load Test
+
+Starts a throwaway redis-server, renders the bridge in streams mode against a
+fake Discord webhook, and XADDs events into olympus:discord:* streams. Partway
+through delivery the bridge is SIGKILLed, the rest of the events are published
+while it is down, and a fresh bridge is started. Every event carries a unique
+id; the test fails if any of them never reaches the webhook. Duplicates are
+reported but allowed (delivery is at-least-once). The restarted bridge's
+/metrics is scraped at the end for its POST and XADD-to-Discord lag figures.
+
+Needs redis-server >= 6.2 (XAUTOCLAIM) on PATH or via --redis-server.
+
+Usage:
+    uv run --with aiohttp --with redis --with jinja2 --with pyyaml \
+      python3 scripts/loadtest_olympus_bridge_streams.py --events 100000 --channels 16
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.request import urlopen
+
+import redis.asyncio as redis
+from prometheus_client.parser import text_string_to_metric_families
+
+from bench_olympus_bridge import FakeWebhook, render_bridge
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_redis(binary: str, port: int, workdir: str) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [binary, "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no", "--dir", workdir],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"redis-server did not start on port {port}")
+
+
+def start_bridge(path: Path, log_file) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=str(SCRIPTS_DIR))
+    return subprocess.Popen([sys.executable, str(path)], env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+async def publish(r: redis.Redis, first: int, last: int, channels: int, maxlen: int) -> None:
+    """XADD events first..last-1 the way agents do, MAXLEN ~ included."""
+    batch = 1000
+    for start in range(first, last, batch):
+        async with r.pipeline(transaction=False) as pipe:
+            for i in range(start, min(start + batch, last)):
+                pipe.xadd(f"olympus:discord:load-{i % channels}", {"message": f"evt-{i}"},
+                          maxlen=maxlen, approximate=True)
+            await pipe.execute()
+
+
+def delivered(webhook: FakeWebhook) -> Counter:
+    return Counter(line.rsplit(" ", 1)[-1] for line in webhook.lines)
+
+
+def scrape(port: int) -> dict:
+    """Flatten the bridge's /metrics into {sample name: summed value}."""
+    samples: dict = {}
+    with urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+        for family in text_string_to_metric_families(resp.read().decode()):
+            for sample in family.samples:
+                samples[sample.name] = samples.get(sample.name, 0) + sample.value
+    return samples
+
+
+async def wait_until(predicate, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+
+async def main_async(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="olympus-loadtest-")
+    port = free_port()
+    metrics_port = free_port()
+    redis_proc = start_redis(args.redis_server, port, workdir)
+    webhook = FakeWebhook(args.latency)
+    await webhook.start()
+    bridge_path = render_bridge(
+        webhook.url,
+        redis_port=port,
+        bridge_mode="streams",
+        bridge_claim_idle_ms=args.claim_idle_ms,
+        bridge_stream_maxlen=args.maxlen,
+        bridge_poll_interval=1,
+        bridge_metrics_port=metrics_port,
+    )
+    log_path = Path(workdir) / "bridge.log"
+    r = redis.Redis(host="127.0.0.1", port=port, decode_responses=True)
+
+    print("Olympus Bridge Streams Load Test")
+    print("=" * 55)
+    print(f"{args.events:,} events over {args.channels} streams, kill after {args.kill_at:.0%} delivered")
+    print(f"Redis :{port}, bridge log: {log_path}\n")
+
+    half = args.events // 2
+    bridge = None
+    try:
+        with open(log_path, "w") as log_file:
+            start = time.perf_counter()
+            bridge = start_bridge(bridge_path, log_file)
+            await publish(r, 0, half, args.channels, args.maxlen)
+            print(f"📤 Published {half:,} events")
+
+            target = int(half * args.kill_at)
+            await wait_until(lambda: len(webhook.lines) >= target, args.timeout)
+            bridge.send_signal(signal.SIGKILL)
+            bridge.wait()
+            before = len(webhook.lines)
+            print(f"💥 SIGKILLed bridge after {before:,} delivered lines")
+
+            await publish(r, half, args.events, args.channels, args.maxlen)
+            print(f"📤 Published {args.events - half:,} more events while the bridge was down")
+
+            bridge = start_bridge(bridge_path, log_file)
+            print("🔁 Restarted bridge")
+            expected = {f"evt-{i}" for i in range(args.events)}
+            await wait_until(lambda: expected <= delivered(webhook).keys(), args.timeout)
+            elapsed = time.perf_counter() - start
+            metrics = scrape(metrics_port)
+    finally:
+        if bridge and bridge.poll() is None:
+            bridge.terminate()
+            bridge.wait()
+        await r.aclose()
+        await webhook.stop()
+        redis_proc.terminate()
+        redis_proc.wait()
+
+    seen = delivered(webhook)
+    missing = expected - seen.keys()
+    duplicates = sum(count - 1 for count in seen.values() if count > 1)
+    print(f"\nDelivered {len(seen):,}/{args.events:,} unique events in {elapsed:.1f}s "
+          f"({webhook.posts:,} webhook POSTs)")
+    print(f"Duplicates (replayed after the kill): {duplicates:,}")
+    lag_count = metrics.get("olympus_bridge_delivery_lag_seconds_count", 0)
+    if lag_count:
+        print(f"Restarted bridge: {metrics.get('olympus_bridge_discord_posts_total', 0):,.0f} POSTs, "
+              f"{metrics.get('olympus_bridge_discord_retry_after_seconds_count', 0):,.0f} 429s, "
+              f"mean XADD→Discord lag {metrics['olympus_bridge_delivery_lag_seconds_sum'] / lag_count:.2f}s")
+    if missing:
+        print(f"❌ {len(missing):,} events lost, e.g. {sorted(missing)[:5]}")
+        return 1
+    print("✅ No events lost across the restart")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--kill-at", type=float, default=0.3, help="fraction of the first half delivered before SIGKILL")
+    parser.add_argument("--maxlen", type=int, default=10_000, help="approximate per-stream MAXLEN")
+    parser.add_argument("--claim-idle-ms", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated webhook latency (s)")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--redis-server", default="redis-server")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Paginated Guild Member Index
+
+Lists every member of a guild by paging GET /guilds/{id}/members with
+`limit=1000&after=<last user id>` until a short page comes back. One request
+with `?limit=1000` silently drops everyone past the first thousand. Members
+are indexed once by id and by (lowercased username, bot flag), so looking up
+each bot is a dict hit instead of a scan over the guild.
+
+The index is saved to ~/.cache/olympus/discord-members-<guild>.json, and a
+run within `ttl` seconds of the last fetch reuses it without any API calls.
+Callers record the role and nickname changes they make (record_role,
+record_nick), so the saved copy stays current and a re-run plans nothing.
+Pass ttl=0 to always fetch.
+
+Usage:
+    index = await MemberIndex.load(client, guild_id, ttl=300)
+    zeus = index.find("zeus", bot=True)
+    ...
+    index.record_role(zeus["user"]["id"], role_id)
+    index.save()
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from discord_client import AsyncDiscordClient
+
+CACHE_DIR = Path.home() / ".cache" / "olympus"
+MEMBER_TTL = 300
+PAGE_SIZE = 1000
+
+
+class MemberIndex:
+    """A guild's members by id and by (username, bot)."""
+
+    def __init__(self, guild_id: str, members: List[dict], fetched_at: float, cache_path: Optional[Path] = None):
+        self.guild_id = guild_id
+        self.fetched_at = fetched_at
+        self.cache_path = cache_path
+        self.by_id: Dict[str, dict] = {}
+        self.by_name: Dict[Tuple[str, bool], dict] = {}
+        for member in members:
+            user = member["user"]
+            self.by_id[user["id"]] = member
+            self.by_name[(user["username"].lower(), bool(user.get("bot")))] = member
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    @staticmethod
+    def default_path(guild_id: str) -> Path:
+        return CACHE_DIR / f"discord-members-{guild_id}.json"
+
+    @staticmethod
+    async def fetch(client: AsyncDiscordClient, guild_id: str) -> List[dict]:
+        """Every member of the guild, a page of PAGE_SIZE at a time."""
+        members: List[dict] = []
+        after = "0"
+        while True:
+            page = await client.request(
+                "GET", f"/guilds/{guild_id}/members?limit={PAGE_SIZE}&after={after}") or []
+            members.extend(page)
+            if len(page) < PAGE_SIZE:
+                return members
+            after = max((member["user"]["id"] for member in page), key=int)
+
+    @classmethod
+    async def load(cls, client: AsyncDiscordClient, guild_id: str, ttl: float = MEMBER_TTL,
+                   cache_path: Optional[Path] = None) -> "MemberIndex":
+        """The saved index if younger than `ttl`, else a fresh fetch (which is saved)."""
+        cache_path = cache_path or cls.default_path(guild_id)
+        if ttl > 0:
+            try:
+                saved = json.loads(cache_path.read_text())
+                if saved["guild_id"] == guild_id and time.time() - saved["fetched_at"] < ttl:
+                    return cls(guild_id, saved["members"], saved["fetched_at"], cache_path)
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                pass
+        index = cls(guild_id, await cls.fetch(client, guild_id), time.time(), cache_path)
+        index.save()
+        return index
+
+    def find(self, username: str, bot: bool = True) -> Optional[dict]:
+        """The member with this username (case-insensitive) and bot flag."""
+        return self.by_name.get((username.lower(), bot))
+
+    def record_role(self, member_id: str, role_id: str) -> None:
+        roles = self.by_id[member_id].setdefault("roles", [])
+        if role_id not in roles:
+            roles.append(role_id)
+
+    def record_nick(self, member_id: str, nick: Optional[str]) -> None:
+        self.by_id[member_id]["nick"] = nick
+
+    def save(self) -> None:
+        """Write the index (keeping its original fetch time, so the TTL still counts from it)."""
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.tmp")
+        data = {"guild_id": self.guild_id, "fetched_at": self.fetched_at, "members": list(self.by_id.values())}
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.cache_path)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Local Mock Discord API
+
+A small stand-in for the Discord REST API that enforces bucket semantics the
+way the real one does: each route template maps to a bucket hash, buckets are
+scoped by major parameter (channel/guild/webhook id), every response carries
+X-RateLimit-* headers, over-limit requests get a 429 with retry_after, and a
+per-token global limit applies across all routes.
+
+Responses are canned JSON (an echo of the request body plus an id); the point
+is to exercise clients' scheduling, not Discord's business logic. The one
+exception is PATCHed resources (/users/@me, /applications/<id>, /guilds/<id>):
+they are remembered per token, image data URIs are replaced by an asset hash
+the way Discord does, and a later GET returns them. Guilds seeded with
+seed_guild() (or --members) also keep real roles, channels and members, so
+reconcilers can be run against them: role and channel create/edit, member
+role PUTs, nickname PATCHes and `limit`/`after` member pagination.
+
+Usage:
+    python3 scripts/mock_discord_api.py --port 8089 --limit 5 --window 1.0
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+MAJOR_PARAMS = ("channels", "guilds", "webhooks")
+
+# Route templates that share one bucket, like Discord's shared member/role buckets.
+SHARED_BUCKETS = {
+    "PUT /guilds/{major}/members/{id}/roles/{id}": "member-roles",
+    "DELETE /guilds/{major}/members/{id}/roles/{id}": "member-roles",
+}
+
+
+def route_template(method: str, path: str) -> Tuple[str, str]:
+    """Return (template, major) for a request path."""
+    path = re.sub(r"^/api(/v\d+)?", "", path.split("?")[0])
+    parts = path.strip("/").split("/")
+    template, major = [], []
+    for i, part in enumerate(parts):
+        previous = parts[i - 1] if i else ""
+        if previous in MAJOR_PARAMS:
+            template.append("{major}")
+            major.append(part)
+        elif i >= 2 and parts[i - 2] == "webhooks":
+            template.append("{token}")
+        elif part.isdigit():
+            template.append("{id}")
+        else:
+            template.append(part)
+    return f"{method} /{'/'.join(template)}", "/".join(major)
+
+
+class MockDiscordState:
+    """Bucket bookkeeping plus counters clients can be graded on."""
+
+    def __init__(self, limit: int, window: float, global_limit: int, latency: float = 0.0):
+        self.limit = limit
+        self.latency = latency
+        self.window = window
+        self.global_limit = global_limit
+        self.lock = threading.Lock()
+        # Wall-clock offset so X-RateLimit-Reset is stable within a window.
+        self.epoch = time.time() - time.monotonic()
+        self.windows: Dict[str, Tuple[float, int]] = {}
+        self.global_hits: Dict[str, List[float]] = defaultdict(list)
+        self.requests = 0
+        self.rate_limited = 0
+        self.global_rate_limited = 0
+        self.uploads = 0
+        self.resources: Dict[Tuple[str, str], dict] = {}
+        self.guilds: Dict[str, dict] = {}
+        self.next_id = 1_500_000_000_000_000_000
+
+    def bucket_hash(self, template: str) -> str:
+        name = SHARED_BUCKETS.get(template, template)
+        return hashlib.sha1(name.encode()).hexdigest()[:16]
+
+    def admit(self, token: str, template: str, major: str) -> Tuple[int, dict, dict]:
+        """Decide one request: returns (status, headers, body)."""
+        with self.lock:
+            now = time.monotonic()
+            self.requests += 1
+
+            hits = [t for t in self.global_hits[token] if now - t < 1.0]
+            self.global_hits[token] = hits
+            if len(hits) >= self.global_limit:
+                self.global_rate_limited += 1
+                retry_after = round(1.0 - (now - hits[0]), 3)
+                headers = {"X-RateLimit-Global": "true", "X-RateLimit-Scope": "global", "Retry-After": str(retry_after)}
+                return 429, headers, {"message": "You are being rate limited.", "retry_after": retry_after, "global": True}
+            hits.append(now)
+
+            bucket = self.bucket_hash(template)
+            key = f"{token}:{bucket}:{major}"
+            started, used = self.windows.get(key, (now, 0))
+            if now - started >= self.window:
+                started, used = now, 0
+            reset_after = round(self.window - (now - started), 3)
+            reset_epoch = self.epoch + started + self.window
+            headers = {
+                "X-RateLimit-Bucket": bucket,
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Reset": f"{reset_epoch:.3f}",
+                "X-RateLimit-Reset-After": str(reset_after),
+            }
+            if used >= self.limit:
+                self.rate_limited += 1
+                headers["X-RateLimit-Remaining"] = "0"
+                headers["X-RateLimit-Scope"] = "user"
+                return 429, headers, {"message": "You are being rate limited.", "retry_after": reset_after, "global": False}
+
+            used += 1
+            self.windows[key] = (started, used)
+            headers["X-RateLimit-Remaining"] = str(self.limit - used)
+            return 200, headers, {}
+
+    def resource(self, method: str, token: str, path: str, body) -> dict:
+        """PATCH merges into the stored resource (images become asset hashes); GET reads it back."""
+        with self.lock:
+            stored = self.resources.setdefault((token, path), {"id": str(int(time.time() * 1000))})
+            if method == "PATCH" and isinstance(body, dict):
+                for key, value in body.items():
+                    if isinstance(value, str) and value.startswith("data:image/"):
+                        self.uploads += 1
+                        value = hashlib.md5(value.encode()).hexdigest()
+                    stored[key] = value
+            return dict(stored)
+
+    def _snowflake(self) -> str:
+        self.next_id += 1
+        return str(self.next_id)
+
+    def seed_guild(self, guild_id: str, members: int = 0, bots: Tuple[str, ...] = ()) -> None:
+        """Create a stateful guild with @everyone, `members` humans and the named bots."""
+        with self.lock:
+            guild = self.guilds[guild_id] = {
+                "roles": {guild_id: {"id": guild_id, "name": "@everyone", "color": 0, "permissions": "0",
+                                     "hoist": False, "mentionable": False}},
+                "channels": {},
+                "members": {},
+            }
+            users = [(f"user{i:06d}", False) for i in range(members)] + [(name, True) for name in bots]
+            for username, bot in users:
+                user_id = self._snowflake()
+                guild["members"][user_id] = {"user": {"id": user_id, "username": username, "bot": bot},
+                                             "roles": [], "nick": None}
+
+    def guild(self, method: str, path: str, query: Dict[str, str], body) -> Optional[Tuple[int, object]]:
+        """Serve a seeded guild's roles/channels/members; None if `path` is not one of them."""
+        with self.lock:
+            served = self._guild(method, path, query, body)
+            # Copy while locked: the handler serialises after releasing the lock
+            return served and (served[0], json.loads(json.dumps(served[1])))
+
+    def _guild(self, method: str, path: str, query: Dict[str, str], body) -> Optional[Tuple[int, object]]:
+        match = re.fullmatch(r"/channels/(\d+)", path)
+        if match and method == "PATCH":
+            for guild in self.guilds.values():
+                channel = guild["channels"].get(match.group(1))
+                if channel is not None:
+                    channel.update(body or {})
+                    return 200, channel
+            return None
+        match = re.fullmatch(r"/guilds/(\d+)/(roles|channels|members)(?:/(\d+))?(?:/roles/(\d+))?", path)
+        if not match or match.group(1) not in self.guilds:
+            return None
+        guild = self.guilds[match.group(1)]
+        collection, item, role = match.group(2), match.group(3), match.group(4)
+        resources = guild[collection]
+
+        if collection == "members" and method == "GET" and item is None:
+            limit = min(int(query.get("limit", 1)), 1000)
+            after = int(query.get("after", 0))
+            page = sorted((m for uid, m in resources.items() if int(uid) > after), key=lambda m: int(m["user"]["id"]))
+            return 200, page[:limit]
+        if method == "GET" and item is None:
+            return 200, list(resources.values())
+        if method == "POST" and item is None:
+            resource = {"id": self._snowflake(), **(body or {})}
+            if collection == "channels":
+                resource.setdefault("type", 0)
+                resource.setdefault("permission_overwrites", [])
+            resources[resource["id"]] = resource
+            return 200, resource
+        if item not in resources:
+            return 404, {"message": "Unknown resource", "code": 10000}
+        if method == "PUT" and role:
+            if role not in resources[item]["roles"]:
+                resources[item]["roles"].append(role)
+            return 204, None
+        if method == "PATCH":
+            resources[item].update(body or {})
+            return 200, resources[item]
+        if method == "GET":
+            return 200, resources[item]
+        return None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "global_rate_limited": self.global_rate_limited,
+                "uploads": self.uploads,
+            }
+
+
+def make_handler(state: MockDiscordState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _handle(self):
+            if state.latency:
+                time.sleep(state.latency)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            template, major = route_template(self.command, self.path)
+            token = self.headers.get("Authorization") or major
+            status, headers, body = state.admit(token, template, major)
+            path = re.sub(r"^/api(/v\d+)?", "", self.path.split("?")[0])
+            query = dict(parse_qsl(urlsplit(self.path).query))
+            served = state.guild(self.command, path, query, json.loads(raw) if raw else None) \
+                if status == 200 else None
+            if served is not None:
+                status, body = served
+            elif status == 200 and self.command in ("GET", "PATCH") and \
+                    re.fullmatch(r"/(users/@me|applications/\d+|guilds/\d+)", path):
+                body = state.resource(self.command, token, path, json.loads(raw) if raw else {})
+            elif status == 200:
+                body = json.loads(raw) if raw else {}
+                if isinstance(body, dict):
+                    body.setdefault("id", str(int(time.time() * 1000)))
+            data = json.dumps(body).encode() if status != 204 else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    return Handler
+
+
+class MockDiscordAPI:
+    """Run the mock in a background thread: `with MockDiscordAPI() as api: api.url`."""
+
+    def __init__(self, limit: int = 5, window: float = 1.0, global_limit: int = 50, port: int = 0,
+                 latency: float = 0.0):
+        self.state = MockDiscordState(limit, window, global_limit, latency)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.state))
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v10"
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MockDiscordAPI":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Discord REST API with bucket rate limits")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--limit", type=int, default=5, help="requests per bucket window")
+    parser.add_argument("--window", type=float, default=1.0, help="bucket window in seconds")
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second per token")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--guild", default="832250938571227217", help="guild id to seed with state")
+    parser.add_argument("--members", type=int, default=0, help="seed --guild with this many members")
+    parser.add_argument("--bots", default="", help="comma-separated bot usernames to add to --guild")
+    args = parser.parse_args()
+
+    api = MockDiscordAPI(args.limit, args.window, args.global_limit, args.port, args.latency)
+    if args.members or args.bots:
+        api.state.seed_guild(args.guild, args.members, tuple(filter(None, args.bots.split(","))))
+    print(f"Mock Discord API listening on {api.url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(api.state.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Local Mock GitHub API
+
+Serves the REST calls the beads sync makes — an org's repositories, a repo's
+issues, single-issue GET/PATCH and /user — from generated fixtures, with the
+behaviour that matters to a client's request budget: Link-header pagination,
+`since`/`state` filters, ETags with 304 Not Modified on If-None-Match, and
+per-request latency, with an X-RateLimit-Remaining that counts down from
+5000. It also serves the search endpoint the old sync
+called, capped at 1000 results like the real one.
+
+Requests answered with 304 are counted separately because GitHub does not
+charge them against the rate limit.
+
+Usage:
+    python3 scripts/mock_github_api.py --port 8090 --repos 40 --issues 60
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def iso(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class MockGitHubState:
+    """Fixture repos and issues plus request counters."""
+
+    def __init__(self, org: str, repos: int, issues: int, latency: float):
+        self.org = org
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.clock = BASE_TIME
+        self.repos: Dict[str, List[dict]] = {}
+        for r in range(repos):
+            name = f"{org}/repo-{r:02d}"
+            self.repos[name] = [self._issue(name, n + 1, closed=n % 4 == 3) for n in range(issues)]
+        self.requests = 0
+        self.not_modified = 0
+        self.patches: List[tuple] = []
+
+    def _tick(self) -> str:
+        self.clock += timedelta(seconds=1)
+        return iso(self.clock)
+
+    def _issue(self, repo: str, number: int, closed: bool = False) -> dict:
+        item = {
+            "number": number,
+            "title": f"{repo.split('/')[1]} issue {number}",
+            "html_url": f"https://github.com/{repo}/issues/{number}",
+            "state": "closed" if closed else "open",
+            "updated_at": self._tick(),
+            "labels": [{"name": "priority:P2"}],
+            "assignees": [],
+        }
+        if number % 10 == 0:
+            item["pull_request"] = {"url": f"https://api.github.com/repos/{repo}/pulls/{number}"}
+        return item
+
+    def touch(self, repo: str, count: int = 1) -> None:
+        """Simulate churn: retitle `count` issues and open one new issue."""
+        with self.lock:
+            issues = self.repos[repo]
+            for item in issues[:count]:
+                item["title"] += " (edited)"
+                item["updated_at"] = self._tick()
+            issues.append(self._issue(repo, len(issues) + 1))
+
+    def edit(self, repo: str, number: int, labels: List[str]) -> dict:
+        """Simulate someone relabelling an issue on GitHub (not recorded as a PATCH)."""
+        with self.lock:
+            item = self.find_issue(repo, number)
+            item["labels"] = [{"name": name} for name in labels]
+            item["updated_at"] = self._tick()
+            return dict(item)
+
+    def find_issue(self, repo: str, number: int) -> Optional[dict]:
+        return next((i for i in self.repos.get(repo, []) if i["number"] == number), None)
+
+    def patch_issue(self, repo: str, number: int, body: dict) -> Optional[dict]:
+        item = self.find_issue(repo, number)
+        if item is None:
+            return None
+        if "labels" in body:
+            item["labels"] = [{"name": name} for name in body["labels"]]
+        if "assignees" in body:
+            item["assignees"] = [{"login": login} for login in body["assignees"]]
+        for key in ("state", "title"):
+            if key in body:
+                item[key] = body[key]
+        item["updated_at"] = self._tick()
+        self.patches.append((repo, number, body))
+        return item
+
+    def list_repos(self) -> List[dict]:
+        return [{"full_name": name, "has_issues": True, "archived": False} for name in self.repos]
+
+    def repo_issues(self, repo: str, query: dict) -> List[dict]:
+        state = query.get("state", "open")
+        since = query.get("since")
+        items = [i for i in self.repos.get(repo, []) if state == "all" or i["state"] == state]
+        if since:
+            items = [i for i in items if i["updated_at"] >= since]
+        return sorted(items, key=lambda i: i["updated_at"], reverse=query.get("direction") != "asc")
+
+    def search_issues(self, query: dict) -> List[dict]:
+        items = [
+            dict(i, repository_url=f"https://api.github.com/repos/{name}")
+            for name, issues in self.repos.items() for i in issues if i["state"] == "open"
+        ]
+        return items[:1000]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "rate_limited_requests": self.requests - self.not_modified,
+                "patches": len(self.patches),
+            }
+
+
+def make_handler(state: MockGitHubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: Optional[bytes] = None, headers: Optional[dict] = None):
+            self.send_response(status)
+            self.send_header("X-RateLimit-Remaining", str(max(5000 - state.stats()["rate_limited_requests"], 0)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            if state.latency:
+                time.sleep(state.latency)
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")
+            items = search = single = None
+            with state.lock:
+                state.requests += 1
+                if parts[:1] == ["orgs"] and parts[2:] == ["repos"]:
+                    items = state.list_repos()
+                elif parts[:1] == ["repos"] and parts[3:] == ["issues"]:
+                    items = state.repo_issues("/".join(parts[1:3]), query)
+                elif parts[:1] == ["repos"] and parts[3:4] == ["issues"] and len(parts) == 5:
+                    single = state.find_issue("/".join(parts[1:3]), int(parts[4]))
+                elif parts == ["search", "issues"]:
+                    search = state.search_issues(query)
+                elif parts == ["user"]:
+                    single = {"login": "olympus-bot"}
+
+            if single is not None:
+                self._send(200, json.dumps(single).encode(), {"Content-Type": "application/json"})
+                return
+            if items is None and search is None:
+                self._send(404, b'{"message": "Not Found"}')
+                return
+
+            per_page = int(query.get("per_page", 30))
+            page = int(query.get("page", 1))
+            if search is not None:
+                payload = {"total_count": len(search), "items": search[(page - 1) * per_page:page * per_page]}
+                total = len(search)
+            else:
+                payload = items[(page - 1) * per_page:page * per_page]
+                total = len(items)
+            body = json.dumps(payload).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self._send(304, headers={"ETag": etag})
+                return
+
+            headers = {"Content-Type": "application/json", "ETag": etag}
+            if page * per_page < total:
+                next_query = urlencode(dict(query, page=page + 1))
+                headers["Link"] = f'<http://{self.headers["Host"]}{url.path}?{next_query}>; rel="next"'
+            self._send(200, body, headers)
+
+        def do_PATCH(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                state.requests += 1
+                item = None
+                if parts[:1] == ["repos"] and parts[3:4] == ["issues"] and len(parts) == 5:
+                    item = state.patch_issue("/".join(parts[1:3]), int(parts[4]), body)
+            if item is None:
+                self._send(404, b'{"message": "Not Found"}')
+            else:
+                self._send(200, json.dumps(item).encode(), {"Content-Type": "application/json"})
+
+    return Handler
+
+
+class MockGitHubAPI:
+    """Run the mock in a background thread: `with MockGitHubAPI() as api: api.url`."""
+
+    def __init__(self, org: str = "infiquetra", repos: int = 40, issues: int = 60,
+                 latency: float = 0.05, port: int = 0):
+        self.state = MockGitHubState(org, repos, issues, latency)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.state))
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "MockGitHubAPI":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the GitHub REST issue listings")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--org", default="infiquetra")
+    parser.add_argument("--repos", type=int, default=40)
+    parser.add_argument("--issues", type=int, default=60, help="issues per repo")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    args = parser.parse_args()
+
+    api = MockGitHubAPI(args.org, args.repos, args.issues, args.latency, args.port)
+    print(f"Mock GitHub API listening on {api.url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(api.state.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
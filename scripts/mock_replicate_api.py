@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Local Mock Replicate API
+
+Serves the calls the generation job runner (replicate_jobs.py) makes:
+creating a prediction on a model, polling it, and downloading its output. It
+behaves like Replicate in the ways that matter to a client:
+
+  - prediction creates are rate limited per token by a token bucket (the free
+    tier's 6/min with burst 1 by default), with 429s carrying retry_after
+  - predictions move from starting to processing and then succeed after
+    --gen-seconds, or fail for every --fail-every'th prediction
+  - outputs are PNGs at FLUX-schnell's sizes for the requested aspect ratio
+    (1024x1024 for 1:1, 1344x768 for 16:9), and every --flaky-downloads'th
+    download answers 503
+
+Counters at GET /stats let a client be graded on how many predictions it paid
+for.
+
+Usage:
+    python3 scripts/mock_replicate_api.py --port 8091 --rate 60 --gen-seconds 2
+    REPLICATE_API_BASE=http://127.0.0.1:8091/v1 REPLICATE_API_TOKEN=test \\
+      uv run --with aiohttp --with pillow --with numpy python3 scripts/discord_banners.py
+"""
+
+import argparse
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+OUTPUT_SIZES = {"1:1": (1024, 1024), "16:9": (1344, 768), "9:16": (768, 1344), "4:3": (1184, 880)}
+
+
+def render_output(prediction_id: str, size: Tuple[int, int]) -> bytes:
+    """A deterministic gradient PNG standing in for a generated image."""
+    seed = sum(prediction_id.encode())
+    gradient = Image.linear_gradient("L").resize(size)
+    radial = Image.radial_gradient("L").resize(size)
+    img = Image.merge("RGB", (gradient, radial, gradient.point(lambda v: (v + seed) % 256)))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+class MockReplicateState:
+    """Predictions, per-token create buckets and counters."""
+
+    def __init__(self, rate: float = 6, burst: int = 1, gen_seconds: float = 2.0, fail_every: int = 0,
+                 flaky_downloads: int = 0, latency: float = 0.0):
+        self.rate = rate / 60
+        self.burst = burst
+        self.gen_seconds = gen_seconds
+        self.fail_every = fail_every
+        self.flaky_downloads = flaky_downloads
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.predictions: Dict[str, dict] = {}
+        self.files: Dict[str, bytes] = {}
+        self.requests = 0
+        self.creates = 0
+        self.throttled = 0
+        self.polls = 0
+        self.downloads = 0
+        self.download_errors = 0
+        self.failed = 0
+
+    def admit(self, token: str) -> float:
+        """Take a create token for `token`; returns 0, or retry_after when throttled."""
+        with self.lock:
+            now = time.monotonic()
+            tokens, stamp = self.buckets.get(token, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens < 1:
+                self.buckets[token] = (tokens, now)
+                self.throttled += 1
+                return round((1 - tokens) / self.rate, 3)
+            self.buckets[token] = (tokens - 1, now)
+            return 0.0
+
+    def create(self, base: str, model: str, body: dict) -> dict:
+        with self.lock:
+            self.creates += 1
+            prediction_id = f"mock{self.creates:05d}{int(time.time() * 1000) % 100000:05d}"
+            prediction = {
+                "id": prediction_id,
+                "model": model,
+                "input": body.get("input", {}),
+                "status": "starting",
+                "output": None,
+                "error": None,
+                "urls": {"get": f"{base}/v1/predictions/{prediction_id}"},
+                "_started": time.monotonic(),
+                "_fails": bool(self.fail_every) and self.creates % self.fail_every == 0,
+                "_base": base,
+            }
+            self.predictions[prediction_id] = prediction
+            return self.public(prediction)
+
+    def poll(self, prediction_id: str) -> Optional[dict]:
+        with self.lock:
+            self.polls += 1
+            prediction = self.predictions.get(prediction_id)
+            if prediction is None:
+                return None
+            if prediction["status"] in ("starting", "processing"):
+                if time.monotonic() - prediction["_started"] < self.gen_seconds:
+                    prediction["status"] = "processing"
+                elif prediction["_fails"]:
+                    prediction["status"] = "failed"
+                    prediction["error"] = "mock: generation failed"
+                    self.failed += 1
+                else:
+                    prediction["status"] = "succeeded"
+                    prediction["output"] = [f"{prediction['_base']}/files/{prediction_id}.png"]
+            return self.public(prediction)
+
+    def download(self, prediction_id: str) -> Tuple[int, bytes]:
+        with self.lock:
+            self.downloads += 1
+            prediction = self.predictions.get(prediction_id)
+            if prediction is None or prediction["status"] != "succeeded":
+                return 404, b""
+            if self.flaky_downloads and self.downloads % self.flaky_downloads == 0:
+                self.download_errors += 1
+                return 503, b""
+            if prediction_id not in self.files:
+                size = OUTPUT_SIZES.get(prediction["input"].get("aspect_ratio"), (1024, 1024))
+                self.files[prediction_id] = render_output(prediction_id, size)
+            return 200, self.files[prediction_id]
+
+    @staticmethod
+    def public(prediction: dict) -> dict:
+        return {key: value for key, value in prediction.items() if not key.startswith("_")}
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "creates": self.creates,
+                "throttled": self.throttled,
+                "polls": self.polls,
+                "downloads": self.downloads,
+                "download_errors": self.download_errors,
+                "failed_predictions": self.failed,
+            }
+
+
+def make_handler(state: MockReplicateState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body, content_type: str = "application/json", headers: Optional[dict] = None):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _handle(self):
+            if state.latency:
+                time.sleep(state.latency)
+            with state.lock:
+                state.requests += 1
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            path = self.path.split("?")[0]
+            base = f"http://{self.headers.get('Host')}"
+
+            if self.command == "POST" and (match := re.fullmatch(r"/v1/models/([^/]+/[^/]+)/predictions", path)):
+                retry_after = state.admit(self.headers.get("Authorization", ""))
+                if retry_after:
+                    detail = "Request was throttled. Your rate limit for creating predictions is reduced."
+                    return self._send(429, {"detail": detail, "status": 429, "retry_after": retry_after},
+                                      headers={"Retry-After": str(retry_after)})
+                return self._send(201, state.create(base, match.group(1), json.loads(raw) if raw else {}))
+            if self.command == "GET" and (match := re.fullmatch(r"/v1/predictions/(\w+)", path)):
+                prediction = state.poll(match.group(1))
+                if prediction is None:
+                    return self._send(404, {"detail": "Not found.", "status": 404})
+                return self._send(200, prediction)
+            if self.command == "GET" and (match := re.fullmatch(r"/files/(\w+)\.png", path)):
+                status, data = state.download(match.group(1))
+                return self._send(status, data, "image/png")
+            if self.command == "GET" and path == "/stats":
+                return self._send(200, state.stats())
+            self._send(404, {"detail": "Not found.", "status": 404})
+
+        do_GET = do_POST = _handle
+
+    return Handler
+
+
+class MockReplicateAPI:
+    """Run the mock in a background thread: `with MockReplicateAPI() as api: api.url`."""
+
+    def __init__(self, port: int = 0, **options):
+        self.state = MockReplicateState(**options)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.state))
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MockReplicateAPI":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Replicate predictions API")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--rate", type=float, default=6, help="prediction creates per minute per token")
+    parser.add_argument("--burst", type=int, default=1, help="prediction create burst")
+    parser.add_argument("--gen-seconds", type=float, default=2.0, help="seconds before a prediction completes")
+    parser.add_argument("--fail-every", type=int, default=0, help="fail every Nth prediction (0 = never)")
+    parser.add_argument("--flaky-downloads", type=int, default=0, help="503 every Nth download (0 = never)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    api = MockReplicateAPI(args.port, rate=args.rate, burst=args.burst, gen_seconds=args.gen_seconds,
+                           fail_every=args.fail_every, flaky_downloads=args.flaky_downloads, latency=args.latency)
+    print(f"Mock Replicate API listening on {api.url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(api.state.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Proxmox VM Provisioning Orchestrator
+
+Creates the agent and service VMs declared in roles/proxmox_vm/defaults/main.yml
+through the Proxmox API (proxmoxer), every VM at once, instead of one loop
+iteration at a time per hypervisor. Each VM runs the same pipeline as
+roles/proxmox_vm/tasks/create_vm.yml:
+
+  clone      full clone of the template, straight onto the VM's node (Ceph is shared)
+  configure  CPU, memory, NIC, onboot, guest agent and cloud-init settings in one call
+  resize     grow scsi0 to disk_gb
+  cloudinit  regenerate the cloud-init drive (the seed ISO)
+  start      boot
+
+Long steps return a UPID. The orchestrator polls each task's status
+asynchronously and moves that VM on as soon as its own task ends. Concurrency
+is bounded per node (--per-node tasks on a VM's node) and per storage pool
+(--per-pool clones/resizes on a Ceph pool), so a rebuild does not flood one
+hypervisor or the OSDs.
+
+Progress goes to a state file after every step, including in-flight UPIDs.
+After a failure or an interrupted run, running the same command again
+resumes: finished steps are skipped, a recorded task is polled rather than
+resubmitted, and a failed step is retried. The state file is removed once
+every VM is done.
+
+Modes:
+  (default)         create missing VMs; existing ones are left alone
+  --recreate        stop and destroy each VM first, then create it
+  --cloudinit-only  re-apply cloud-init settings, regenerate the drive and reboot
+                    (what regenerate_seed_isos.yml did for libvirt VMs)
+
+The API token comes from PROXMOX_API_TOKEN_SECRET or the vault, as for
+ansible/main.py. scripts/fake_proxmox.py serves a fake API for testing.
+
+Usage:
+    uv run --with pyyaml --with proxmoxer --with requests python3 scripts/provision_vms.py
+    python3 scripts/provision_vms.py zeus athena --recreate
+    python3 scripts/provision_vms.py --cloudinit-only --per-node 2
+    python3 scripts/provision_vms.py --fresh   # discard a previous run's state
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ANSIBLE_DIR = REPO_ROOT / "ansible"
+DEFAULTS_FILE = ANSIBLE_DIR / "roles" / "proxmox_vm" / "defaults" / "main.yml"
+STATE_PATH = Path.home() / ".cache" / "olympus" / "provision-state.json"
+sys.path.insert(0, str(ANSIBLE_DIR))
+import main as proxmox_inventory  # noqa: E402
+
+PER_NODE = 3
+PER_POOL = 8
+POLL = 1.0
+RETRIES = 1
+WORKERS = 10  # requests keeps 10 pooled connections per host; more threads would reconnect
+GATEWAY = "10.220.1.1"
+
+STEPS = {
+    "create": ["clone", "configure", "resize", "cloudinit", "start"],
+    "recreate": ["stop", "destroy", "clone", "configure", "resize", "cloudinit", "start"],
+    "cloudinit": ["configure", "cloudinit", "reboot"],
+}
+# Steps that read or write the VM's disk count against its storage pool too
+STORAGE_STEPS = {"clone", "resize", "destroy"}
+
+
+class ProvisionError(Exception):
+    """A step failed, or the run cannot start (bad state file, missing template)."""
+
+
+class TaskFailed(ProvisionError):
+    pass
+
+
+@dataclass
+class Target:
+    name: str
+    vmid: int
+    node: str
+    vcpus: int
+    memory_mb: int
+    disk_gb: int
+    storage: str
+    ip: Optional[str]
+    mac: str
+
+
+def load_targets(defaults_path: Path = DEFAULTS_FILE, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """VMs to provision (all agents and service VMs, or `names`) plus the template and user settings."""
+    import yaml
+
+    defaults = yaml.safe_load(defaults_path.read_text())
+    declared = {**defaults["agents"], **defaults["service_vms"]}
+    unknown = set(names or ()) - declared.keys()
+    if unknown:
+        raise ProvisionError(f"not in {defaults_path.name}: {', '.join(sorted(unknown))}")
+    targets = [Target(name=name, vmid=spec["vmid"], node=spec["host"].split(".")[0], vcpus=spec["vcpus"],
+                      memory_mb=spec["memory_mb"], disk_gb=spec["disk_gb"],
+                      storage=spec.get("storage", defaults["vm_storage"]), ip=spec.get("ip"), mac=spec["mac"])
+               for name, spec in declared.items() if not names or name in names]
+    return {"targets": targets, "template_vmid": defaults["template_vmid"], "user": defaults["vm_ssh_user"]}
+
+
+# ---------------------------------------------------------------------------
+# State
+# ---------------------------------------------------------------------------
+
+
+class State:
+    """Per-VM progress, written atomically after every change so a re-run can resume."""
+
+    def __init__(self, path: Path, mode: str, names: List[str], fresh: bool = False):
+        self.path = path
+        saved = None if fresh or not path.exists() else json.loads(path.read_text())
+        if saved and saved["mode"] != mode:
+            raise ProvisionError(f"{path} holds an unfinished --{saved['mode']} run; "
+                                 f"re-run that or pass --fresh to discard it")
+        self.data = saved or {"mode": mode, "started_at": time.time(), "vms": {}}
+        # VMs this run starts from scratch, as opposed to ones an earlier run left half done
+        self.new = {name for name in names if name not in self.data["vms"]}
+        for name in self.new:
+            self.data["vms"][name] = {"done": [], "task": None, "error": None, "seconds": {}}
+
+    def vm(self, name: str) -> Dict[str, Any]:
+        return self.data["vms"][name]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(self.data, indent=2))
+        os.replace(tmp, self.path)
+
+    def finish(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Orchestrator
+# ---------------------------------------------------------------------------
+
+
+class Limits:
+    """Semaphores per node and per storage pool, plus an optional global cap."""
+
+    def __init__(self, per_node: int = PER_NODE, per_pool: int = PER_POOL, max_tasks: int = 0):
+        self.nodes = defaultdict(lambda: asyncio.Semaphore(per_node))
+        self.pools = defaultdict(lambda: asyncio.Semaphore(per_pool))
+        self.total = asyncio.Semaphore(max_tasks) if max_tasks else None
+
+    @contextlib.asynccontextmanager
+    async def hold(self, node: str, pool: Optional[str] = None):
+        # Always total → pool → node, so two VMs never wait on each other's slots
+        async with contextlib.AsyncExitStack() as stack:
+            if self.total:
+                await stack.enter_async_context(self.total)
+            if pool:
+                await stack.enter_async_context(self.pools[pool])
+            await stack.enter_async_context(self.nodes[node])
+            yield
+
+
+class Orchestrator:
+    def __init__(self, api, state: State, limits: Limits, template_vmid: int, user: str,
+                 poll: float = POLL, retries: int = RETRIES, workers: int = WORKERS, quiet: bool = False):
+        self.api = api
+        self.state = state
+        self.limits = limits
+        self.template_vmid = template_vmid
+        self.user = user
+        self.poll = poll
+        self.retries = retries
+        self.quiet = quiet
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.existing: Dict[int, Dict[str, Any]] = {}
+        self.submitted = 0
+
+    def log(self, message: str) -> None:
+        if not self.quiet:
+            print(message, flush=True)
+
+    async def call(self, method: str, path: str, **params) -> Any:
+        """One proxmoxer request on the worker pool; the event loop never blocks on HTTP."""
+        resource = self.api(path)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: getattr(resource, method)(**params))
+
+    async def wait(self, upid: str) -> None:
+        """Poll a task until it stops; backs off from poll/4 to poll."""
+        node = upid.split(":")[1]
+        interval = self.poll / 4
+        while True:
+            status = await self.call("get", f"nodes/{node}/tasks/{upid}/status")
+            if status["status"] == "stopped":
+                exit_status = status.get("exitstatus", "")
+                if exit_status != "OK" and not exit_status.startswith("WARNINGS"):
+                    raise TaskFailed(exit_status or "task failed")
+                return
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, self.poll)
+
+    async def refresh(self) -> None:
+        resources = await self.call("get", "cluster/resources", type="vm")
+        self.existing = {vm["vmid"]: vm for vm in resources if vm.get("type") == "qemu"}
+
+    def node_of(self, target: Target) -> str:
+        """Where the VM is now (it may have been migrated off its declared host)."""
+        return self.existing.get(target.vmid, {}).get("node", target.node)
+
+    # -- steps ----------------------------------------------------------------
+
+    async def submit(self, step: str, target: Target) -> Optional[str]:
+        """Start `step`; returns its UPID, or None if it finished (or had nothing to do) synchronously."""
+        vmid, node = target.vmid, self.node_of(target)
+        base = f"nodes/{node}/qemu/{vmid}"
+        if step == "clone":
+            template = self.existing.get(self.template_vmid)
+            if not template:
+                raise ProvisionError(f"template {self.template_vmid} not found")
+            return await self.call("post", f"nodes/{template['node']}/qemu/{self.template_vmid}/clone",
+                                   newid=vmid, name=target.name, full=1, storage=target.storage, target=target.node)
+        if step == "configure":
+            # --cicustom user= replaces Proxmox's generated user-data; the snippet is on every node
+            cloud_init = {"ciuser": self.user, "nameserver": GATEWAY, "searchdomain": proxmox_inventory.DOMAIN,
+                          "ipconfig0": f"ip={target.ip}/24,gw={GATEWAY}" if target.ip else "ip=dhcp",
+                          "cicustom": f"user=local:snippets/{target.name}-user-data.yaml"}
+            if self.state.data["mode"] != "cloudinit":
+                cloud_init.update(memory=target.memory_mb, cores=target.vcpus, cpu="host", onboot=1,
+                                  net0=f"virtio={target.mac},bridge=vmbr0", agent="enabled=1")
+            return await self.call("post", f"{base}/config", **cloud_init)
+        if step == "resize":
+            return await self.call("put", f"{base}/resize", disk="scsi0", size=f"{target.disk_gb}G")
+        if step == "cloudinit":
+            return await self.call("put", f"{base}/cloudinit")
+        if step == "start":
+            return await self.call("post", f"{base}/status/start")
+        if step == "reboot":
+            running = self.existing.get(vmid, {}).get("status") == "running"
+            return await self.call("post", f"{base}/status/{'reboot' if running else 'start'}")
+        if step == "stop":
+            if self.existing.get(vmid, {}).get("status") != "running":
+                return None
+            return await self.call("post", f"{base}/status/stop")
+        if step == "destroy":
+            if vmid not in self.existing:
+                return None
+            return await self.call("delete", base, purge=1, **{"destroy-unreferenced-disks": 1})
+        raise ProvisionError(f"unknown step {step}")
+
+    def applied(self, step: str, target: Target) -> None:
+        """Keep `existing` in step with what a finished step changed."""
+        if step == "destroy":
+            self.existing.pop(target.vmid, None)
+        elif step == "clone":
+            self.existing[target.vmid] = {"vmid": target.vmid, "node": target.node, "status": "stopped"}
+        elif step in ("start", "reboot", "stop"):
+            self.existing.setdefault(target.vmid, {"node": target.node})["status"] = \
+                "stopped" if step == "stop" else "running"
+
+    async def adopt_clone(self, target: Target) -> bool:
+        """After a crash between submitting a clone and saving its UPID the VM exists: wait out its lock."""
+        if target.vmid not in self.existing or self.existing[target.vmid].get("template"):
+            return False
+        while True:
+            config = await self.call("get", f"nodes/{self.node_of(target)}/qemu/{target.vmid}/config")
+            if not config.get("lock"):
+                return True
+            await asyncio.sleep(self.poll)
+
+    async def run_step(self, step: str, target: Target) -> None:
+        entry = self.state.vm(target.name)
+        pool = target.storage if step in STORAGE_STEPS else None
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.limits.hold(target.node, pool):
+                    # Time from holding the slots: the step's own cost, not its wait for them
+                    start = time.monotonic()
+                    task = entry["task"]
+                    if task and task["step"] == step:
+                        self.log(f"🔍 {target.name}: resuming {step} ({task['upid']})")
+                        await self.wait(task["upid"])
+                    elif step == "clone" and target.name not in self.state.new and await self.adopt_clone(target):
+                        self.log(f"🔍 {target.name}: clone already exists")
+                    else:
+                        upid = await self.submit(step, target)
+                        self.submitted += upid is not None
+                        if isinstance(upid, str) and upid.startswith("UPID:"):
+                            entry["task"] = {"step": step, "upid": upid}
+                            self.state.save()
+                            await self.wait(upid)
+                    took = time.monotonic() - start
+                break
+            except Exception as exc:  # proxmoxer raises ResourceException and requests' transport errors
+                entry["task"] = None
+                self.state.save()
+                if attempt == self.retries:
+                    raise ProvisionError(f"{step}: {exc}") from exc
+                self.log(f"⚠️  {target.name}: {step} failed ({exc}), retrying")
+                await self.refresh()
+        self.applied(step, target)
+        entry["done"].append(step)
+        entry["task"] = None
+        entry["seconds"][step] = round(took, 2)
+        self.state.save()
+        self.log(f"✅ {target.name}: {step} ({took:.1f}s)")
+
+    async def provision(self, target: Target, steps: List[str]) -> bool:
+        entry = self.state.vm(target.name)
+        entry["error"] = None
+        try:
+            for step in steps:
+                if step not in entry["done"]:
+                    await self.run_step(step, target)
+            return True
+        except ProvisionError as exc:
+            entry["error"] = str(exc)
+            self.state.save()
+            self.log(f"❌ {target.name}: {exc}")
+            return False
+
+    async def run(self, targets: List[Target]) -> Dict[str, bool]:
+        await self.refresh()
+        mode = self.state.data["mode"]
+        steps = STEPS[mode]
+        pending = []
+        for target in targets:
+            entry = self.state.vm(target.name)
+            if mode == "create" and target.vmid in self.existing and target.name in self.state.new:
+                entry["done"] = list(steps)
+                self.log(f"⏭️  {target.name}: VM {target.vmid} already exists on {self.node_of(target)}")
+            elif mode == "cloudinit" and target.vmid not in self.existing:
+                entry["error"] = f"VM {target.vmid} does not exist"
+                self.log(f"❌ {target.name}: {entry['error']}")
+                continue
+            pending.append(target)
+        self.state.save()
+        results = await asyncio.gather(*(self.provision(target, steps) for target in pending))
+        return dict(zip((target.name for target in pending), results))
+
+
+def connect(host: str = "", token_secret: str = ""):
+    """The proxmoxer API object, configured like ansible/main.py's live source."""
+    return proxmox_inventory.ProxmoxSource(host, token_secret=token_secret).api
+
+
+def provision(api, targets: List[Target], template_vmid: int, user: str, mode: str = "create",
+              state_path: Path = STATE_PATH, fresh: bool = False, per_node: int = PER_NODE,
+              per_pool: int = PER_POOL, max_tasks: int = 0, poll: float = POLL, retries: int = RETRIES,
+              quiet: bool = False) -> Dict[str, Any]:
+    """Run (or resume) a provisioning pass; returns per-VM success and timings."""
+    state = State(state_path, mode, [target.name for target in targets], fresh)
+
+    async def run():
+        orchestrator = Orchestrator(api, state, Limits(per_node, per_pool, max_tasks), template_vmid, user,
+                                    poll, retries, quiet=quiet)
+        try:
+            return await orchestrator.run(targets), orchestrator.submitted
+        finally:
+            orchestrator.executor.shutdown(wait=False)
+
+    start = time.monotonic()
+    results, submitted = asyncio.run(run())
+    ok = all(results.values()) and not any(state.vm(t.name)["error"] for t in targets)
+    report = {"ok": ok, "results": results, "seconds": time.monotonic() - start, "submitted": submitted,
+              "vms": {name: dict(state.vm(name)) for name in results}}
+    if ok:
+        state.finish()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("vms", nargs="*", help="VM names (default: every agent and service VM)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--recreate", action="store_true", help="destroy and re-create the VMs")
+    mode.add_argument("--cloudinit-only", action="store_true", help="re-apply cloud-init, regenerate and reboot")
+    parser.add_argument("--defaults", type=Path, default=DEFAULTS_FILE,
+                        help="proxmox_vm role defaults, or a YAML/JSON file with the same keys")
+    parser.add_argument("--api-host", default="", help="Proxmox API host[:port] (default: $PROXMOX_API_HOST)")
+    parser.add_argument("--per-node", type=int, default=PER_NODE, help="concurrent tasks per node")
+    parser.add_argument("--per-pool", type=int, default=PER_POOL, help="concurrent disk tasks per storage pool")
+    parser.add_argument("--max-tasks", type=int, default=0, help="concurrent tasks overall (0: no cap)")
+    parser.add_argument("--poll", type=float, default=POLL, help="max seconds between task status polls")
+    parser.add_argument("--retries", type=int, default=RETRIES, help="retries per failed step")
+    parser.add_argument("--state", type=Path, default=STATE_PATH, help="resume state file")
+    parser.add_argument("--fresh", action="store_true", help="ignore and replace an existing state file")
+    args = parser.parse_args()
+
+    run_mode = "recreate" if args.recreate else "cloudinit" if args.cloudinit_only else "create"
+    try:
+        declared = load_targets(args.defaults, args.vms)
+        report = provision(connect(args.api_host), declared["targets"], declared["template_vmid"], declared["user"],
+                           run_mode, args.state, args.fresh, args.per_node, args.per_pool, args.max_tasks,
+                           args.poll, args.retries)
+    except (ProvisionError, proxmox_inventory.InventoryError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    print(f"\n⏱️  {len(report['results'])} VMs in {report['seconds']:.1f}s ({report['submitted']} tasks)")
+    for name, entry in report["vms"].items():
+        took = sum(entry["seconds"].values())
+        print(f"  {'✅' if report['results'][name] else '❌'} {name:<12} {took:6.1f}s  "
+              f"{entry['error'] or ', '.join(entry['done'])}")
+    if not report["ok"]:
+        print(f"\n⚠️  Progress kept in {args.state}; run the same command again to resume")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
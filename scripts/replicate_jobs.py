@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Replicate Generation Job Runner
+
+Shared by the Replicate image generators (discord_ai_icons.py,
+discord_banners.py, generate_mimir_assets.py, all through asset_build.py). Each
+image is a Job: a model, its input, and the files the output is resized into
+and/or the path the raw download is kept at. Jobs are tracked in a JSON
+queue file (assets/.cache/replicate-jobs.json) that records each job's
+prediction id and state as it moves from pending to submitted to done, so an
+interrupted run resumes where it stopped. A prediction that was already created
+is polled, not paid for again; finished jobs are skipped; a job whose model or
+input changed starts over.
+
+Prediction creates are shaped by a token bucket sized to the account tier
+instead of fixed sleeps. Replicate allows 6 creates a minute with a burst of 1
+while an account has less than $5 of credit, and 600 a minute otherwise. A 429
+pauses the bucket for its retry_after. Predictions are polled concurrently and
+their outputs are streamed to disk over one pooled aiohttp session, then
+decoded once into every output size (image_postprocess.py). Failed
+predictions, 5xx responses and broken downloads are retried with backoff, up to
+max_attempts per job.
+
+Usage:
+    from replicate_jobs import flux_schnell_job, run_jobs
+
+    jobs = [flux_schnell_job("banner:zeus", prompt, "16:9", {"assets/banners/zeus.png": (960, 540)})]
+    results = run_jobs(jobs, tier="free")
+
+Set REPLICATE_API_BASE to point the runner at mock_replicate_api.py.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from image_postprocess import derive_images
+
+API_BASE = "https://api.replicate.com/v1"
+FLUX_SCHNELL = "black-forest-labs/flux-schnell"
+QUEUE_PATH = Path("assets/.cache/replicate-jobs.json")
+
+# Prediction creates per second and burst, by account tier
+TIERS = {
+    "free": (6 / 60, 1),
+    "paid": (600 / 60, 10),
+}
+# Every other endpoint (prediction GETs) allows 3000 requests a minute.
+POLL_RATE = 3000 / 60
+
+POLL_INTERVAL = 1.0
+MAX_ATTEMPTS = 3
+BACKOFF = 2.0
+CHUNK_SIZE = 64 * 1024
+
+
+class JobError(Exception):
+    """One attempt at a job failed; `resubmit` means the prediction itself is unusable."""
+
+    def __init__(self, message: str, resubmit: bool = False):
+        super().__init__(message)
+        self.resubmit = resubmit
+
+
+class TokenBucket:
+    """asyncio token bucket: `rate` tokens a second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._stamp = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (a 429's retry_after) and drain saved tokens."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                delay = max(self._paused_until - now, 0.0)
+                if self._tokens < 1:
+                    delay = max(delay, (1 - self._tokens) / self.rate)
+                if delay <= 0:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class Job:
+    """One prediction and the files (path → (width, height)) its output becomes.
+
+    With `source`, the download itself is also kept at that path, so sizes can
+    be derived from it again later without paying for another prediction.
+    """
+
+    key: str
+    model: str
+    input: Dict[str, Any]
+    outputs: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    source: Optional[str] = None
+
+    @property
+    def digest(self) -> str:
+        payload = {"model": self.model, "input": self.input, "outputs": self.outputs}
+        if self.source:
+            payload["source"] = self.source
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def outputs_exist(self) -> bool:
+        paths = [*self.outputs, self.source] if self.source else self.outputs
+        return all(Path(path).exists() for path in paths)
+
+
+def flux_schnell_job(key: str, prompt: str, aspect_ratio: str, outputs: Dict[str, Tuple[int, int]],
+                     source: Optional[str] = None) -> Job:
+    """A single PNG from FLUX-schnell, the model every generator here uses."""
+    return Job(key, FLUX_SCHNELL, {
+        "prompt": prompt,
+        "aspect_ratio": aspect_ratio,
+        "output_format": "png",
+        "output_quality": 100,
+        "num_outputs": 1,
+    }, outputs, source)
+
+
+class JobQueue:
+    """key → {"digest", "state", "prediction", "attempts", "error"}, kept in a JSON file."""
+
+    def __init__(self, path: Path = QUEUE_PATH):
+        self.path = path
+        try:
+            self.entries: Dict[str, dict] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError as e:
+            print(f"⚠️  Ignoring unreadable job queue {path}: {e}")
+            self.entries = {}
+
+    def entry(self, job: Job) -> dict:
+        """The job's entry, reset to pending if it is new or its spec changed."""
+        entry = self.entries.get(job.key)
+        if entry is None or entry.get("digest") != job.digest:
+            entry = self.entries[job.key] = {
+                "digest": job.digest, "state": "pending", "prediction": None, "attempts": 0, "error": None,
+            }
+        return entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+
+class JobRunner:
+    """Runs jobs through one aiohttp session, recording progress in a JobQueue."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        token: str,
+        queue: JobQueue,
+        api_base: str = API_BASE,
+        tier: str = "free",
+        max_attempts: int = MAX_ATTEMPTS,
+        poll_interval: float = POLL_INTERVAL,
+        backoff: float = BACKOFF,
+    ):
+        self.session = session
+        self.queue = queue
+        self.api_base = api_base.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.creates = TokenBucket(*TIERS[tier])
+        self.polls = TokenBucket(POLL_RATE, POLL_RATE)
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.backoff = backoff
+
+    async def _api(self, method: str, url: str, bucket: TokenBucket, data: Optional[dict] = None) -> dict:
+        while True:
+            await bucket.acquire()
+            async with self.session.request(method, url, json=data, headers=self.headers) as resp:
+                try:
+                    body = await resp.json(content_type=None)
+                except (json.JSONDecodeError, aiohttp.ContentTypeError):
+                    body = {}
+                if resp.status == 429:
+                    retry_after = float((body or {}).get("retry_after") or resp.headers.get("Retry-After") or 1)
+                    print(f"⏳ Rate limited by Replicate — waiting {retry_after:.1f}s")
+                    bucket.pause(retry_after)
+                    continue
+                if resp.status == 404:
+                    raise JobError(f"{method} {url}: not found", resubmit=True)
+                if resp.status >= 400:
+                    detail = (body or {}).get("detail") if isinstance(body, dict) else None
+                    raise JobError(f"{method} {url}: HTTP {resp.status} {detail or ''}".strip())
+                return body
+
+    async def _create(self, job: Job) -> str:
+        prediction = await self._api("POST", f"{self.api_base}/models/{job.model}/predictions",
+                                     self.creates, {"input": job.input})
+        return prediction["id"]
+
+    async def _wait(self, prediction_id: str) -> dict:
+        url = f"{self.api_base}/predictions/{prediction_id}"
+        while True:
+            prediction = await self._api("GET", url, self.polls)
+            status = prediction.get("status")
+            if status == "succeeded":
+                return prediction
+            if status in ("failed", "canceled"):
+                raise JobError(f"prediction {status}: {prediction.get('error')}", resubmit=True)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _download(self, url: str, dest: Path) -> None:
+        """Stream `url` to `dest` without holding the body in memory."""
+        async with self.session.get(url) as resp:
+            if resp.status in (404, 410):
+                raise JobError(f"output expired: {url}", resubmit=True)
+            if resp.status >= 400:
+                raise JobError(f"download {url}: HTTP {resp.status}")
+            with dest.open("wb") as out:
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    out.write(chunk)
+
+    async def _attempt(self, job: Job, entry: dict) -> None:
+        if not entry["prediction"]:
+            entry["prediction"] = await self._create(job)
+            entry["state"] = "submitted"
+            self.queue.save()
+            print(f"🚀 Submitted {job.key} (prediction {entry['prediction']})")
+
+        prediction = await self._wait(entry["prediction"])
+        output = prediction.get("output")
+        url = output[0] if isinstance(output, list) and output else output
+        if not url:
+            raise JobError("prediction succeeded without output", resubmit=True)
+
+        self.queue.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix="replicate-", suffix=".download", dir=self.queue.path.parent)
+        os.close(fd)
+        tmp = Path(name)
+        try:
+            await self._download(str(url), tmp)
+            if job.outputs:
+                await asyncio.to_thread(derive_images, tmp, job.outputs)
+            if job.source:
+                Path(job.source).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, job.source)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    async def run(self, job: Job, force: bool = False) -> str:
+        """Bring one job to done; returns "generated", "skipped" or "failed"."""
+        known = job.key in self.queue.entries
+        entry = self.queue.entry(job)
+        if not force and job.outputs_exist() and (entry["state"] == "done" or not known):
+            if entry["state"] != "done":
+                entry["state"] = "done"
+                self.queue.save()
+            print(f"⏭️  Exists: {job.key}")
+            return "skipped"
+        if force or entry["state"] in ("done", "failed"):
+            entry.update(state="pending", prediction=None, error=None)
+        entry["attempts"] = 0
+
+        while entry["attempts"] < self.max_attempts:
+            entry["attempts"] += 1
+            try:
+                await self._attempt(job, entry)
+            except (JobError, aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                entry["error"] = str(e) or type(e).__name__
+                if getattr(e, "resubmit", False):
+                    entry["prediction"] = None
+                self.queue.save()
+                if entry["attempts"] < self.max_attempts:
+                    delay = self.backoff * 2 ** (entry["attempts"] - 1)
+                    print(f"⚠️  {job.key} attempt {entry['attempts']}/{self.max_attempts} failed: "
+                          f"{entry['error']} — retrying in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                continue
+            entry.update(state="done", prediction=None, error=None)
+            self.queue.save()
+            print(f"✅ Generated: {', '.join(job.outputs)}")
+            return "generated"
+
+        entry["state"] = "failed"
+        self.queue.save()
+        print(f"❌ Failed: {job.key} ({entry['error']})")
+        return "failed"
+
+
+async def run_jobs_async(
+    jobs: List[Job],
+    token: Optional[str] = None,
+    tier: str = "free",
+    queue_path: Path = QUEUE_PATH,
+    api_base: Optional[str] = None,
+    force: bool = False,
+    concurrency: int = 8,
+    **options,
+) -> Dict[str, str]:
+    """Run `jobs` concurrently (at most `concurrency` in flight); returns key → result."""
+    token = token or os.environ["REPLICATE_API_TOKEN"]
+    api_base = api_base or os.environ.get("REPLICATE_API_BASE", API_BASE)
+    queue = JobQueue(queue_path)
+    limit = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency * 2)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as session:
+        runner = JobRunner(session, token, queue, api_base, tier, **options)
+
+        async def bounded(job: Job) -> str:
+            async with limit:
+                return await runner.run(job, force)
+
+        results = await asyncio.gather(*(bounded(job) for job in jobs))
+    return dict(zip((job.key for job in jobs), results))
+
+
+def run_jobs(jobs: List[Job], **kwargs) -> Dict[str, str]:
+    """Synchronous wrapper around run_jobs_async for the generator scripts."""
+    return asyncio.run(run_jobs_async(jobs, **kwargs))
@@ -3,17 +3,31 @@
 Upload AI-Generated Discord Icons
 
 Uploads the AI-generated mythological icons to Discord bots and server.
+Assets whose bytes match the last successful upload (upload_manifest.py) are
+skipped without an API call; --verify also checks each bot's current avatar
+and banner hash on Discord first.
+
+Each bot token has its own rate-limit buckets, so every bot gets its own
+worker: an AsyncDiscordClient over a kept-alive aiohttp session, with the
+token's global limit enforced by that client's RateLimiter. The workers run
+concurrently, so refreshing every bot takes about as long as the slowest one.
+
+Usage:
+    uv run --with aiohttp --with ansible-core python3 scripts/upload_ai_icons.py [--verify] [--force]
 """
 
+import argparse
+import asyncio
 import base64
-import json
-import subprocess
 import sys
-import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
+
+import aiohttp
 
-import requests
+from discord_client import AsyncDiscordClient, DiscordAPIError
+from upload_manifest import UNVERIFIED, UploadManifest
+from vault_secrets import VaultError, discord_bot_tokens
 
 # Discord API Configuration
 DISCORD_API_BASE = "https://discord.com/api/v10"
@@ -40,279 +54,153 @@ APP_IDS = {
     "mimir":      "1486896133660868758",
 }
 
+AI_ICONS_DIR = Path("assets/ai_icons")
+AI_APP_ICONS_DIR = Path("assets/ai_app_icons")
+BANNERS_DIR = Path("assets/banners")
+
+# Hermes conductor uses a different vault key
+TOKEN_VAR_OVERRIDES = {
+    "hermes": "vault_hermes_conductor_token",
+}
+
 
 def get_vault_tokens() -> Dict[str, str]:
     """Extract Discord bot tokens from Ansible Vault."""
-    vault_pass = Path.home() / ".vault_pass.txt"
-    inventory_path = Path.home() / "workspace/infiquetra/home-lab/ansible/inventory/hosts.yml"
-
-    if not vault_pass.exists():
-        print(f"❌ Vault password file not found: {vault_pass}")
+    try:
+        tokens = discord_bot_tokens(BOTS, TOKEN_VAR_OVERRIDES)
+    except VaultError as e:
+        print(f"❌ {e}")
         sys.exit(1)
-
-    # Hermes conductor uses a different vault key
-    TOKEN_VAR_OVERRIDES = {
-        "hermes": "vault_hermes_conductor_token",
-    }
-
-    tokens = {}
-
-    for bot_name in BOTS:
-        token_var = TOKEN_VAR_OVERRIDES.get(bot_name, f"vault_discord_bot_token_{bot_name}")
-
-        try:
-            result = subprocess.run(
-                [
-                    "ansible", "localhost",
-                    "-i", str(inventory_path),
-                    "-m", "debug",
-                    "-a", f"var={token_var}",
-                    "--vault-password-file", str(vault_pass)
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
-                cwd=Path.home() / "workspace/infiquetra/home-lab"
-            )
-
-            if 'SUCCESS =>' in result.stdout:
-                json_start = result.stdout.find('{')
-                json_end = result.stdout.rfind('}')
-                if json_start != -1 and json_end != -1:
-                    json_str = result.stdout[json_start:json_end+1]
-                    try:
-                        data = json.loads(json_str)
-                        if token_var in data:
-                            token = data[token_var].strip()
-                            if token:
-                                tokens[bot_name] = token
-                    except json.JSONDecodeError as e:
-                        print(f"⚠️  Failed to parse JSON for {bot_name}: {e}")
-
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️  Failed to decrypt token for {bot_name}")
-            continue
-
     return tokens
 
 
-def upload_bot_avatar(bot_name: str, token: str, image_path: Path) -> bool:
-    """Upload avatar for a specific bot."""
-    url = f"{DISCORD_API_BASE}/users/@me"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
-
-    # Read and encode image
-    with open(image_path, 'rb') as f:
-        image_data = f.read()
-
+async def upload_image(client: AsyncDiscordClient, endpoint: str, field: str, image_data: bytes,
+                       label: str) -> Optional[str]:
+    """PATCH one image field; returns the asset hash Discord reports ("" if none), None on failure."""
     base64_image = base64.b64encode(image_data).decode('utf-8')
     data_uri = f"data:image/png;base64,{base64_image}"
 
-    payload = {"avatar": data_uri}
-
     try:
-        response = requests.patch(url, headers=headers, json=payload)
-        response.raise_for_status()
-        print(f"✅ Uploaded avatar for {bot_name}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to upload avatar for {bot_name}: {e}")
-        if hasattr(e.response, 'text'):
-            print(f"   Response: {e.response.text}")
-        return False
-
-
-def upload_app_icon(bot_name: str, app_id: str, token: str, image_path: Path) -> bool:
+        data = await client.request("PATCH", endpoint, {field: data_uri}) or {}
+        asset_hash = data.get(field) or ""
+        print(f"✅ Uploaded {label} (hash={asset_hash})")
+        return asset_hash
+    except DiscordAPIError as e:
+        print(f"❌ Failed to upload {label}: HTTP {e.status}")
+        print(f"   Response: {e.body}")
+        return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ Failed to upload {label}: {e}")
+        return None
+
+
+async def upload_bot_avatar(client: AsyncDiscordClient, bot_name: str, image_data: bytes) -> Optional[str]:
+    """Upload avatar for a specific bot."""
+    return await upload_image(client, "/users/@me", "avatar", image_data, f"avatar for {bot_name}")
+
+
+async def upload_app_icon(client: AsyncDiscordClient, bot_name: str, app_id: str, image_data: bytes) -> Optional[str]:
     """Upload app icon to Discord Developer Portal for a specific application."""
-    url = f"{DISCORD_API_BASE}/applications/{app_id}"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json",
-        "User-Agent": "DiscordBot (home-lab, 1.0)"
-    }
-
-    base64_image = base64.b64encode(image_path.read_bytes()).decode('utf-8')
-    data_uri = f"data:image/png;base64,{base64_image}"
+    return await upload_image(client, f"/applications/{app_id}", "icon", image_data, f"app icon for {bot_name}")
 
-    try:
-        response = requests.patch(url, headers=headers, json={"icon": data_uri})
-        response.raise_for_status()
-        print(f"✅ Uploaded app icon for {bot_name}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to upload app icon for {bot_name}: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"   Response: {e.response.text}")
-        return False
-
-
-def upload_app_banner(bot_name: str, app_id: str, token: str, image_path: Path) -> bool:
+
+async def upload_app_banner(client: AsyncDiscordClient, bot_name: str, image_data: bytes) -> Optional[str]:
     """Upload profile banner for a bot (visible when clicking the bot in Discord)."""
     # PATCH /users/@me with {"banner": ...} sets the profile card banner.
     # PATCH /applications/{app_id} with {"cover_image": ...} sets the App Directory image — not the same thing.
-    url = f"{DISCORD_API_BASE}/users/@me"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json",
-        "User-Agent": "DiscordBot (home-lab, 1.0)"
-    }
-
-    base64_image = base64.b64encode(image_path.read_bytes()).decode('utf-8')
-    data_uri = f"data:image/png;base64,{base64_image}"
+    return await upload_image(client, "/users/@me", "banner", image_data, f"profile banner for {bot_name}")
 
-    try:
-        response = requests.patch(url, headers=headers, json={"banner": data_uri})
-        response.raise_for_status()
-        data = response.json()
-        banner_hash = data.get("banner", "")
-        print(f"✅ Uploaded profile banner for {bot_name} (hash={banner_hash})")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to upload profile banner for {bot_name}: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"   Response: {e.response.text}")
-        return False
-
-
-def upload_server_icon(token: str, image_path: Path) -> bool:
-    """Upload server icon (using Freya's admin token)."""
-    url = f"{DISCORD_API_BASE}/guilds/{GUILD_ID}"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
 
-    # Read and encode image
-    with open(image_path, 'rb') as f:
-        image_data = f.read()
-
-    base64_image = base64.b64encode(image_data).decode('utf-8')
-    data_uri = f"data:image/png;base64,{base64_image}"
-
-    payload = {"icon": data_uri}
-
-    try:
-        response = requests.patch(url, headers=headers, json=payload)
-        response.raise_for_status()
-        print(f"✅ Uploaded server icon")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to upload server icon: {e}")
-        if hasattr(e.response, 'text'):
-            print(f"   Response: {e.response.text}")
-        return False
+async def upload_server_icon(client: AsyncDiscordClient, image_data: bytes) -> Optional[str]:
+    """Upload server icon (using Freya's admin token)."""
+    return await upload_image(client, f"/guilds/{GUILD_ID}", "icon", image_data, "server icon")
+
+
+async def sync_bot(bot_name: str, token: str, manifest: UploadManifest, results: Dict[str, int],
+                   verify: bool = False, force: bool = False, api_base: Optional[str] = None) -> None:
+    """Upload one bot's changed avatar, app icon and banner (and, for Freya, the server icon)."""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        client = AsyncDiscordClient(session, token, api_base or DISCORD_API_BASE)
+
+        profile = {}
+        if verify:
+            try:
+                profile = await client.request("GET", "/users/@me") or {}
+            except (DiscordAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"⚠️  Could not read current profile for {bot_name}: {e}")
+
+        async def sync(key: str, path: Path, upload, field: Optional[str] = None) -> None:
+            if not path.exists():
+                print(f"⚠️  Not found: {path}")
+                results["failed"] += 1
+                return
+            remote_hash = profile.get(field) if verify and field else UNVERIFIED
+            result = await manifest.sync_asset_async(key, path.read_bytes(), upload, remote_hash, force)
+            results[result] += 1
+
+        if bot_name in BOTS:
+            await sync(f"avatar:{bot_name}", AI_ICONS_DIR / f"{bot_name}.png",
+                       lambda data: upload_bot_avatar(client, bot_name, data), "avatar")
+        if bot_name in APP_IDS:
+            app_id = APP_IDS[bot_name]
+            await sync(f"app_icon:{app_id}", AI_APP_ICONS_DIR / f"{bot_name}.png",
+                       lambda data: upload_app_icon(client, bot_name, app_id, data))
+            if BANNERS_DIR.exists():
+                await sync(f"banner:{bot_name}", BANNERS_DIR / f"{bot_name}.png",
+                           lambda data: upload_app_banner(client, bot_name, data), "banner")
+        if bot_name == "freya":
+            await sync(f"guild_icon:{GUILD_ID}", AI_ICONS_DIR / "mount_olympus.png",
+                       lambda data: upload_server_icon(client, data))
+
+
+async def upload_all(tokens: Dict[str, str], manifest: UploadManifest, verify: bool = False,
+                     force: bool = False, api_base: Optional[str] = None) -> Dict[str, int]:
+    """Run one worker per bot token concurrently; returns uploaded/skipped/failed counts."""
+    results = {"uploaded": 0, "skipped": 0, "failed": 0}
+    bots = list(dict.fromkeys(BOTS + list(APP_IDS)))
+    for bot_name in bots:
+        if bot_name not in tokens:
+            print(f"⚠️  Skipping {bot_name} - no token available")
+            results["failed"] += 1
+    await asyncio.gather(*(
+        sync_bot(bot_name, tokens[bot_name], manifest, results, verify, force, api_base)
+        for bot_name in bots if bot_name in tokens
+    ))
+    return results
 
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Upload AI-generated icons and banners to Discord")
+    parser.add_argument("--verify", action="store_true",
+                        help="compare against each bot's current avatar/banner (one GET /users/@me per bot)")
+    parser.add_argument("--force", action="store_true", help="upload everything, ignoring the manifest")
+    args = parser.parse_args()
+
     print("🚀 Uploading AI-Generated Icons to Discord")
     print("=" * 50)
 
     # Check if AI icons exist
-    ai_icons_dir = Path("assets/ai_icons")
-    if not ai_icons_dir.exists():
+    if not AI_ICONS_DIR.exists():
         print("❌ AI icons directory not found!")
         print("   Run discord_ai_icons.py first to generate icons")
         sys.exit(1)
+    if not BANNERS_DIR.exists():
+        print("⚠️  assets/banners/ not found — run discord_banners.py first")
 
     # Get bot tokens
     print("\n🔐 Extracting bot tokens from Ansible Vault...")
     tokens = get_vault_tokens()
     print(f"   Found {len(tokens)} bot tokens")
 
-    # Upload bot avatars
-    print("\n📤 Uploading bot avatars...")
-    upload_success = 0
-    upload_failed = 0
-
-    for bot_name in BOTS:
-        icon_path = ai_icons_dir / f"{bot_name}.png"
-
-        if not icon_path.exists():
-            print(f"⚠️  Icon not found: {icon_path}")
-            upload_failed += 1
-            continue
-
-        if bot_name in tokens:
-            if upload_bot_avatar(bot_name, tokens[bot_name], icon_path):
-                upload_success += 1
-            else:
-                upload_failed += 1
-        else:
-            print(f"⚠️  Skipping {bot_name} - no token available")
-            upload_failed += 1
-
-    # Upload Developer Portal app icons
-    print("\n📤 Uploading Developer Portal app icons...")
-    app_icons_dir = Path("assets/ai_app_icons")
-
-    for bot_name, app_id in APP_IDS.items():
-        icon_path = app_icons_dir / f"{bot_name}.png"
-
-        if not icon_path.exists():
-            print(f"⚠️  App icon not found: {icon_path}")
-            upload_failed += 1
-            continue
-
-        if bot_name not in tokens:
-            print(f"⚠️  Skipping {bot_name} app icon - no token available")
-            upload_failed += 1
-            continue
-
-        if upload_app_icon(bot_name, app_id, tokens[bot_name], icon_path):
-            upload_success += 1
-        else:
-            upload_failed += 1
-
-        time.sleep(0.5)  # gentle rate limiting
-
-    # Upload Developer Portal banners (cover images)
-    print("\n📤 Uploading Developer Portal banners...")
-    banners_dir = Path("assets/banners")
-
-    if not banners_dir.exists():
-        print("⚠️  assets/banners/ not found — run discord_banners.py first")
-    else:
-        for bot_name, app_id in APP_IDS.items():
-            banner_path = banners_dir / f"{bot_name}.png"
-
-            if not banner_path.exists():
-                print(f"⚠️  Banner not found: {banner_path}")
-                upload_failed += 1
-                continue
-
-            if bot_name not in tokens:
-                print(f"⚠️  Skipping {bot_name} banner - no token available")
-                upload_failed += 1
-                continue
-
-            if upload_app_banner(bot_name, app_id, tokens[bot_name], banner_path):
-                upload_success += 1
-            else:
-                upload_failed += 1
-
-            time.sleep(0.5)
-
-    # Upload server icon
-    print("\n📤 Uploading server icon...")
-    server_icon_path = ai_icons_dir / "mount_olympus.png"
-
-    if server_icon_path.exists() and "freya" in tokens:
-        if upload_server_icon(tokens["freya"], server_icon_path):
-            upload_success += 1
-        else:
-            upload_failed += 1
-    else:
-        print("⚠️  Cannot upload server icon - file or token missing")
-        upload_failed += 1
+    print("\n📤 Uploading avatars, app icons, banners and the server icon (one worker per bot)...")
+    results = asyncio.run(upload_all(tokens, UploadManifest(), args.verify, args.force))
 
     # Summary
     print("\n" + "=" * 50)
-    print(f"✅ Successfully uploaded: {upload_success}")
-    print(f"❌ Failed uploads: {upload_failed}")
+    print(f"✅ Successfully uploaded: {results['uploaded']}")
+    print(f"⏭️  Unchanged, skipped: {results['skipped']}")
+    print(f"❌ Failed uploads: {results['failed']}")
     print("\n🎉 Done! Check Discord to see the new AI-generated icons!")
 
 
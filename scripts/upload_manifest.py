@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Discord Asset Upload Manifest
+
+Records, for every avatar, banner, app icon and server icon that was uploaded
+successfully, the SHA-256 of the image bytes and the asset hash Discord
+returned for it. Upload scripts consult it before each PATCH and skip assets
+whose bytes have not changed, so re-running the asset pipeline makes no API
+calls when nothing changed, and the strict avatar-change rate limit is only
+spent on real changes.
+
+With verification, the caller also passes the hash Discord reports today
+(`avatar`/`banner` from GET /users/@me); an asset changed behind our back,
+e.g. by hand in the client, no longer matches and is uploaded again.
+
+Usage:
+    from upload_manifest import UploadManifest
+
+    manifest = UploadManifest()
+    # blocking uploader (discord_avatars.py)
+    manifest.sync_asset("avatar:zeus", png_bytes, lambda data: upload_bot_avatar("zeus", token, data))
+    # coroutine uploader (upload_ai_icons.py, asset_build.py)
+    await manifest.sync_asset_async("avatar:zeus", png_bytes,
+                                    lambda data: upload_bot_avatar(client, "zeus", data))
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+MANIFEST_PATH = Path("assets/.cache/upload-manifest.json")
+
+# Sentinel for "Discord's current hash was not fetched" (None means Discord has no asset set).
+UNVERIFIED = object()
+
+
+class UploadManifest:
+    """key → {"sha256", "discord_hash"} of the last successful upload, kept in a JSON file."""
+
+    def __init__(self, path: Path = MANIFEST_PATH):
+        self.path = path
+        try:
+            self.entries: Dict[str, dict] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError as e:
+            print(f"⚠️  Ignoring unreadable upload manifest {path}: {e}")
+            self.entries = {}
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def is_current(self, key: str, data: bytes, remote_hash=UNVERIFIED) -> bool:
+        """True when `data` is what was last uploaded for `key` (and, if given, Discord still has it)."""
+        entry = self.entries.get(key)
+        if not entry or entry["sha256"] != self.digest(data):
+            return False
+        return remote_hash is UNVERIFIED or entry.get("discord_hash") == remote_hash
+
+    def record(self, key: str, data: bytes, discord_hash: Optional[str]) -> None:
+        self.entries[key] = {"sha256": self.digest(data), "discord_hash": discord_hash}
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+    def sync_asset(
+        self,
+        key: str,
+        data: bytes,
+        upload: Callable[[bytes], Optional[str]],
+        remote_hash=UNVERIFIED,
+        force: bool = False,
+    ) -> str:
+        """Upload `data` unless the manifest says it is already there.
+
+        `upload(data)` returns the asset hash Discord reports ("" if none), or
+        None on failure. Returns "skipped", "uploaded" or "failed".
+        """
+        if self._skip(key, data, remote_hash, force):
+            return "skipped"
+        return self._finish(key, data, upload(data))
+
+    async def sync_asset_async(
+        self,
+        key: str,
+        data: bytes,
+        upload: Callable[[bytes], Awaitable[Optional[str]]],
+        remote_hash=UNVERIFIED,
+        force: bool = False,
+    ) -> str:
+        """sync_asset for a coroutine uploader."""
+        if self._skip(key, data, remote_hash, force):
+            return "skipped"
+        return self._finish(key, data, await upload(data))
+
+    def _skip(self, key: str, data: bytes, remote_hash, force: bool) -> bool:
+        if force or not self.is_current(key, data, remote_hash):
+            return False
+        print(f"⏭️  Unchanged: {key}")
+        return True
+
+    def _finish(self, key: str, data: bytes, discord_hash: Optional[str]) -> str:
+        if discord_hash is None:
+            return "failed"
+        self.record(key, data, discord_hash)
+        return "uploaded"
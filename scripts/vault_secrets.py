@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Ansible Vault Secret Loader
+
+Reads the inline `!vault` values in ansible/inventory/group_vars/all/ and
+decrypts them in this process with the ansible.parsing.vault API: one YAML
+parse and one pass over the wanted keys, instead of an `ansible localhost -m
+debug` run per secret. Decrypted values are kept in memory for the life of the
+process.
+
+Set VAULT_SECRETS_TTL (seconds) to also cache them in a 0600 file on tmpfs
+($XDG_RUNTIME_DIR or /dev/shm; never on disk), so back-to-back script runs skip
+decryption entirely. The file is flock()ed while it is read or refreshed, so
+concurrent scripts decrypt once between them, and it is ignored once the TTL
+expires or any vars file changes. Without a tmpfs (macOS) the cache is skipped.
+
+Usage:
+    from vault_secrets import discord_bot_tokens, load_secrets
+
+    tokens = discord_bot_tokens(["zeus", "hermes"], {"hermes": "vault_hermes_conductor_token"})
+    webhooks = load_secrets(prefix="vault_discord_webhook_url_")
+
+    # List what decrypts (names only), e.g. to check the password file
+    uv run --with ansible-core python3 scripts/vault_secrets.py
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import yaml
+
+VARS_DIR = Path(__file__).resolve().parent.parent / "ansible/inventory/group_vars/all"
+VAULT_PASSWORD_FILE = Path(os.environ.get("ANSIBLE_VAULT_PASSWORD_FILE", Path.home() / ".vault_pass.txt"))
+DISCORD_PREFIX = "vault_discord_"
+CACHE_NAME = f"olympus-vault-secrets-{os.getuid()}.json"
+
+_SECRETS: Dict[str, str] = {}
+
+
+class VaultError(Exception):
+    """The vault password or vars files are missing or unreadable."""
+
+
+class VaultText(str):
+    """Ciphertext of an inline `!vault |` value, still encrypted."""
+
+
+class _VarsLoader(yaml.SafeLoader):
+    pass
+
+
+_VarsLoader.add_constructor("!vault", lambda loader, node: VaultText(loader.construct_scalar(node)))
+
+
+def _vars_files() -> List[Path]:
+    return sorted(VARS_DIR.glob("*.yml")) + sorted(VARS_DIR.glob("*.yaml"))
+
+
+def _encrypted_vars() -> Dict[str, VaultText]:
+    """Every top-level `!vault` value in the group_vars/all files, still encrypted."""
+    encrypted = {}
+    for path in _vars_files():
+        data = yaml.load(path.read_text(), Loader=_VarsLoader) or {}
+        encrypted.update({name: value for name, value in data.items() if isinstance(value, VaultText)})
+    return encrypted
+
+
+def _fingerprint() -> List[list]:
+    return [[str(path), path.stat().st_mtime_ns, path.stat().st_size] for path in _vars_files()]
+
+
+def _vault() -> "VaultLib":
+    # Imported on first decrypt, so scripts that only may upload (asset_build.py)
+    # don't need ansible-core, or its import time, to run
+    from ansible.constants import DEFAULT_VAULT_ID_MATCH
+    from ansible.parsing.vault import VaultLib, VaultSecret
+
+    if not VAULT_PASSWORD_FILE.exists():
+        raise VaultError(f"Vault password file not found: {VAULT_PASSWORD_FILE}")
+    password = VAULT_PASSWORD_FILE.read_bytes().strip()
+    return VaultLib([(DEFAULT_VAULT_ID_MATCH, VaultSecret(password))])
+
+
+def _decrypt(encrypted: Dict[str, VaultText]) -> Dict[str, str]:
+    from ansible.errors import AnsibleError
+
+    vault = _vault()
+    secrets = {}
+    for name, ciphertext in encrypted.items():
+        try:
+            secrets[name] = vault.decrypt(ciphertext).decode().strip()
+        except AnsibleError as e:
+            print(f"⚠️  Failed to decrypt {name}: {e}")
+    return secrets
+
+
+def _cache_path() -> Optional[Path]:
+    for directory in (os.environ.get("XDG_RUNTIME_DIR"), "/dev/shm"):
+        if directory and os.path.isdir(directory) and os.access(directory, os.W_OK):
+            return Path(directory) / CACHE_NAME
+    return None
+
+
+def _cache_ttl(ttl: Optional[float]) -> float:
+    return float(os.environ.get("VAULT_SECRETS_TTL", 0)) if ttl is None else ttl
+
+
+def _decrypt_cached(encrypted: Dict[str, VaultText], ttl: float) -> Dict[str, str]:
+    """Decrypt through the tmpfs cache: reuse fresh entries, decrypt and store the rest."""
+    path = _cache_path()
+    if not ttl or path is None:
+        return _decrypt(encrypted)
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, "r+") as cache:
+        fcntl.flock(cache, fcntl.LOCK_EX)
+        try:
+            entry = json.loads(cache.read() or "{}")
+        except json.JSONDecodeError:
+            entry = {}
+        fingerprint = _fingerprint()
+        if entry.get("fingerprint") != fingerprint or entry.get("expires", 0) < time.time():
+            entry = {"fingerprint": fingerprint, "expires": time.time() + ttl, "secrets": {}}
+
+        cached = entry["secrets"]
+        missing = {name: value for name, value in encrypted.items() if name not in cached}
+        if missing:
+            cached.update(_decrypt(missing))
+            cache.seek(0)
+            cache.truncate()
+            json.dump(entry, cache)
+        return {name: cached[name] for name in encrypted if name in cached}
+
+
+def load_secrets(prefix: str = DISCORD_PREFIX, names: Iterable[str] = (), ttl: Optional[float] = None) -> Dict[str, str]:
+    """Decrypted vault values whose name starts with `prefix`, plus any in `names`.
+
+    `ttl` overrides VAULT_SECRETS_TTL for the tmpfs cache (0 disables it).
+    Names that are not vaulted are simply absent from the result.
+    """
+    names = set(names)
+    encrypted = _encrypted_vars()
+    wanted = [name for name in encrypted if name.startswith(prefix) or name in names]
+    missing = {name: encrypted[name] for name in wanted if name not in _SECRETS}
+    if missing:
+        _SECRETS.update(_decrypt_cached(missing, _cache_ttl(ttl)))
+    return {name: _SECRETS[name] for name in wanted if name in _SECRETS}
+
+
+def discord_bot_tokens(bots: Iterable[str], overrides: Optional[Dict[str, str]] = None,
+                       ttl: Optional[float] = None) -> Dict[str, str]:
+    """bot → token from vault_discord_bot_token_<bot> (or the var named in `overrides`)."""
+    overrides = overrides or {}
+    token_vars = {bot: overrides.get(bot, f"vault_discord_bot_token_{bot}") for bot in bots}
+    secrets = load_secrets(names=token_vars.values(), ttl=ttl)
+    tokens = {bot: secrets[var] for bot, var in token_vars.items() if secrets.get(var)}
+    for bot in token_vars.keys() - tokens.keys():
+        print(f"⚠️  No vault token for {bot} ({token_vars[bot]})")
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--prefix", default=DISCORD_PREFIX, help="vault var name prefix to decrypt")
+    parser.add_argument("--ttl", type=float, default=None, help="tmpfs cache TTL in seconds (default: $VAULT_SECRETS_TTL)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        secrets = load_secrets(prefix=args.prefix, ttl=args.ttl)
+    except VaultError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    for name, value in secrets.items():
+        print(f"🔑 {name} ({len(value)} chars)")
+    print(f"\n✅ Decrypted {len(secrets)} secrets in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
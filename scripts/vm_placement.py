@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Proxmox VM Placement Planner
+
+Computes which node each agent VM should run on from the cluster's real
+capacity instead of hand-pinned `host:` entries. Node vCPU and RAM come from
+the Proxmox API (live through proxmoxer, or a fixture recorded with
+ansible/main.py --record). VM sizes (vcpus, memory_mb, disk_gb) come from
+`agents` and `service_vms` in roles/proxmox_vm/defaults/main.yml.
+
+Every node keeps headroom: a share of its threads and RAM (default 20%) plus
+a host reserve for Proxmox and Ceph. A VM on non-Ceph storage also has to fit
+the node's disk. Anti-affinity spreads each group (all agents; the runners)
+as evenly as the node count allows. Within those limits the plan balances
+CPU and RAM utilisation across nodes. It minimises the sum of squared
+utilisations, first by worst-fit-decreasing and then by single moves and
+pairwise swaps. Each migration costs a little, so an already balanced VM
+stays put.
+
+Service VMs keep their current node unless --include-services is given.
+
+Usage:
+    uv run --with pyyaml --with proxmoxer --with requests python3 scripts/vm_placement.py
+    python3 scripts/vm_placement.py --fixture ansible/fixtures/proxmox-api.json
+    python3 scripts/vm_placement.py --fixture ansible/fixtures/proxmox-api.json --exclude r820 --json
+    python3 scripts/vm_placement.py --write-defaults
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ANSIBLE_DIR = REPO_ROOT / "ansible"
+DEFAULTS_FILE = ANSIBLE_DIR / "roles" / "proxmox_vm" / "defaults" / "main.yml"
+sys.path.insert(0, str(ANSIBLE_DIR))
+import main as proxmox_inventory  # noqa: E402
+
+HEADROOM = 0.20
+RESERVE_MB = 8192
+CPU_RATIO = 1.0
+MIGRATION_COST = 0.01
+SHARED_STORAGE = ("ceph-",)
+
+
+class PlacementError(Exception):
+    """No placement satisfies the capacity and anti-affinity rules."""
+
+
+@dataclass
+class Node:
+    name: str
+    vcpus: int
+    memory_mb: int
+    disk_gb: int
+    reserve_mb: int
+    vcpu_limit: float
+    memory_limit_mb: float
+    disk_limit_gb: float
+
+
+@dataclass
+class Vm:
+    name: str
+    vmid: int
+    kind: str
+    vcpus: int
+    memory_mb: int
+    disk_gb: int
+    storage: str
+    current: Optional[str]
+    pinned: bool = False
+
+    @property
+    def local_disk_gb(self) -> int:
+        return 0 if self.storage.startswith(SHARED_STORAGE) else self.disk_gb
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+
+def short(host: str) -> str:
+    return host.split(".")[0]
+
+
+def load_vms(data: Dict, defaults_path: Path = DEFAULTS_FILE, include_services: bool = False) -> List[Vm]:
+    """Agent and service VMs with their sizes, on the node Proxmox reports (else their `host:`)."""
+    import yaml
+
+    defaults = yaml.safe_load(defaults_path.read_text())
+    running = {vm["vmid"]: vm["node"] for vm in data["vms"]}
+    vms = []
+    for kind, entries in (("agent", defaults["agents"]), ("service", defaults["service_vms"])):
+        for name, spec in entries.items():
+            vms.append(Vm(name=name, vmid=spec["vmid"], kind=kind, vcpus=spec["vcpus"], memory_mb=spec["memory_mb"],
+                          disk_gb=spec["disk_gb"], storage=spec.get("storage", defaults["vm_storage"]),
+                          current=running.get(spec["vmid"], short(spec["host"])),
+                          pinned=kind == "service" and not include_services))
+    return vms
+
+
+def load_nodes(data: Dict, headroom: float = HEADROOM, reserve_mb: int = RESERVE_MB, cpu_ratio: float = CPU_RATIO,
+               exclude: Tuple[str, ...] = ()) -> List[Node]:
+    """Online nodes with their usable capacity once headroom and the host reserve are kept free.
+
+    The reserve is the larger of `reserve_mb` and what the node uses beyond
+    its VMs' allocations (Ceph OSDs, ZFS ARC, pveproxy...).
+    """
+    allocated: Dict[str, int] = {}
+    for vm in data["vms"]:
+        if vm.get("status") == "running":
+            allocated[vm["node"]] = allocated.get(vm["node"], 0) + (vm.get("maxmem") or 0) // 2**20
+    nodes = []
+    for entry in sorted(data["nodes"], key=lambda n: n["node"]):
+        if entry.get("status") != "online" or entry["node"] in exclude:
+            continue
+        memory_mb = entry["maxmem"] // 2**20
+        reserve = max(reserve_mb, (entry.get("mem") or 0) // 2**20 - allocated.get(entry["node"], 0))
+        disk_gb = (entry.get("maxdisk") or 0) // 2**30
+        nodes.append(Node(name=entry["node"], vcpus=entry["maxcpu"], memory_mb=memory_mb, disk_gb=disk_gb,
+                          reserve_mb=reserve, vcpu_limit=entry["maxcpu"] * cpu_ratio * (1 - headroom),
+                          memory_limit_mb=memory_mb * (1 - headroom) - reserve,
+                          disk_limit_gb=disk_gb * (1 - headroom)))
+    if not nodes:
+        raise PlacementError("no online nodes")
+    return nodes
+
+
+def anti_affinity(vms: List[Vm]) -> Dict[str, List[str]]:
+    """Groups whose members should not share a node: the agents, and VMs numbered like runner-1, runner-2."""
+    groups: Dict[str, List[str]] = {"agents": [vm.name for vm in vms if vm.kind == "agent"]}
+    for vm in vms:
+        match = re.fullmatch(r"(.+)-\d+", vm.name)
+        if match:
+            groups.setdefault(f"{match.group(1)}s", []).append(vm.name)
+    return {name: members for name, members in groups.items() if len(members) > 1}
+
+
+# ---------------------------------------------------------------------------
+# Solver
+# ---------------------------------------------------------------------------
+
+
+class Plan:
+    """An assignment of VMs to nodes with incrementally maintained usage."""
+
+    def __init__(self, nodes: List[Node], vms: List[Vm], groups: Dict[str, List[str]], migration_cost: float):
+        self.nodes = {node.name: node for node in nodes}
+        self.vms = {vm.name: vm for vm in vms}
+        self.migration_cost = migration_cost
+        self.groups = {vm: [group for group, members in groups.items() if vm in members] for vm in self.vms}
+        self.limits = {group: math.ceil(len(members) / len(nodes)) for group, members in groups.items()}
+        self.where: Dict[str, str] = {}
+        self.cpu = {name: 0.0 for name in self.nodes}
+        self.mem = {name: 0.0 for name in self.nodes}
+        self.disk = {name: 0.0 for name in self.nodes}
+        self.count = {(group, name): 0 for group in groups for name in self.nodes}
+
+    def copy(self) -> "Plan":
+        plan = object.__new__(Plan)
+        plan.__dict__.update({key: value.copy() if isinstance(value, dict) and key in
+                              ("where", "cpu", "mem", "disk", "count") else value
+                              for key, value in self.__dict__.items()})
+        return plan
+
+    def _apply(self, vm: Vm, node: str, sign: int) -> None:
+        self.cpu[node] += sign * vm.vcpus
+        self.mem[node] += sign * vm.memory_mb
+        self.disk[node] += sign * vm.local_disk_gb
+        for group in self.groups[vm.name]:
+            self.count[group, node] += sign
+
+    def assign(self, name: str, node: str) -> None:
+        vm = self.vms[name]
+        if name in self.where:
+            self._apply(vm, self.where.pop(name), -1)
+        self.where[name] = node
+        self._apply(vm, node, +1)
+
+    def fits(self, name: str, node: str) -> bool:
+        """Whether `name` could move to `node` (capacity and anti-affinity)."""
+        vm, limits = self.vms[name], self.nodes[node]
+        if self.where.get(name) == node:
+            return True
+        return (self.cpu[node] + vm.vcpus <= limits.vcpu_limit
+                and self.mem[node] + vm.memory_mb <= limits.memory_limit_mb
+                and self.disk[node] + vm.local_disk_gb <= limits.disk_limit_gb
+                and all(self.count[group, node] < self.limits[group] for group in self.groups[name]))
+
+    def valid(self) -> bool:
+        return all(self.cpu[n] <= node.vcpu_limit and self.mem[n] <= node.memory_limit_mb
+                   and self.disk[n] <= node.disk_limit_gb for n, node in self.nodes.items()) and \
+            all(count <= self.limits[group] for (group, _), count in self.count.items())
+
+    def utilisation(self, node: str) -> Tuple[float, float]:
+        limits = self.nodes[node]
+        return self.cpu[node] / limits.vcpu_limit, self.mem[node] / limits.memory_limit_mb
+
+    def _balance(self, node: str, cpu: float, mem: float) -> float:
+        limits = self.nodes[node]
+        return (cpu / limits.vcpu_limit) ** 2 + (mem / limits.memory_limit_mb) ** 2
+
+    def cost(self) -> float:
+        balance = sum(self._balance(node, self.cpu[node], self.mem[node]) for node in self.nodes)
+        moves = sum(1 for name, node in self.where.items() if node != self.vms[name].current)
+        return balance + self.migration_cost * moves
+
+    def move_delta(self, name: str, node: str) -> float:
+        """Change in cost if `name` moved to `node`; only the two nodes involved are re-scored."""
+        vm, src = self.vms[name], self.where[name]
+        before = self._balance(src, self.cpu[src], self.mem[src]) + self._balance(node, self.cpu[node], self.mem[node])
+        after = (self._balance(src, self.cpu[src] - vm.vcpus, self.mem[src] - vm.memory_mb)
+                 + self._balance(node, self.cpu[node] + vm.vcpus, self.mem[node] + vm.memory_mb))
+        return after - before + self.migration_cost * ((node != vm.current) - (src != vm.current))
+
+    def swap_fits(self, a: str, b: str) -> bool:
+        """Whether `a` and `b` could trade nodes (capacity and anti-affinity)."""
+        vm_a, vm_b = self.vms[a], self.vms[b]
+        for node, gain, loss in ((self.where[b], vm_a, vm_b), (self.where[a], vm_b, vm_a)):
+            limits = self.nodes[node]
+            if (self.cpu[node] + gain.vcpus - loss.vcpus > limits.vcpu_limit
+                    or self.mem[node] + gain.memory_mb - loss.memory_mb > limits.memory_limit_mb
+                    or self.disk[node] + gain.local_disk_gb - loss.local_disk_gb > limits.disk_limit_gb):
+                return False
+            for group in set(self.groups[gain.name]) - set(self.groups[loss.name]):
+                if self.count[group, node] >= self.limits[group]:
+                    return False
+        return True
+
+    def swap_delta(self, a: str, b: str) -> float:
+        vm_a, vm_b = self.vms[a], self.vms[b]
+        node_a, node_b = self.where[a], self.where[b]
+        cpu, mem = vm_b.vcpus - vm_a.vcpus, vm_b.memory_mb - vm_a.memory_mb
+        before = (self._balance(node_a, self.cpu[node_a], self.mem[node_a])
+                  + self._balance(node_b, self.cpu[node_b], self.mem[node_b]))
+        after = (self._balance(node_a, self.cpu[node_a] + cpu, self.mem[node_a] + mem)
+                 + self._balance(node_b, self.cpu[node_b] - cpu, self.mem[node_b] - mem))
+        moves = ((node_b != vm_a.current) + (node_a != vm_b.current)
+                 - (node_a != vm_a.current) - (node_b != vm_b.current))
+        return after - before + self.migration_cost * moves
+
+
+def _greedy(plan: Plan, names: List[str]) -> Plan:
+    """Worst-fit decreasing: largest VMs first, each onto the node it leaves least utilised."""
+    for name in sorted(names, key=lambda n: (-plan.vms[n].memory_mb, -plan.vms[n].vcpus, n)):
+        vm = plan.vms[name]
+        candidates = [node for node in plan.nodes if plan.fits(name, node)]
+        if not candidates:
+            raise PlacementError(f"{name} ({vm.vcpus} vCPU, {vm.memory_mb} MB) fits on no node")
+
+        def after(node: str) -> Tuple[float, bool, str]:
+            limits = plan.nodes[node]
+            share = max((plan.cpu[node] + vm.vcpus) / limits.vcpu_limit,
+                        (plan.mem[node] + vm.memory_mb) / limits.memory_limit_mb)
+            return share, node != vm.current, node
+
+        plan.assign(name, min(candidates, key=after))
+    return plan
+
+
+def _improve(plan: Plan, movable: List[str]) -> Plan:
+    """Best-improvement local search over single moves and pairwise swaps."""
+    while True:
+        best, best_delta = None, -1e-9
+        for name in movable:
+            for node in plan.nodes:
+                if node != plan.where[name] and plan.fits(name, node):
+                    delta = plan.move_delta(name, node)
+                    if delta < best_delta:
+                        best, best_delta = ((name, node),), delta
+        for i, a in enumerate(movable):
+            for b in movable[i + 1:]:
+                if plan.where[a] != plan.where[b] and plan.swap_fits(a, b):
+                    delta = plan.swap_delta(a, b)
+                    if delta < best_delta:
+                        best, best_delta = ((a, plan.where[b]), (b, plan.where[a])), delta
+        if best is None:
+            return plan
+        for name, node in best:
+            plan.assign(name, node)
+
+
+def place(nodes: List[Node], vms: List[Vm], groups: Optional[Dict[str, List[str]]] = None,
+          migration_cost: float = MIGRATION_COST) -> Plan:
+    """The balanced plan: the better of improving the current layout and improving a fresh packing."""
+    groups = anti_affinity(vms) if groups is None else groups
+    base = Plan(nodes, vms, groups, migration_cost)
+    # A pinned VM on a drained or offline node has to move like any other
+    pinned = [vm for vm in vms if vm.pinned and vm.current in base.nodes]
+    for vm in pinned:
+        base.assign(vm.name, vm.current)
+    movable = sorted(vm.name for vm in vms if vm.name not in base.where)
+
+    # Start from where things run now, re-placing only what no longer fits there
+    current = base.copy()
+    for name in sorted(movable, key=lambda n: current.vms[n].vmid):
+        node = current.vms[name].current
+        if node in current.nodes and current.fits(name, node):
+            current.assign(name, node)
+    candidates = [_improve(_greedy(base.copy(), movable), movable)]
+    try:
+        candidates.append(_improve(_greedy(current, [n for n in movable if n not in current.where]), movable))
+    except PlacementError:
+        pass
+    return min(candidates, key=Plan.cost)
+
+
+def migrations(plan: Plan) -> List[Dict]:
+    moves = []
+    for name in sorted(plan.where, key=lambda n: plan.vms[n].vmid):
+        vm, target = plan.vms[name], plan.where[name]
+        if vm.current != target:
+            moves.append({"vm": name, "vmid": vm.vmid, "from": vm.current, "to": target,
+                          "command": f"pvesh create /nodes/{vm.current}/qemu/{vm.vmid}/migrate "
+                                     f"--target {target} --online 1"})
+    return moves
+
+
+def summary(plan: Plan) -> Dict:
+    nodes = []
+    for name, node in plan.nodes.items():
+        cpu, mem = plan.utilisation(name)
+        nodes.append({"node": name, "vcpus": plan.cpu[name], "vcpu_limit": round(node.vcpu_limit, 1),
+                      "memory_mb": plan.mem[name], "memory_limit_mb": round(node.memory_limit_mb),
+                      "cpu_util": round(cpu, 3), "mem_util": round(mem, 3),
+                      "vms": sorted((vm for vm, where in plan.where.items() if where == name),
+                                    key=lambda vm: plan.vms[vm].vmid)})
+    return {"nodes": nodes, "placement": {vm: plan.where[vm] for vm in sorted(plan.where)},
+            "migrations": migrations(plan), "cost": round(plan.cost(), 4)}
+
+
+def spread(plan: Plan) -> Tuple[float, float]:
+    """(highest, lowest) of each node's larger utilisation share."""
+    shares = [max(plan.utilisation(node)) for node in plan.nodes]
+    return max(shares), min(shares)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+
+def print_plan(plan: Plan) -> None:
+    print(f"{'node':<8} {'vCPU':>11} {'RAM (GiB)':>15} {'CPU':>5} {'RAM':>5}  VMs")
+    for row in summary(plan)["nodes"]:
+        print(f"{row['node']:<8} {row['vcpus']:>4.0f} / {row['vcpu_limit']:<4.0f} "
+              f"{row['memory_mb'] / 1024:>6.0f} / {row['memory_limit_mb'] / 1024:<6.0f} "
+              f"{row['cpu_util']:>5.0%} {row['mem_util']:>5.0%}  {', '.join(row['vms']) or '-'}")
+    moves = migrations(plan)
+    print(f"\n{len(moves)} migration(s)")
+    for move in moves:
+        print(f"  {move['vm']} ({move['vmid']}): {move['from']} → {move['to']}")
+        print(f"    {move['command']}")
+
+
+def write_defaults(plan: Plan, path: Path = DEFAULTS_FILE, domain: str = proxmox_inventory.DOMAIN) -> int:
+    """Rewrite the `host:` line of every VM whose node changed; comments and layout are kept."""
+    lines = path.read_text().splitlines(keepends=True)
+    changed, vm = 0, None
+    for i, line in enumerate(lines):
+        match = re.match(r"  ([\w-]+):\s*$", line)
+        if match:
+            vm = match.group(1)
+        host = re.match(r"(    host: )(\S+)(\s*)$", line)
+        if host and vm in plan.where and short(host.group(2)) != plan.where[vm]:
+            lines[i] = f"{host.group(1)}{plan.where[vm]}.{domain}{host.group(3)}"
+            changed += 1
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text("".join(lines))
+    os.replace(tmp, path)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixture", type=Path, help="recorded API responses instead of the live API")
+    parser.add_argument("--defaults", type=Path, default=DEFAULTS_FILE, help="proxmox_vm role defaults")
+    parser.add_argument("--headroom", type=float, default=HEADROOM, help="share of CPU and RAM kept free per node")
+    parser.add_argument("--reserve-mb", type=int, default=RESERVE_MB, help="RAM kept for Proxmox/Ceph per node")
+    parser.add_argument("--cpu-ratio", type=float, default=CPU_RATIO, help="vCPUs allowed per host thread")
+    parser.add_argument("--migration-cost", type=float, default=MIGRATION_COST,
+                        help="balance a migration must buy to be worth it")
+    parser.add_argument("--include-services", action="store_true", help="also move service VMs")
+    parser.add_argument("--exclude", action="append", default=[], help="node to drain (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print the plan as JSON")
+    parser.add_argument("--write-defaults", action="store_true", help="update host: lines in the role defaults")
+    args = parser.parse_args()
+
+    fixture = args.fixture or (Path(os.environ["PROXMOX_INVENTORY_FIXTURE"])
+                               if os.environ.get("PROXMOX_INVENTORY_FIXTURE") else None)
+    try:
+        source = proxmox_inventory.RecordedSource(fixture) if fixture else proxmox_inventory.ProxmoxSource()
+        data = proxmox_inventory.fetch(source)
+        nodes = load_nodes(data, args.headroom, args.reserve_mb, args.cpu_ratio, tuple(args.exclude))
+        vms = load_vms(data, args.defaults, args.include_services)
+        plan = place(nodes, vms, migration_cost=args.migration_cost)
+    except (PlacementError, proxmox_inventory.InventoryError) as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({**summary(plan), "nodes_capacity": [asdict(node) for node in nodes]}, indent=2))
+    else:
+        print_plan(plan)
+    if args.write_defaults:
+        changed = write_defaults(plan, args.defaults)
+        print(f"\n✅ Updated {changed} host: line(s) in {args.defaults}", file=sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()